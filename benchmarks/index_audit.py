@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""stock_prices のインデックス構成による書き込み性能・サイズの比較ベンチマーク
+
+マイグレーション007の前後のインデックス構成で同じ合成データをupsertし、
+挿入スループット・インデックスサイズ・代表的なクエリの時間を比較する。
+ローカルのPostgreSQL（環境変数 POSTGRES_*）に index_audit スキーマを作って実行し、終了時に削除する。
+
+使い方:
+    python -m benchmarks.index_audit --codes 500 --days 250 --output index_audit.json
+"""
+
+import argparse
+import json
+import logging
+import random
+import statistics
+import sys
+import time
+from datetime import date
+
+from psycopg2.extras import execute_values
+
+from benchmarks.synthetic import trading_days
+from src.database import engine
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+logger = logging.getLogger(__name__)
+
+SCHEMA = "index_audit"
+
+# マイグレーション007の前後のインデックス構成（{table} はテーブル名、{name} は接頭辞に置換）
+LAYOUTS = {
+    "before": [
+        "CREATE INDEX {name}_code ON {table} (code)",
+        "CREATE INDEX {name}_code_date ON {table} (code, trade_date)",
+        "CREATE INDEX {name}_trade_date_code ON {table} (trade_date, code)",
+    ],
+    "after": [
+        "CREATE INDEX {name}_trade_date_brin ON {table} USING brin (trade_date)"
+        " WITH (pages_per_range = 32)",
+    ],
+}
+
+QUERIES = {
+    "latest_snapshot": "SELECT * FROM {table} WHERE trade_date = %(last_day)s",
+    "code_history": (
+        "SELECT * FROM {table} WHERE code = %(code)s ORDER BY trade_date DESC LIMIT 100"
+    ),
+    "date_range": (
+        "SELECT code, avg(close) FROM {table}"
+        " WHERE trade_date BETWEEN %(range_start)s AND %(last_day)s GROUP BY code"
+    ),
+}
+
+UPSERT = """
+    INSERT INTO {table} (code, trade_date, open, high, low, close, volume, adjusted_close)
+    VALUES %s
+    ON CONFLICT (code, trade_date) DO UPDATE SET
+        open = excluded.open, high = excluded.high, low = excluded.low,
+        close = excluded.close, volume = excluded.volume,
+        adjusted_close = excluded.adjusted_close
+"""
+
+
+def generate_day(codes: list[str], day: date, closes: dict[str, float], rng: random.Random):
+    """1日分の合成OHLCVを作る（ランダムウォーク）"""
+    rows = []
+    for code in codes:
+        prev = closes[code]
+        close = max(1.0, prev * (1 + rng.gauss(0, 0.02)))
+        high = max(prev, close) * (1 + abs(rng.gauss(0, 0.005)))
+        low = min(prev, close) * (1 - abs(rng.gauss(0, 0.005)))
+        closes[code] = close
+        rows.append((code, day, prev, high, low, close, rng.randint(1_000, 5_000_000), close))
+    return rows
+
+
+def create_table(cursor, layout: str, years: range) -> str:
+    table = f"{SCHEMA}.prices_{layout}"
+    cursor.execute(
+        f"""
+        CREATE TABLE {table} (
+            id BIGSERIAL NOT NULL,
+            code VARCHAR(10) NOT NULL,
+            trade_date DATE NOT NULL,
+            open DOUBLE PRECISION, high DOUBLE PRECISION, low DOUBLE PRECISION,
+            close DOUBLE PRECISION, volume BIGINT, adjusted_close DOUBLE PRECISION,
+            created_at TIMESTAMP NOT NULL DEFAULT now(),
+            ma5 DOUBLE PRECISION, ma20 DOUBLE PRECISION, rsi9 DOUBLE PRECISION,
+            bb_upper DOUBLE PRECISION, bb_middle DOUBLE PRECISION, bb_lower DOUBLE PRECISION,
+            PRIMARY KEY (id, trade_date),
+            UNIQUE (code, trade_date)
+        ) PARTITION BY RANGE (trade_date)
+        """
+    )
+    for year in years:
+        cursor.execute(
+            f"CREATE TABLE {table}_y{year} PARTITION OF {table}"
+            f" FOR VALUES FROM ('{year}-01-01') TO ('{year + 1}-01-01')"
+        )
+    for ddl in LAYOUTS[layout]:
+        cursor.execute(ddl.format(table=table, name=f"prices_{layout}"))
+    return table
+
+
+def relation_sizes(cursor, table: str) -> dict[str, int]:
+    """テーブル本体と各インデックスのサイズ（全パーティション合計、バイト）"""
+    cursor.execute(
+        """
+        SELECT i.indexrelid::regclass::text,
+               (SELECT sum(pg_relation_size(relid)) FROM pg_partition_tree(i.indexrelid))
+        FROM pg_index i
+        WHERE i.indrelid = %(table)s::regclass
+        """,
+        {"table": table},
+    )
+    sizes = {name: int(size or 0) for name, size in cursor.fetchall()}
+    cursor.execute(
+        "SELECT sum(pg_relation_size(relid)) FROM pg_partition_tree(%(table)s::regclass)",
+        {"table": table},
+    )
+    sizes["table"] = int(cursor.fetchone()[0] or 0)
+    return sizes
+
+
+def run_layout(conn, layout: str, codes: list[str], days: list[date], seed: int) -> dict:
+    rng = random.Random(seed)
+    closes = {code: rng.uniform(100, 10_000) for code in codes}
+    years = range(days[0].year, days[-1].year + 1)
+
+    with conn.cursor() as cursor:
+        table = create_table(cursor, layout, years)
+    conn.commit()
+
+    # 日次取り込みと同じく1日分ずつupsertしてコミット
+    start = time.perf_counter()
+    with conn.cursor() as cursor:
+        for day in days:
+            execute_values(
+                cursor, UPSERT.format(table=table), generate_day(codes, day, closes, rng)
+            )
+            conn.commit()
+    insert_seconds = time.perf_counter() - start
+
+    # 直近5日分の再取り込み（更新パス）
+    start = time.perf_counter()
+    with conn.cursor() as cursor:
+        for day in days[-5:]:
+            execute_values(
+                cursor, UPSERT.format(table=table), generate_day(codes, day, closes, rng)
+            )
+            conn.commit()
+    update_seconds = time.perf_counter() - start
+
+    with conn.cursor() as cursor:
+        cursor.execute(f"ANALYZE {table}")
+        sizes = relation_sizes(cursor, table)
+
+        params = {"last_day": days[-1], "range_start": days[-20], "code": codes[len(codes) // 2]}
+        query_ms = {}
+        for name, sql in QUERIES.items():
+            timings = []
+            for _ in range(20):
+                t0 = time.perf_counter()
+                cursor.execute(sql.format(table=table), params)
+                cursor.fetchall()
+                timings.append((time.perf_counter() - t0) * 1000)
+            query_ms[name] = round(statistics.median(timings), 3)
+    conn.commit()
+
+    inserted = len(codes) * len(days)
+    updated = len(codes) * min(5, len(days))
+    return {
+        "insert_rows_per_sec": round(inserted / insert_seconds, 1),
+        "update_rows_per_sec": round(updated / update_seconds, 1),
+        "index_bytes": sum(v for k, v in sizes.items() if k != "table"),
+        "table_bytes": sizes["table"],
+        "sizes": sizes,
+        "query_median_ms": query_ms,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="stock_prices インデックス構成の比較")
+    parser.add_argument("--codes", type=int, default=500, help="銘柄数")
+    parser.add_argument("--days", type=int, default=250, help="営業日数")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="結果を書き出すJSONファイル")
+    args = parser.parse_args()
+
+    codes = [str(1300 + i) for i in range(args.codes)]
+    days = trading_days(args.days, date.today())
+
+    conn = engine.raw_connection()
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+            cursor.execute(f"CREATE SCHEMA {SCHEMA}")
+        conn.commit()
+
+        results = {
+            "params": {"codes": args.codes, "days": args.days, "seed": args.seed},
+            "layouts": {},
+        }
+        for layout in LAYOUTS:
+            logger.info(f"Running layout '{layout}' ({args.codes} codes x {args.days} days)")
+            results["layouts"][layout] = run_layout(conn, layout, codes, days, args.seed)
+
+        before, after = results["layouts"]["before"], results["layouts"]["after"]
+        results["summary"] = {
+            "insert_speedup": round(
+                after["insert_rows_per_sec"] / before["insert_rows_per_sec"], 2
+            ),
+            "index_bytes_ratio": round(after["index_bytes"] / before["index_bytes"], 3),
+        }
+    finally:
+        conn.rollback()
+        with conn.cursor() as cursor:
+            cursor.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+        conn.commit()
+        conn.close()
+
+    output = json.dumps(results, indent=2, default=str)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+        logger.info(f"Results written to {args.output}")
+    sys.stdout.write(output + "\n")
+
+
+if __name__ == "__main__":
+    main()
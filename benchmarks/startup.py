@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""エントリーポイントの起動時間（import時間）のベンチマーク
+
+各モジュールを新しいプロセスで ``python -X importtime -c "import ..."`` として読み込み、
+累積import時間の中央値と、時間のかかっている直接のimportを記録する。
+
+以下のいずれかに該当すると終了コード1を返す（CIで回帰を検出する）:
+- 予算（BUDGET_MS、--budget-scale で倍率を変更）を超えた
+- --baseline の結果から --threshold 倍を超えて遅くなった
+- 遅延importにしているモジュール（DEFERRED）が起動時に読み込まれた
+
+使い方:
+    python -m benchmarks.startup --output startup.json
+    python -m benchmarks.startup --baseline startup.json --threshold 1.2
+"""
+
+import argparse
+import json
+import logging
+import re
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+logger = logging.getLogger(__name__)
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# エントリーポイントごとの累積import時間の予算（ミリ秒）
+BUDGET_MS = {
+    "src.api": 1500,
+    "src.main": 1000,
+    "src.database": 600,
+}
+
+# 起動時に読み込んではいけない（使用時にimportする）モジュール
+DEFERRED = {
+    "src.api": ("pandas", "numpy", "yfinance", "duckdb"),
+    "src.main": ("pandas", "numpy", "yfinance", "duckdb", "fastapi"),
+    "src.database": ("pandas", "fastapi", "psycopg2"),
+}
+
+_LINE_RE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$")
+
+
+def import_times(module: str) -> list[tuple[int, int, str]]:
+    """新しいプロセスでmoduleをimportし、(累積µs, 深さ, モジュール名) のリストを返す"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    entries = []
+    for line in result.stderr.splitlines():
+        match = _LINE_RE.match(line)
+        if match:
+            _, cumulative, indent, name = match.groups()
+            entries.append((int(cumulative), len(indent) // 2, name))
+    return entries
+
+
+def measure(module: str, runs: int) -> dict:
+    totals = []
+    entries: list[tuple[int, int, str]] = []
+    for _ in range(runs):
+        entries = import_times(module)
+        total = next(cumulative for cumulative, _, name in entries if name == module)
+        totals.append(total / 1000)
+
+    loaded = {name for _, _, name in entries}
+    deferred = [
+        name
+        for name in DEFERRED.get(module, ())
+        if any(m == name or m.startswith(f"{name}.") for m in loaded)
+    ]
+    # moduleが直接importしているもの（深さ1）の上位
+    direct = sorted((e for e in entries if e[1] == 1), reverse=True)[:10]
+    return {
+        "median_ms": round(statistics.median(totals), 1),
+        "min_ms": round(min(totals), 1),
+        "max_ms": round(max(totals), 1),
+        "modules": len(loaded),
+        "deferred_loaded": deferred,
+        "top_imports_ms": {name: round(cumulative / 1000, 1) for cumulative, _, name in direct},
+    }
+
+
+def check(
+    results: dict,
+    budget_scale: float,
+    baseline: dict | None,
+    threshold: float,
+) -> list[str]:
+    """回帰の一覧（空なら合格）"""
+    failures = []
+    for module, result in results.items():
+        if result["deferred_loaded"]:
+            failures.append(f"{module} imports {', '.join(result['deferred_loaded'])} at startup")
+        budget = BUDGET_MS.get(module)
+        if budget is not None and result["median_ms"] > budget * budget_scale:
+            failures.append(
+                f"{module} took {result['median_ms']} ms (budget {budget * budget_scale:.0f} ms)"
+            )
+        if baseline and module in baseline:
+            limit = baseline[module]["median_ms"] * threshold
+            if result["median_ms"] > limit:
+                failures.append(
+                    f"{module} took {result['median_ms']} ms"
+                    f" (baseline {baseline[module]['median_ms']} ms x {threshold})"
+                )
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="エントリーポイントの起動時間")
+    parser.add_argument("--modules", nargs="+", default=list(BUDGET_MS), help="計測するモジュール")
+    parser.add_argument("--runs", type=int, default=5, help="モジュールごとの計測回数")
+    parser.add_argument("--budget-scale", type=float, default=1.0, help="予算の倍率")
+    parser.add_argument("--baseline", help="比較するJSONファイル（以前の --output）")
+    parser.add_argument("--threshold", type=float, default=1.2, help="ベースラインからの許容倍率")
+    parser.add_argument("--output", help="結果を書き出すJSONファイル")
+    args = parser.parse_args()
+
+    results = {}
+    for module in args.modules:
+        results[module] = measure(module, args.runs)
+        logger.info(f"{module}: {results[module]['median_ms']} ms")
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)["results"]
+
+    failures = check(results, args.budget_scale, baseline, args.threshold)
+    output = json.dumps(
+        {"params": vars(args), "results": results, "failures": failures},
+        indent=2,
+        ensure_ascii=False,
+    )
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+        logger.info(f"Results written to {args.output}")
+    sys.stdout.write(output + "\n")
+
+    for failure in failures:
+        logger.error(failure)
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+"""日次ジョブ・指標計算・APIのベンチマーク
+
+合成データ（benchmarks.synthetic）をローカルのPostgreSQL（環境変数 POSTGRES_*）の
+bench スキーマに作ったテーブルへ取り込み、以下を計測する。終了時にスキーマは削除する。
+
+- ingest:     StockDownloader._save_price_data のスループット（行/秒・SQL文数）
+- indicators: update_all_indicators の所要時間（DB読み込み / 列指向ストア読み込み）
+- api:        主要エンドポイントのレイテンシ（p50 / p99）
+
+使い方:
+    python -m benchmarks.suite --codes 200 --days 250 --output bench.json
+    python -m benchmarks.suite --output after.json --baseline bench.json
+"""
+
+import argparse
+import json
+import logging
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event, text
+
+from benchmarks.synthetic import SyntheticMarket, generate_market
+from src.columnar import ColumnarStore, sync_store
+from src.database import Base, SessionLocal, engine, get_read_engine
+from src.downloader import StockDownloader
+from src.metrics import start_query_stats
+from src.partitions import ensure_partitions
+from src.resample import refresh_all_bars
+from src.stock_list import get_yahoo_ticker
+from src.validation import validate_prices
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+logger = logging.getLogger(__name__)
+
+SCHEMA = "bench"
+
+# 計測するエンドポイント（{code} / {codes} は合成銘柄に置換）
+ENDPOINTS = {
+    "stocks": "/stocks?limit=100",
+    "stock_prices": "/stocks/{code}/prices?limit=250",
+    "stock_bars": "/stocks/{code}/bars?interval=week",
+    "prices_latest": "/prices/latest?codes={codes}",
+    "screener": "/screener?q=rsi9%20%3C%2050%20and%20close%20%3E%20ma20&limit=100",
+    "screener_cross": "/screener?q=cross_above(ma5,%20ma20)",
+}
+
+
+def _set_search_path(dbapi_connection, connection_record):
+    with dbapi_connection.cursor() as cursor:
+        cursor.execute(f"SET search_path TO {SCHEMA}")
+    dbapi_connection.commit()
+
+
+def use_bench_schema() -> None:
+    """このプロセスの全コネクションを bench スキーマに向ける
+
+    APIの参照系は読み取り用エンジン（別のプール）を使うため、両方のエンジンに設定する。
+    """
+    for bench_engine in (engine, get_read_engine()):
+        bench_engine.dispose()
+        event.listen(bench_engine, "connect", _set_search_path)
+
+    with engine.begin() as conn:
+        conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        conn.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+        Base.metadata.create_all(conn)
+
+
+def drop_bench_schema() -> None:
+    with engine.begin() as conn:
+        conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+
+
+def bench_ingest(market: SyntheticMarket, batch_size: int) -> dict:
+    """バッチごとの保存処理（yfinanceのレスポンスを保存する部分）"""
+    db = SessionLocal()
+    try:
+        downloader = StockDownloader(db, batch_size=batch_size)
+        ensure_partitions(db, market.days[0], market.days[-1])
+
+        seconds = 0.0
+        validate_seconds = 0.0
+        statements = 0
+        rows = 0
+        for i in range(0, len(market.stocks), batch_size):
+            batch = market.stocks[i : i + batch_size]
+            downloader._upsert_stocks(batch)
+            tickers = [get_yahoo_ticker(s.code) for s in batch]
+            ticker_to_code = {get_yahoo_ticker(s.code): s.code for s in batch}
+            frame = market.batch(batch)
+
+            # 保存前の品質チェック（保存時間と比べて無視できることを確認する）
+            start = time.perf_counter()
+            validate_prices(frame, ticker_to_code)
+            validate_seconds += time.perf_counter() - start
+
+            stats = start_query_stats()
+            start = time.perf_counter()
+            rows += downloader._save_price_data(frame, ticker_to_code, tickers)
+            seconds += time.perf_counter() - start
+            statements += stats.count
+
+        return {
+            "rows": rows,
+            "seconds": round(seconds, 3),
+            "rows_per_sec": round(rows / seconds, 1),
+            "statements": statements,
+            "validate_seconds": round(validate_seconds, 3),
+        }
+    finally:
+        db.close()
+
+
+def bench_indicators(market: SyntheticMarket, limit_days: int) -> dict:
+    """日次ジョブと同じ直近limit_days分の指標更新"""
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        db = SessionLocal()
+        try:
+            start = time.perf_counter()
+            sync_store(db, directory, full=True)
+            results["columnar_sync_seconds"] = round(time.perf_counter() - start, 3)
+
+            for source, store in (("db", None), ("columnar", ColumnarStore(directory))):
+                downloader = StockDownloader(db, store=store)
+                stats = start_query_stats()
+                start = time.perf_counter()
+                updated = downloader.update_all_indicators(market.codes, limit_days=limit_days)
+                seconds = time.perf_counter() - start
+                results[source] = {
+                    "rows": updated,
+                    "seconds": round(seconds, 3),
+                    "codes_per_sec": round(len(market.codes) / seconds, 1),
+                    "statements": stats.count,
+                }
+        finally:
+            db.close()
+    return results
+
+
+def bench_api(market: SyntheticMarket, requests: int) -> dict:
+    """主要エンドポイントのレイテンシ（ミリ秒）"""
+    from src.api import app
+
+    client = TestClient(app)
+    code = market.codes[len(market.codes) // 2]
+    codes = ",".join(market.codes[:50])
+
+    results = {}
+    for name, template in ENDPOINTS.items():
+        path = template.format(code=code, codes=codes)
+        # ウォームアップ（プール・プランキャッシュ）
+        for _ in range(5):
+            client.get(path).raise_for_status()
+
+        timings = []
+        for _ in range(requests):
+            start = time.perf_counter()
+            client.get(path).raise_for_status()
+            timings.append((time.perf_counter() - start) * 1000)
+
+        percentiles = statistics.quantiles(timings, n=100, method="inclusive")
+        results[name] = {
+            "p50_ms": round(percentiles[49], 3),
+            "p99_ms": round(percentiles[98], 3),
+            "mean_ms": round(statistics.fmean(timings), 3),
+        }
+    return results
+
+
+def _flatten(results: dict, prefix: str = "") -> dict[str, float]:
+    flat = {}
+    for key, value in results.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(_flatten(value, f"{name}."))
+        elif isinstance(value, (int, float)):
+            flat[name] = value
+    return flat
+
+
+def compare(baseline: dict, current: dict) -> dict[str, float]:
+    """ベースラインからの変化率（current / baseline）"""
+    before = _flatten(baseline["results"])
+    after = _flatten(current["results"])
+    return {
+        name: round(after[name] / value, 3)
+        for name, value in before.items()
+        if name in after and value
+    }
+
+
+def git_revision() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="日次ジョブ・指標計算・APIのベンチマーク")
+    parser.add_argument("--codes", type=int, default=200, help="銘柄数")
+    parser.add_argument("--days", type=int, default=250, help="営業日数")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--batch-size", type=int, default=50, help="保存のバッチサイズ")
+    parser.add_argument("--limit-days", type=int, default=5, help="指標を更新する日数")
+    parser.add_argument("--requests", type=int, default=100, help="エンドポイントごとの回数")
+    parser.add_argument("--output", help="結果を書き出すJSONファイル")
+    parser.add_argument("--baseline", help="比較するJSONファイル（以前の --output）")
+    args = parser.parse_args()
+
+    market = generate_market(args.codes, args.days, seed=args.seed)
+
+    use_bench_schema()
+    try:
+        logger.info(f"Ingest: {args.codes} codes x {args.days} days")
+        ingest = bench_ingest(market, args.batch_size)
+
+        logger.info("Indicators")
+        indicators = bench_indicators(market, args.limit_days)
+
+        # 週足・月足のキャッシュを作ってから計測する（日次ジョブ後の状態）
+        db = SessionLocal()
+        try:
+            refresh_all_bars(db)
+        finally:
+            db.close()
+
+        logger.info(f"API: {args.requests} requests per endpoint")
+        api = bench_api(market, args.requests)
+    finally:
+        drop_bench_schema()
+
+    results = {
+        "params": vars(args),
+        "environment": {
+            "revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+        },
+        "results": {"ingest": ingest, "indicators": indicators, "api": api},
+    }
+    if args.baseline:
+        with open(args.baseline) as f:
+            results["comparison"] = compare(json.load(f), results)
+
+    output = json.dumps(results, indent=2, ensure_ascii=False, default=str)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+        logger.info(f"Results written to {args.output}")
+    sys.stdout.write(output + "\n")
+
+
+if __name__ == "__main__":
+    main()
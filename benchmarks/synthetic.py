@@ -0,0 +1,93 @@
+"""ベンチマーク用の合成株価データ
+
+シードを固定すれば同じ N銘柄 × M営業日 のOHLCVを再現できる。
+yf.download(group_by="ticker") と同じ形のDataFrameを返すため、
+StockDownloader の保存処理にそのまま渡せる。
+"""
+
+from dataclasses import dataclass
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+
+from src.stock_list import StockInfo, get_yahoo_ticker
+from src.trading_calendar import is_trading_day
+
+MARKETS = ("プライム（内国株式）", "スタンダード（内国株式）", "グロース（内国株式）")
+SECTORS = ("輸送用機器", "電気機器", "情報・通信業", "銀行業", "小売業", "医薬品", "化学", "機械")
+
+
+@dataclass
+class SyntheticMarket:
+    stocks: list[StockInfo]
+    days: list[date]
+    # yf.download(group_by="ticker") 形式（列: (ticker, Open/High/Low/Close/Adj Close/Volume)）
+    frame: pd.DataFrame
+
+    @property
+    def codes(self) -> list[str]:
+        return [s.code for s in self.stocks]
+
+    @property
+    def tickers(self) -> list[str]:
+        return [get_yahoo_ticker(s.code) for s in self.stocks]
+
+    def batch(self, stocks: list[StockInfo]) -> pd.DataFrame:
+        """指定銘柄だけの列を取り出す（yfinanceのバッチ単位のレスポンスに相当）"""
+        return self.frame[[get_yahoo_ticker(s.code) for s in stocks]]
+
+
+def trading_days(count: int, end: date) -> list[date]:
+    """end以前の東証の営業日をcount日分（古い順）"""
+    days: list[date] = []
+    day = end
+    while len(days) < count:
+        if is_trading_day(day):
+            days.append(day)
+        day -= timedelta(days=1)
+    return days[::-1]
+
+
+def generate_market(
+    n_codes: int, n_days: int, seed: int = 42, end: date | None = None
+) -> SyntheticMarket:
+    """幾何ランダムウォークで N銘柄 × M営業日 のOHLCVを作る"""
+    rng = np.random.default_rng(seed)
+    days = trading_days(n_days, end or date.today())
+    stocks = [
+        StockInfo(
+            code=str(1300 + i),
+            name=f"合成銘柄{i:04d}",
+            market=MARKETS[i % len(MARKETS)],
+            sector=SECTORS[i % len(SECTORS)],
+        )
+        for i in range(n_codes)
+    ]
+
+    shape = (n_days, n_codes)
+    start = rng.uniform(100, 10_000, n_codes)
+    close = start * np.exp(np.cumsum(rng.normal(0, 0.02, shape), axis=0))
+    prev = np.vstack([start, close[:-1]])
+    high = np.maximum(prev, close) * (1 + np.abs(rng.normal(0, 0.005, shape)))
+    low = np.minimum(prev, close) * (1 - np.abs(rng.normal(0, 0.005, shape)))
+    volume = rng.integers(1_000, 5_000_000, shape)
+
+    index = pd.DatetimeIndex(pd.to_datetime(days), name="Date")
+    fields = {
+        "Open": prev,
+        "High": high,
+        "Low": low,
+        "Close": close,
+        "Adj Close": close,
+        "Volume": volume,
+    }
+    tickers = [get_yahoo_ticker(s.code) for s in stocks]
+    frame = pd.concat(
+        {
+            ticker: pd.DataFrame({name: values[:, i] for name, values in fields.items()}, index)
+            for i, ticker in enumerate(tickers)
+        },
+        axis=1,
+    )
+    return SyntheticMarket(stocks=stocks, days=days, frame=frame)
@@ -0,0 +1,34 @@
+"""Add screener indexes
+
+Revision ID: 003
+Revises: 002
+Create Date: 2026-10-19 00:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+revision: str = "003"
+down_revision: Union[str, None] = "002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # 最新日スナップショットの取得・前営業日との結合・コード順ソートを1本のインデックスで賄う
+    # （先頭カラムが同じため ix_stock_prices_trade_date は不要になる）
+    op.create_index("ix_stock_prices_trade_date_code", "stock_prices", ["trade_date", "code"])
+    op.drop_index("ix_stock_prices_trade_date", table_name="stock_prices")
+
+    # 市場区分・業種フィルタ用
+    op.create_index("ix_stocks_market", "stocks", ["market"])
+    op.create_index("ix_stocks_sector", "stocks", ["sector"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_stocks_sector", table_name="stocks")
+    op.drop_index("ix_stocks_market", table_name="stocks")
+    op.create_index("ix_stock_prices_trade_date", "stock_prices", ["trade_date"])
+    op.drop_index("ix_stock_prices_trade_date_code", table_name="stock_prices")
@@ -0,0 +1,38 @@
+"""Add ingestion state
+
+Revision ID: 005
+Revises: 004
+Create Date: 2026-10-19 00:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "005"
+down_revision: Union[str, None] = "004"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # データ更新の世代管理テーブル（id=1の1行のみ）
+    op.create_table(
+        "ingestion_state",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("generation", sa.BigInteger(), nullable=False, server_default="0"),
+        sa.Column("latest_trade_date", sa.Date(), nullable=True),
+        sa.Column("started_at", sa.DateTime(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(), nullable=False, server_default=sa.func.now()),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.execute(
+        "INSERT INTO ingestion_state (id, generation, latest_trade_date) "
+        "SELECT 1, 1, max(trade_date) FROM stock_prices"
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("ingestion_state")
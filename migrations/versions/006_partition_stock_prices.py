@@ -0,0 +1,110 @@
+"""Partition stock_prices by trade_date year
+
+Revision ID: 006
+Revises: 005
+Create Date: 2026-10-19 00:00:00.000000
+
+"""
+
+from datetime import date
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "006"
+down_revision: Union[str, None] = "005"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _price_columns() -> list[sa.Column]:
+    return [
+        sa.Column(
+            "id",
+            sa.BigInteger(),
+            nullable=False,
+            server_default=sa.text("nextval('stock_prices_id_seq')"),
+        ),
+        sa.Column("code", sa.String(length=10), nullable=False),
+        sa.Column("trade_date", sa.Date(), nullable=False),
+        sa.Column("open", sa.Float(), nullable=True),
+        sa.Column("high", sa.Float(), nullable=True),
+        sa.Column("low", sa.Float(), nullable=True),
+        sa.Column("close", sa.Float(), nullable=True),
+        sa.Column("volume", sa.BigInteger(), nullable=True),
+        sa.Column("adjusted_close", sa.Float(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=False, server_default=sa.func.now()),
+        sa.Column("ma5", sa.Float(), nullable=True),
+        sa.Column("ma20", sa.Float(), nullable=True),
+        sa.Column("rsi9", sa.Float(), nullable=True),
+        sa.Column("bb_upper", sa.Float(), nullable=True),
+        sa.Column("bb_middle", sa.Float(), nullable=True),
+        sa.Column("bb_lower", sa.Float(), nullable=True),
+    ]
+
+
+_COLUMN_LIST = (
+    "id, code, trade_date, open, high, low, close, volume, adjusted_close, created_at, "
+    "ma5, ma20, rsi9, bb_upper, bb_middle, bb_lower"
+)
+
+
+def _create_indexes() -> None:
+    op.create_index("ix_stock_prices_code", "stock_prices", ["code"])
+    op.create_index("ix_stock_prices_code_date", "stock_prices", ["code", "trade_date"])
+    op.create_index("ix_stock_prices_trade_date_code", "stock_prices", ["trade_date", "code"])
+
+
+def upgrade() -> None:
+    # 既存テーブルを退避（idのシーケンスは新テーブルに引き継ぐ）
+    op.execute("ALTER TABLE stock_prices RENAME TO stock_prices_unpartitioned")
+    op.execute("ALTER SEQUENCE stock_prices_id_seq OWNED BY NONE")
+
+    # trade_dateの年単位でレンジパーティション化した親テーブル
+    op.create_table(
+        "stock_prices",
+        *_price_columns(),
+        postgresql_partition_by="RANGE (trade_date)",
+    )
+    op.execute("ALTER SEQUENCE stock_prices_id_seq OWNED BY stock_prices.id")
+
+    # 既存データの年から翌年までのパーティションを作成
+    bind = op.get_bind()
+    min_date = bind.execute(sa.text("SELECT min(trade_date) FROM stock_prices_unpartitioned"))
+    first_year = (min_date.scalar() or date.today()).year
+    for year in range(first_year, date.today().year + 2):
+        op.execute(
+            f"CREATE TABLE stock_prices_y{year} PARTITION OF stock_prices "
+            f"FOR VALUES FROM ('{year}-01-01') TO ('{year + 1}-01-01')"
+        )
+
+    op.execute(
+        f"INSERT INTO stock_prices ({_COLUMN_LIST}) "
+        f"SELECT {_COLUMN_LIST} FROM stock_prices_unpartitioned"
+    )
+    op.drop_table("stock_prices_unpartitioned")
+
+    # 一括投入後に制約・インデックスを作成（パーティションキーを含める必要がある）
+    op.create_primary_key("stock_prices_pkey", "stock_prices", ["id", "trade_date"])
+    op.create_unique_constraint("uq_stock_price_code_date", "stock_prices", ["code", "trade_date"])
+    _create_indexes()
+    op.execute("ANALYZE stock_prices")
+
+
+def downgrade() -> None:
+    op.execute("ALTER TABLE stock_prices RENAME TO stock_prices_partitioned")
+    op.execute("ALTER SEQUENCE stock_prices_id_seq OWNED BY NONE")
+
+    op.create_table("stock_prices", *_price_columns())
+    op.execute("ALTER SEQUENCE stock_prices_id_seq OWNED BY stock_prices.id")
+    op.execute(
+        f"INSERT INTO stock_prices ({_COLUMN_LIST}) "
+        f"SELECT {_COLUMN_LIST} FROM stock_prices_partitioned"
+    )
+    # パーティションも親テーブルと一緒に削除される
+    op.drop_table("stock_prices_partitioned")
+
+    op.create_primary_key("stock_prices_pkey", "stock_prices", ["id"])
+    op.create_unique_constraint("uq_stock_price_code_date", "stock_prices", ["code", "trade_date"])
+    _create_indexes()
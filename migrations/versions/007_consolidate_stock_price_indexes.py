@@ -0,0 +1,41 @@
+"""Consolidate stock_prices indexes
+
+Revision ID: 007
+Revises: 006
+Create Date: 2026-10-19 00:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+revision: str = "007"
+down_revision: Union[str, None] = "006"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # uq_stock_price_code_date が (code, trade_date) を索引済みのため、
+    # codeのみ・(code, trade_date) の重複インデックスは不要
+    op.drop_index("ix_stock_prices_code", table_name="stock_prices")
+    op.drop_index("ix_stock_prices_code_date", table_name="stock_prices")
+
+    # 日付範囲の絞り込みはBRINで行う（日次の追記順に並ぶため相関が高く、サイズも極小）
+    # 最新取引日は ingestion_state に記録した値を使うため、B-treeでの max() は不要
+    op.drop_index("ix_stock_prices_trade_date_code", table_name="stock_prices")
+    op.create_index(
+        "ix_stock_prices_trade_date_brin",
+        "stock_prices",
+        ["trade_date"],
+        postgresql_using="brin",
+        postgresql_with={"pages_per_range": 32},
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_stock_prices_trade_date_brin", table_name="stock_prices")
+    op.create_index("ix_stock_prices_trade_date_code", "stock_prices", ["trade_date", "code"])
+    op.create_index("ix_stock_prices_code_date", "stock_prices", ["code", "trade_date"])
+    op.create_index("ix_stock_prices_code", "stock_prices", ["code"])
@@ -0,0 +1,69 @@
+"""Add work units
+
+Revision ID: 010
+Revises: 009
+Create Date: 2026-10-19 00:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+revision: str = "010"
+down_revision: Union[str, None] = "009"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # 複数ワーカーで分担する取り込みの作業キュー
+    op.create_table(
+        "work_units",
+        sa.Column("id", sa.BigInteger(), autoincrement=True, nullable=False),
+        sa.Column("queue", sa.String(length=50), nullable=False),
+        sa.Column("codes", postgresql.ARRAY(sa.String(length=10)), nullable=False),
+        sa.Column("start_date", sa.Date(), nullable=False),
+        sa.Column("end_date", sa.Date(), nullable=False),
+        sa.Column("status", sa.String(length=20), nullable=False),
+        sa.Column("worker", sa.String(length=100), nullable=True),
+        sa.Column("leased_until", sa.DateTime(), nullable=True),
+        sa.Column("attempts", sa.Integer(), nullable=False),
+        sa.Column("rows", sa.Integer(), nullable=False),
+        sa.Column("error", sa.Text(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_work_units_queue_status", "work_units", ["queue", "status"])
+
+    # キューごとの進捗（leased_until はUTCのnaive timestamp）
+    op.execute(
+        """
+        CREATE VIEW work_unit_progress AS
+        SELECT
+            queue,
+            count(*) AS total,
+            count(*) FILTER (WHERE status = 'pending') AS pending,
+            count(*) FILTER (WHERE status = 'leased') AS leased,
+            count(*) FILTER (WHERE status = 'done') AS done,
+            count(*) FILTER (WHERE status = 'failed') AS failed,
+            count(*) FILTER (
+                WHERE status = 'leased' AND leased_until < (now() AT TIME ZONE 'UTC')
+            ) AS expired,
+            count(DISTINCT worker) FILTER (WHERE status = 'leased') AS workers,
+            coalesce(sum(rows), 0) AS rows,
+            min(created_at) AS created_at,
+            max(updated_at) AS updated_at
+        FROM work_units
+        GROUP BY queue
+        """
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP VIEW work_unit_progress")
+    op.drop_index("ix_work_units_queue_status", table_name="work_units")
+    op.drop_table("work_units")
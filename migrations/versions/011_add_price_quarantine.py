@@ -0,0 +1,44 @@
+"""Add price quarantine
+
+Revision ID: 011
+Revises: 010
+Create Date: 2026-10-19 00:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+revision: str = "011"
+down_revision: Union[str, None] = "010"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # 品質チェックで疑わしいと判定した株価（stock_prices には書き込まない）
+    op.create_table(
+        "price_quarantine",
+        sa.Column("id", sa.BigInteger(), autoincrement=True, nullable=False),
+        sa.Column("code", sa.String(length=10), nullable=False),
+        sa.Column("trade_date", sa.Date(), nullable=False),
+        sa.Column("reasons", postgresql.ARRAY(sa.String(length=30)), nullable=False),
+        sa.Column("open", sa.Float(), nullable=True),
+        sa.Column("high", sa.Float(), nullable=True),
+        sa.Column("low", sa.Float(), nullable=True),
+        sa.Column("close", sa.Float(), nullable=True),
+        sa.Column("volume", sa.BigInteger(), nullable=True),
+        sa.Column("adjusted_close", sa.Float(), nullable=True),
+        sa.Column("detected_at", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("code", "trade_date", name="uq_price_quarantine_code_date"),
+    )
+    op.create_index("ix_price_quarantine_detected_at", "price_quarantine", ["detected_at"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_price_quarantine_detected_at", table_name="price_quarantine")
+    op.drop_table("price_quarantine")
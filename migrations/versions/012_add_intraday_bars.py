@@ -0,0 +1,51 @@
+"""Add intraday bars partitioned by trade_date month
+
+Revision ID: 012
+Revises: 011
+Create Date: 2026-10-19 00:00:00.000000
+
+"""
+
+from datetime import date
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "012"
+down_revision: Union[str, None] = "011"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # 分足（価格は10倍の整数、時刻は9:00からの経過分）。trade_dateの月単位でレンジパーティション化
+    op.create_table(
+        "intraday_bars",
+        sa.Column("code", sa.String(length=10), nullable=False),
+        sa.Column("interval", sa.SmallInteger(), nullable=False),
+        sa.Column("trade_date", sa.Date(), nullable=False),
+        sa.Column("minute", sa.SmallInteger(), nullable=False),
+        sa.Column("open", sa.Integer(), nullable=False),
+        sa.Column("high", sa.Integer(), nullable=False),
+        sa.Column("low", sa.Integer(), nullable=False),
+        sa.Column("close", sa.Integer(), nullable=False),
+        sa.Column("volume", sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint("code", "interval", "trade_date", "minute"),
+        postgresql_partition_by="RANGE (trade_date)",
+    )
+
+    # 今月と翌月のパーティション（以降は取り込み時に作成）
+    today = date.today()
+    months = today.year * 12 + today.month - 1
+    for index in (months, months + 1):
+        start = date(index // 12, index % 12 + 1, 1)
+        end = date((index + 1) // 12, (index + 1) % 12 + 1, 1)
+        op.execute(
+            f"CREATE TABLE intraday_bars_m{start:%Y%m} PARTITION OF intraday_bars "
+            f"FOR VALUES FROM ('{start}') TO ('{end}')"
+        )
+
+
+def downgrade() -> None:
+    op.drop_table("intraday_bars")
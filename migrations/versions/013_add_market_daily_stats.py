@@ -0,0 +1,44 @@
+"""Add market daily stats
+
+Revision ID: 013
+Revises: 012
+Create Date: 2026-10-19 00:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "013"
+down_revision: Union[str, None] = "012"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # 日ごとの騰落・新高値安値・20日線上の銘柄数・平均リターン（全体・業種別・市場区分別）
+    op.create_table(
+        "market_daily_stats",
+        sa.Column("id", sa.BigInteger(), autoincrement=True, nullable=False),
+        sa.Column("scope", sa.String(length=10), nullable=False),
+        sa.Column("scope_value", sa.String(length=100), nullable=False),
+        sa.Column("trade_date", sa.Date(), nullable=False),
+        sa.Column("codes", sa.Integer(), nullable=False),
+        sa.Column("advancers", sa.Integer(), nullable=False),
+        sa.Column("decliners", sa.Integer(), nullable=False),
+        sa.Column("unchanged", sa.Integer(), nullable=False),
+        sa.Column("new_highs", sa.Integer(), nullable=False),
+        sa.Column("new_lows", sa.Integer(), nullable=False),
+        sa.Column("above_ma20", sa.Integer(), nullable=False),
+        sa.Column("ma20_codes", sa.Integer(), nullable=False),
+        sa.Column("average_return", sa.Float(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(), nullable=False, server_default=sa.func.now()),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("scope", "scope_value", "trade_date", name="uq_market_daily_stat"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("market_daily_stats")
@@ -1,6 +1,7 @@
 #!/usr/bin/env python3
 """過去1年分の株価データを一括取得するスクリプト"""
 
+import argparse
 import logging
 import sys
 from datetime import datetime, timedelta
@@ -10,6 +11,10 @@ sys.path.insert(0, "/app")
 from src.config import config
 from src.database import SessionLocal
 from src.downloader import StockDownloader
+from src.freshness import begin_ingestion, end_ingestion
+from src.journal import IngestionJournal
+from src.market_stats import refresh_market_stats_by_year
+from src.resample import refresh_all_bars
 from src.stock_list import get_stock_list
 
 logging.basicConfig(
@@ -20,6 +25,12 @@ logger = logging.getLogger(__name__)
 
 
 def main():
+    parser = argparse.ArgumentParser(description="過去1年分の株価データを一括取得")
+    parser.add_argument(
+        "--resume", action="store_true", help="中断した実行を完了済みのバッチを飛ばして再開する"
+    )
+    args = parser.parse_args()
+
     logger.info("Starting backfill: downloading 1 year of historical data")
     start_time = datetime.now()
 
@@ -29,23 +40,39 @@ def main():
 
     db = SessionLocal()
     try:
+        begin_ingestion(db)
         downloader = StockDownloader(db, batch_size=config.download_batch_size)
+        # 再開時は中断した実行の期間で、未完了のバッチだけを取得する
+        journal = IngestionJournal(db, "backfill", resume=args.resume)
+        if journal.resumed:
+            start_date, end_date = journal.start_date, journal.end_date
 
         stock_list = get_stock_list()
         logger.info(f"Downloading historical prices for {len(stock_list)} stocks")
         logger.info(f"Period: {start_date.strftime('%Y-%m-%d')} to {end_date.strftime('%Y-%m-%d')}")
 
         saved_count = downloader.download_stock_prices(
-            stock_list, start_date=start_date, end_date=end_date
+            stock_list, start_date=start_date, end_date=end_date, journal=journal
         )
 
         elapsed = datetime.now() - start_time
         logger.info(f"Backfill completed: {saved_count} records saved in {elapsed}")
 
+        # 取得し直した期間の週足・月足キャッシュを再集計
+        bar_count = refresh_all_bars(db, since=start_date.date())
+        logger.info(f"Weekly/monthly bars cached: {bar_count} bars")
+
+        # 取得し直した期間の市場の日次集計を作り直す（yfinanceの終了日は含まない）
+        stats_count = refresh_market_stats_by_year(
+            db, start_date.date(), end_date.date() - timedelta(days=1)
+        )
+        logger.info(f"Market stats refreshed: {stats_count} rows")
+
     except Exception as e:
         logger.error(f"Error: {e}", exc_info=True)
         sys.exit(1)
     finally:
+        end_ingestion(db)
         db.close()
 
 
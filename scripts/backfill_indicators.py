@@ -10,6 +10,7 @@ sys.path.insert(0, "/app")
 from src.config import config
 from src.database import SessionLocal
 from src.downloader import StockDownloader
+from src.freshness import begin_ingestion, end_ingestion
 from src.models import Stock
 
 logging.basicConfig(
@@ -25,6 +26,7 @@ def main():
 
     db = SessionLocal()
     try:
+        begin_ingestion(db)
         downloader = StockDownloader(db, batch_size=config.download_batch_size)
 
         # 全銘柄コードを取得
@@ -41,6 +43,7 @@ def main():
         logger.error(f"Error: {e}", exc_info=True)
         sys.exit(1)
     finally:
+        end_ingestion(db)
         db.close()
 
 
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""市場全体・業種別・市場区分別の日次集計（market_daily_stats）を過去分まで作成するスクリプト
+
+日次ジョブ・一括取得は取り込んだ日付しか集計しないため、導入時に1回実行する。
+20日移動平均を上回る銘柄数はテクニカル指標を使うため、テクニカル指標を全期間計算し直した
+（backfill_indicators.py）後にも実行すること。
+
+使い方:
+    python scripts/backfill_market_stats.py [--start 2024-01-01] [--end 2024-12-31]
+"""
+
+import argparse
+import logging
+import sys
+from datetime import date
+
+sys.path.insert(0, "/app")
+
+from sqlalchemy import func
+
+from src.config import config
+from src.database import SessionLocal
+from src.market_stats import refresh_market_stats_by_year
+from src.models import StockPrice
+
+logging.basicConfig(
+    level=getattr(logging, config.log_level),
+    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+)
+logger = logging.getLogger(__name__)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="市場の日次集計を過去分まで作成")
+    parser.add_argument("--start", type=date.fromisoformat, help="開始日（既定: 最古の取引日）")
+    parser.add_argument("--end", type=date.fromisoformat, help="終了日（既定: 最新の取引日）")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        first, last = db.query(
+            func.min(StockPrice.trade_date), func.max(StockPrice.trade_date)
+        ).one()
+        start, end = args.start or first, args.end or last
+        if start is None or end is None:
+            logger.info("No prices to aggregate")
+            return
+
+        total = refresh_market_stats_by_year(db, start, end)
+        logger.info(f"Market stats backfilled: {total} rows ({start} - {end})")
+
+    except Exception as e:
+        logger.error(f"Error: {e}", exc_info=True)
+        sys.exit(1)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
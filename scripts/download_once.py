@@ -8,8 +8,9 @@ from datetime import datetime
 sys.path.insert(0, "/app")
 
 from src.config import config
-from src.database import SessionLocal
+from src.database import SessionLocal, advisory_lock
 from src.downloader import StockDownloader
+from src.freshness import INGESTION_LOCK_KEY, begin_ingestion, end_ingestion
 from src.stock_list import get_stock_list
 
 logging.basicConfig(
@@ -20,11 +21,21 @@ logger = logging.getLogger(__name__)
 
 
 def main():
+    # 常駐スケジューラ等の取り込みジョブと重ならないようにする
+    with advisory_lock(INGESTION_LOCK_KEY) as acquired:
+        if not acquired:
+            logger.warning("Another ingestion job is running; skipping")
+            return
+        download_once()
+
+
+def download_once():
     logger.info("Starting one-time daily stock price download")
     start_time = datetime.now()
 
     db = SessionLocal()
     try:
+        begin_ingestion(db)
         downloader = StockDownloader(db, batch_size=config.download_batch_size)
 
         stock_list = get_stock_list()
@@ -39,6 +50,7 @@ def main():
         logger.error(f"Error: {e}", exc_info=True)
         sys.exit(1)
     finally:
+        end_ingestion(db)
         db.close()
 
 
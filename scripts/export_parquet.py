@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""分析用のParquetを stock_prices から書き出すスクリプト
+
+使い方:
+    python scripts/export_parquet.py               # 直近分を書き直す
+    python scripts/export_parquet.py --full        # 全期間を書き出す
+    python scripts/export_parquet.py --dir /data/parquet
+"""
+
+import argparse
+import logging
+import sys
+
+sys.path.insert(0, "/app")
+
+from src.analytics import export_parquet
+from src.config import config
+from src.database import SessionLocal
+
+logging.basicConfig(
+    level=getattr(logging, config.log_level),
+    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+)
+logger = logging.getLogger(__name__)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="分析用Parquetの書き出し")
+    parser.add_argument(
+        "--dir",
+        default=config.analytics_dir,
+        help="出力先ディレクトリ（デフォルト: ANALYTICS_DIR）",
+    )
+    parser.add_argument(
+        "--full", action="store_true", help="全期間を書き出す（DBに無い日付のファイルは削除）"
+    )
+    args = parser.parse_args()
+
+    if not args.dir:
+        parser.error("--dir または ANALYTICS_DIR を指定してください")
+
+    db = SessionLocal()
+    try:
+        days = export_parquet(db, args.dir, full=args.full)
+        logger.info(f"Exported {days} trading days to {args.dir}")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""複数ワーカーで株価データを分担して取得するスクリプト
+
+作業単位（銘柄グループ×期間）を work_units に登録し、任意の数のワーカー
+（別コンテナ・別ホストでも可）が同じDBから重複なく取得して処理する。
+
+使い方:
+    python scripts/ingest_worker.py enqueue [--queue backfill] [--days 365]
+    python scripts/ingest_worker.py work [--queue backfill] [--worker NAME]
+    python scripts/ingest_worker.py progress [--queue backfill]
+    python scripts/ingest_worker.py finalize [--queue backfill]
+"""
+
+import argparse
+import json
+import logging
+import os
+import socket
+import sys
+from datetime import datetime, time, timedelta
+
+sys.path.insert(0, "/app")
+
+from sqlalchemy import func, select
+
+from src.config import config
+from src.database import SessionLocal
+from src.downloader import StockDownloader
+from src.freshness import begin_ingestion, end_ingestion
+from src.market_stats import refresh_market_stats_by_year
+from src.models import WorkUnit
+from src.partitions import ensure_partitions
+from src.resample import refresh_all_bars
+from src.stock_list import get_stock_list
+from src.work_queue import DEFAULT_LEASE_SECONDS, enqueue, progress, run_worker
+
+logging.basicConfig(
+    level=getattr(logging, config.log_level),
+    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+)
+logger = logging.getLogger(__name__)
+
+
+def enqueue_units(db, queue: str, days: int, batch_size: int) -> None:
+    # yfinanceは終了日を含まないため+1日
+    end_date = datetime.now().date() + timedelta(days=1)
+    start_date = end_date - timedelta(days=days)
+    ensure_partitions(db, start_date, end_date)
+    codes = [stock.code for stock in get_stock_list()]
+    enqueue(db, queue, codes, batch_size, start_date, end_date)
+    # 更新の開始・終了はキュー単位で1回だけ記録する（終了は finalize）。
+    # ワーカーごとに終了を記録すると、他のワーカーの書き込み中に世代が進んでしまう
+    begin_ingestion(db)
+
+
+def work(db, queue: str, worker: str, lease_seconds: int) -> None:
+    stocks = {stock.code: stock for stock in get_stock_list()}
+    downloader = StockDownloader(db)
+
+    def handle(unit: WorkUnit) -> int:
+        batch = [stocks[code] for code in unit.codes if code in stocks]
+        saved, error = downloader.download_batch(
+            batch,
+            datetime.combine(unit.start_date, time()),
+            datetime.combine(unit.end_date, time()),
+        )
+        if error:
+            raise RuntimeError(error)
+        return saved
+
+    # 開始時刻を更新して INGESTION_TIMEOUT より長い取り込みでも更新中の扱いを保つ
+    begin_ingestion(db)
+    run_worker(db, queue, worker, handle, lease_seconds=lease_seconds)
+
+
+def finalize(db, queue: str) -> None:
+    """全作業単位の完了後に、取得し直した期間の週足・月足・市場の集計を作り直して終了を記録する"""
+    current = progress(db, queue)
+    if current["pending"] or current["leased"]:
+        logger.error(f"Queue {queue} is still running: {current}")
+        sys.exit(1)
+    try:
+        since, until = db.execute(
+            select(func.min(WorkUnit.start_date), func.max(WorkUnit.end_date)).where(
+                WorkUnit.queue == queue
+            )
+        ).one()
+        bar_count = refresh_all_bars(db, since=since)
+        logger.info(f"Weekly/monthly bars cached: {bar_count} bars")
+        if since is not None:
+            # 取得し直した期間の市場の日次集計を作り直す（yfinanceの終了日は含まない）
+            stats_count = refresh_market_stats_by_year(db, since, until - timedelta(days=1))
+            logger.info(f"Market stats refreshed: {stats_count} rows")
+    finally:
+        end_ingestion(db)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="複数ワーカーでの株価データ取得")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    enqueue_parser = subparsers.add_parser("enqueue", help="作業単位を登録")
+    enqueue_parser.add_argument("--days", type=int, default=365, help="取得する日数")
+    enqueue_parser.add_argument("--batch-size", type=int, default=config.download_batch_size)
+    work_parser = subparsers.add_parser("work", help="キューが空になるまで作業単位を処理")
+    work_parser.add_argument(
+        "--worker", default=f"{socket.gethostname()}-{os.getpid()}", help="ワーカー名"
+    )
+    work_parser.add_argument("--lease-seconds", type=int, default=DEFAULT_LEASE_SECONDS)
+    subparsers.add_parser("progress", help="キューの進捗を表示")
+    subparsers.add_parser(
+        "finalize", help="完了後に週足・月足・市場の集計を作り直し、更新の終了を記録"
+    )
+    for subparser in subparsers.choices.values():
+        subparser.add_argument("--queue", default="backfill", help="キュー名")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        if args.command == "enqueue":
+            enqueue_units(db, args.queue, args.days, args.batch_size)
+        elif args.command == "work":
+            work(db, args.queue, args.worker, args.lease_seconds)
+        elif args.command == "progress":
+            sys.stdout.write(json.dumps(progress(db, args.queue), default=str, indent=2) + "\n")
+        elif args.command == "finalize":
+            finalize(db, args.queue)
+
+    except Exception as e:
+        logger.error(f"Error: {e}", exc_info=True)
+        sys.exit(1)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""分足（1分足・5分足）の取り込みと保持期間の管理
+
+使い方:
+    python scripts/intraday.py download [--codes 7203,9984] [--interval 1m] [--days 7]
+    python scripts/intraday.py retention [--days 90]
+"""
+
+import argparse
+import logging
+import sys
+
+sys.path.insert(0, "/app")
+
+from src.config import config
+from src.database import SessionLocal
+from src.intraday import INTERVALS, download_intraday, drop_expired_partitions
+
+logging.basicConfig(
+    level=getattr(logging, config.log_level),
+    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+)
+logger = logging.getLogger(__name__)
+
+
+def _split(value: str) -> list[str]:
+    return [v.strip() for v in value.split(",") if v.strip()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="分足の取り込み")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    download = subparsers.add_parser("download", help="分足をダウンロードして保存")
+    download.add_argument(
+        "--codes",
+        default=config.intraday_codes,
+        help="銘柄コード（カンマ区切り、既定: INTRADAY_CODES）",
+    )
+    download.add_argument(
+        "--interval",
+        action="append",
+        choices=list(INTERVALS),
+        help="足種別（複数指定可、既定: INTRADAY_INTERVALS）",
+    )
+    download.add_argument("--days", type=int, help="取得する日数（既定: 取得できる最大の日数）")
+    retention = subparsers.add_parser("retention", help="保持期間を過ぎた月のパーティションを削除")
+    retention.add_argument(
+        "--days", type=int, default=config.intraday_retention_days, help="保持日数"
+    )
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        if args.command == "download":
+            codes = _split(args.codes)
+            if not codes:
+                logger.error("No codes specified (set INTRADAY_CODES or --codes)")
+                sys.exit(1)
+            for interval in args.interval or _split(config.intraday_intervals):
+                saved = download_intraday(
+                    db, codes, interval, args.days, batch_size=config.download_batch_size
+                )
+                logger.info(f"{interval}: {saved} bars saved")
+        elif args.command == "retention":
+            dropped = drop_expired_partitions(db, args.days)
+            logger.info(f"Dropped {len(dropped)} partitions")
+
+    except Exception as e:
+        logger.error(f"Error: {e}", exc_info=True)
+        sys.exit(1)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
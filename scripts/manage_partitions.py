@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""stock_prices のパーティションを管理するスクリプト
+
+使い方:
+    python scripts/manage_partitions.py list
+    python scripts/manage_partitions.py ensure [--years-ahead 1]
+    python scripts/manage_partitions.py freeze 2023
+    python scripts/manage_partitions.py detach 2020
+"""
+
+import argparse
+import logging
+import sys
+from datetime import date
+
+sys.path.insert(0, "/app")
+
+from src.config import config
+from src.database import SessionLocal
+from src.partitions import detach_partition, ensure_partitions, freeze_partition, list_partitions
+
+logging.basicConfig(
+    level=getattr(logging, config.log_level),
+    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+)
+logger = logging.getLogger(__name__)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="stock_prices パーティション管理")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("list", help="パーティション一覧を表示")
+    ensure = subparsers.add_parser("ensure", help="今年と先の年のパーティションを作成")
+    ensure.add_argument("--years-ahead", type=int, default=1)
+    freeze = subparsers.add_parser("freeze", help="指定年のパーティションをVACUUM FREEZE")
+    freeze.add_argument("year", type=int)
+    detach = subparsers.add_parser("detach", help="指定年のパーティションを切り離す")
+    detach.add_argument("year", type=int)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        if args.command == "list":
+            for p in list_partitions(db):
+                logger.info(
+                    f"{p.name}: {p.bounds}, ~{p.estimated_rows} rows, "
+                    f"{p.total_bytes / 1024 / 1024:.1f} MB"
+                )
+        elif args.command == "ensure":
+            today = date.today()
+            names = ensure_partitions(db, today, date(today.year + args.years_ahead, 1, 1))
+            logger.info(f"Partitions ready: {', '.join(names)}")
+        elif args.command == "freeze":
+            freeze_partition(args.year)
+        elif args.command == "detach":
+            name = detach_partition(db, args.year)
+            logger.info(f"{name} is now a standalone table; dump it with pg_dump -t {name}")
+
+    except Exception as e:
+        logger.error(f"Error: {e}", exc_info=True)
+        sys.exit(1)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
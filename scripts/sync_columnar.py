@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""列指向ストアを stock_prices から同期するスクリプト
+
+使い方:
+    python scripts/sync_columnar.py               # 差分同期
+    python scripts/sync_columnar.py --full        # 全期間を作り直す
+    python scripts/sync_columnar.py --dir /data/columnar
+"""
+
+import argparse
+import logging
+import sys
+
+sys.path.insert(0, "/app")
+
+from src.columnar import sync_store
+from src.config import config
+from src.database import SessionLocal
+
+logging.basicConfig(
+    level=getattr(logging, config.log_level),
+    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+)
+logger = logging.getLogger(__name__)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="列指向ストアの同期")
+    parser.add_argument(
+        "--dir",
+        default=config.columnar_store_dir,
+        help="保存先ディレクトリ（デフォルト: COLUMNAR_STORE_DIR）",
+    )
+    parser.add_argument("--full", action="store_true", help="全期間を作り直す")
+    args = parser.parse_args()
+
+    if not args.dir:
+        parser.error("--dir または COLUMNAR_STORE_DIR を指定してください")
+
+    db = SessionLocal()
+    try:
+        count = sync_store(db, args.dir, full=args.full)
+        logger.info(f"Synced {count} rows to {args.dir}")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,339 @@
+"""Parquetエクスポートと DuckDB による分析クエリ
+
+セクター別のリターン順位や長期間の騰落数など、全銘柄を横断して走査するクエリを
+OLTPのPostgreSQLではなくプロセス内のDuckDBで実行する。
+
+日次ジョブの後に stock_prices と stocks を結合して日付ごとのParquetに書き出す:
+
+    {directory}/trade_date=2024-06-03/data.parquet
+
+クエリは必要な日付のファイルだけを読み込む（ディレクトリ名で絞り込む）。
+DuckDBはオプション依存（``pip install .[analytics]``）のため、使用時にのみimportする。
+APIはクエリ関数しか使わないため、エクスポート用のpandasも使用時にimportする。
+"""
+
+import logging
+import os
+from datetime import date, timedelta
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from src.models import Stock, StockPrice
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+PARTITION_PREFIX = "trade_date="
+DATA_FILE = "data.parquet"
+
+EXPORT_COLUMNS = (
+    "code",
+    "name",
+    "market",
+    "sector",
+    "trade_date",
+    "open",
+    "high",
+    "low",
+    "close",
+    "volume",
+    "adjusted_close",
+    "ma5",
+    "ma20",
+    "rsi9",
+    "bb_upper",
+    "bb_middle",
+    "bb_lower",
+)
+
+
+class AnalyticsError(RuntimeError):
+    """DuckDBが未インストール、またはエクスポートが存在しない場合の例外"""
+
+
+def _duckdb():
+    try:
+        import duckdb
+    except ImportError as e:
+        raise AnalyticsError("duckdb is not installed (pip install '.[analytics]')") from e
+    return duckdb
+
+
+def exported_dates(directory: str | Path) -> list[date]:
+    """エクスポート済みの日付（昇順）"""
+    directory = Path(directory)
+    if not directory.is_dir():
+        return []
+    dates = []
+    for entry in directory.iterdir():
+        if entry.name.startswith(PARTITION_PREFIX) and (entry / DATA_FILE).exists():
+            dates.append(date.fromisoformat(entry.name.removeprefix(PARTITION_PREFIX)))
+    return sorted(dates)
+
+
+def _partition_path(directory: Path, trade_date: date) -> Path:
+    return directory / f"{PARTITION_PREFIX}{trade_date.isoformat()}" / DATA_FILE
+
+
+def write_partitions(frame: "pd.DataFrame", directory: str | Path) -> int:
+    """DataFrameを日付ごとのParquetファイルに書き出す（既存の日付は置き換える）
+
+    Returns:
+        書き出した日数
+    """
+    duckdb = _duckdb()
+    directory = Path(directory)
+    con = duckdb.connect()
+    try:
+        for trade_date, group in frame.groupby("trade_date", sort=True):
+            path = _partition_path(directory, trade_date)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_suffix(".parquet.tmp")
+            con.register("partition_frame", group.reset_index(drop=True))
+            con.execute(
+                f"COPY (SELECT * FROM partition_frame ORDER BY code) "
+                f"TO '{tmp}' (FORMAT parquet, COMPRESSION zstd)"
+            )
+            con.unregister("partition_frame")
+            # 読み込み中のクエリが壊れたファイルを見ないように置き換える
+            os.replace(tmp, path)
+        return int(frame["trade_date"].nunique())
+    finally:
+        con.close()
+
+
+def replace_codes(frame: "pd.DataFrame", directory: str | Path, codes: list[str]) -> int:
+    """既存の日付ファイルのうち codes の行だけを frame の行で置き換える
+
+    frame に行がある日付のうち、ファイルがある日付だけを書き直す。
+
+    Returns:
+        書き直した日数
+    """
+    duckdb = _duckdb()
+    directory = Path(directory)
+    exported = set(exported_dates(directory))
+    con = duckdb.connect()
+    try:
+        con.execute("CREATE TABLE replaced_codes (code VARCHAR)")
+        con.executemany("INSERT INTO replaced_codes VALUES (?)", [[code] for code in codes])
+        replaced = 0
+        for trade_date, group in frame.groupby("trade_date", sort=True):
+            if trade_date not in exported:
+                continue
+            path = _partition_path(directory, trade_date)
+            tmp = path.with_suffix(".parquet.tmp")
+            con.register("partition_frame", group.reset_index(drop=True))
+            # 列の型は既存のファイルに揃う（その日は全て欠損の列もDOUBLE等のまま）
+            con.execute(
+                f"COPY (SELECT * FROM read_parquet('{path}') "
+                f"WHERE code NOT IN (SELECT code FROM replaced_codes) "
+                f"UNION ALL BY NAME SELECT * FROM partition_frame ORDER BY code) "
+                f"TO '{tmp}' (FORMAT parquet, COMPRESSION zstd)"
+            )
+            con.unregister("partition_frame")
+            os.replace(tmp, path)
+            replaced += 1
+        return replaced
+    finally:
+        con.close()
+
+
+def export_parquet(
+    db: Session, directory: str | Path, full: bool = False, full_codes: list[str] | None = None
+) -> int:
+    """stock_prices と stocks を結合してParquetに書き出す
+
+    前回エクスポートした最終日の RESYNC_DAYS 日前以降のみを書き直す。
+
+    Args:
+        full: Trueなら全期間を書き直し、DBに無い日付のファイルを削除する
+            （それより前の日付を後から取り込んだ・削除した場合）
+        full_codes: 全期間を書き直す銘柄（株式分割等で過去の値が変わった銘柄）。
+            日付ごとのファイルには全銘柄が入っているため、これらの銘柄の行だけを
+            DBから読み直して各ファイルに差し替える
+
+    Returns:
+        書き出した日数
+    """
+    import pandas as pd
+
+    from src.columnar import RESYNC_DAYS
+
+    directory = Path(directory)
+    dates = [] if full else exported_dates(directory)
+    since: date | None
+    if dates:
+        since = dates[-1] - timedelta(days=RESYNC_DAYS)
+    else:
+        since = db.scalar(select(func.min(StockPrice.trade_date)))
+
+    columns = [
+        getattr(Stock, name) if name in ("name", "market", "sector") else getattr(StockPrice, name)
+        for name in EXPORT_COLUMNS
+    ]
+    base_query = select(*columns).join(Stock, Stock.code == StockPrice.code)
+
+    written: set[date] = set()
+    if since is not None:
+        # メモリ使用量を抑えるため1年ずつ読み込む
+        for year in range(since.year, date.today().year + 1):
+            start = max(since, date(year, 1, 1))
+            query = base_query.where(
+                StockPrice.trade_date >= start, StockPrice.trade_date < date(year + 1, 1, 1)
+            )
+            frame = pd.DataFrame(db.execute(query).all(), columns=list(EXPORT_COLUMNS))
+            if not frame.empty:
+                write_partitions(frame, directory)
+                written.update(frame["trade_date"])
+
+    if full:
+        # 以前のエクスポートに残ったDBに無い日付のファイルを消す（新しいファイルを書いた後に消す）
+        for stale in set(exported_dates(directory)) - written:
+            path = _partition_path(directory, stale)
+            path.unlink()
+            path.parent.rmdir()
+    elif full_codes and since is not None:
+        # 差分の範囲より前の日付は、対象銘柄の行だけを差し替える
+        query = base_query.where(StockPrice.code.in_(full_codes), StockPrice.trade_date < since)
+        frame = pd.DataFrame(db.execute(query).all(), columns=list(EXPORT_COLUMNS))
+        replaced = replace_codes(frame, directory, full_codes)
+        logger.info(f"Replaced {len(full_codes)} codes in {replaced} exported trading days")
+
+    if not written:
+        logger.info("No price data to export")
+        return 0
+    logger.info(f"Exported {len(written)} trading days to {directory}")
+    return len(written)
+
+
+def _files(directory: str | Path, start: date | None = None, end: date | None = None) -> list[str]:
+    """日付範囲に含まれるParquetファイル"""
+    directory = Path(directory)
+    files = [
+        str(_partition_path(directory, d))
+        for d in exported_dates(directory)
+        if (start is None or d >= start) and (end is None or d <= end)
+    ]
+    if not files:
+        raise AnalyticsError(f"No exported data in {directory}")
+    return files
+
+
+def _query(sql: str, files: list[str], params: list | None = None) -> list[dict]:
+    duckdb = _duckdb()
+    con = duckdb.connect()
+    try:
+        con.read_parquet(files).create_view("prices")
+        result = con.execute(sql, params or [])
+        names = [d[0] for d in result.description]
+        return [dict(zip(names, row)) for row in result.fetchall()]
+    finally:
+        con.close()
+
+
+def sector_return_ranks(
+    directory: str | Path,
+    window: int = 20,
+    as_of: date | None = None,
+    sector: str | None = None,
+) -> tuple[date, date, list[dict]]:
+    """直近window営業日のリターンとセクター内順位
+
+    期間の初日と最終日の両方にデータがある銘柄のみを対象とする。
+    調整後終値が無い場合は終値を使う。
+
+    Returns:
+        (期間の初日, 最終日, [{code, name, sector, return, rank, sector_size}, ...])
+    """
+    dates = [d for d in exported_dates(directory) if as_of is None or d <= as_of]
+    if len(dates) < window + 1:
+        raise AnalyticsError(f"Need {window + 1} exported trading days, found {len(dates)}")
+    start, end = dates[-(window + 1)], dates[-1]
+
+    rows = _query(
+        """
+        WITH returns AS (
+            SELECT
+                code,
+                any_value(name) AS name,
+                any_value(sector) AS sector,
+                arg_max(coalesce(adjusted_close, close), trade_date)
+                    / arg_min(coalesce(adjusted_close, close), trade_date) - 1 AS return
+            FROM prices
+            WHERE trade_date IN (?, ?)
+            GROUP BY code
+            HAVING count(*) = 2
+        )
+        SELECT
+            code,
+            name,
+            sector,
+            return,
+            rank() OVER (PARTITION BY sector ORDER BY return DESC) AS rank,
+            count(*) OVER (PARTITION BY sector) AS sector_size
+        FROM returns
+        WHERE return IS NOT NULL AND isfinite(return)
+          AND (? IS NULL OR sector = ?)
+        ORDER BY sector, rank, code
+        """,
+        # 期間の初日と最終日のファイルだけを読めば足りる
+        [str(_partition_path(Path(directory), d)) for d in (start, end)],
+        [start, end, sector, sector],
+    )
+    return start, end, rows
+
+
+def market_breadth(
+    directory: str | Path,
+    start: date | None = None,
+    end: date | None = None,
+) -> list[dict]:
+    """日ごとの値上がり・値下がり銘柄数と騰落ライン
+
+    Returns:
+        [{trade_date, advancers, decliners, unchanged, ad_line}, ...]
+    """
+    dates = exported_dates(directory)
+    # 初日の前日比を求めるため1営業日前から読み込む
+    read_start = start
+    if start is not None:
+        earlier = [d for d in dates if d < start]
+        read_start = earlier[-1] if earlier else start
+
+    return _query(
+        """
+        WITH changes AS (
+            SELECT
+                trade_date,
+                close - lag(close) OVER (PARTITION BY code ORDER BY trade_date) AS change
+            FROM prices
+        ),
+        daily AS (
+            SELECT
+                trade_date,
+                count(*) FILTER (WHERE change > 0) AS advancers,
+                count(*) FILTER (WHERE change < 0) AS decliners,
+                count(*) FILTER (WHERE change = 0) AS unchanged
+            FROM changes
+            WHERE change IS NOT NULL
+            GROUP BY trade_date
+        )
+        SELECT
+            trade_date,
+            advancers,
+            decliners,
+            unchanged,
+            sum(advancers - decliners) OVER (ORDER BY trade_date) AS ad_line
+        FROM daily
+        WHERE ? IS NULL OR trade_date >= ?
+        ORDER BY trade_date
+        """,
+        _files(directory, read_start, end),
+        [start, start],
+    )
@@ -1,15 +1,45 @@
 """Stock API Server"""
 
+import asyncio
+import json
 from datetime import date
 
-from fastapi import Depends, FastAPI, HTTPException, Query
+from fastapi import Depends, FastAPI, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-from sqlalchemy import func
-from sqlalchemy.orm import Session
-
-from src.database import get_db
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
+from sqlalchemy import and_, select
+from sqlalchemy.orm import Session, aliased
+
+from src.analytics import AnalyticsError, market_breadth, sector_return_ranks
+from src.config import config
+from src.correlation import MAX_CODES as CORRELATION_MAX_CODES
+from src.correlation import correlation_matrix, to_nested_list
+from src.database import ReadSessionLocal, SessionLocal, get_read_db
+from src.freshness import (
+    DataVersion,
+    get_data_version,
+    get_latest_trade_date,
+    latest_trade_date_subquery,
+    previous_trade_date_subquery,
+)
+from src.http_cache import conditional_response
+from src.intraday import INTERVALS as INTRADAY_INTERVALS
+from src.intraday import iter_bars
+from src.market_stats import SCOPES as MARKET_STAT_SCOPES
+from src.market_stats import get_market_stats
+from src.metrics import metrics_middleware, metrics_response
 from src.models import Stock, StockPrice
+from src.notifications import listener
+from src.resample import INTERVALS, get_bars
+from src.screener import (
+    SCREENER_FIELDS,
+    ScreenerError,
+    compile_expression,
+    parse_expression,
+    uses_prev,
+)
 
 app = FastAPI(
     title="Japan Stock API",
@@ -17,6 +47,13 @@ app = FastAPI(
     version="1.0.0",
 )
 
+# SSEのキープアライブ間隔（秒）- プロキシのアイドルタイムアウト対策
+STREAM_KEEPALIVE_SECONDS = 15
+# SSE切断時のクライアント再接続間隔（ミリ秒）
+STREAM_RETRY_MILLISECONDS = 5000
+# SSEで最新株価を配信する銘柄数の上限
+STREAM_MAX_CODES = 100
+
 # CORS設定（開発時は全許可）
 app.add_middleware(
     CORSMiddleware,
@@ -24,8 +61,12 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "Last-Modified"],
 )
 
+# レイテンシ・クエリ数の計測
+app.middleware("http")(metrics_middleware)
+
 
 class StockResponse(BaseModel):
     """銘柄レスポンス"""
@@ -76,19 +117,146 @@ class StockPriceListResponse(BaseModel):
     items: list[StockPriceResponse]
 
 
+class StockBarResponse(BaseModel):
+    """週足・月足レスポンス"""
+
+    code: str
+    period_start: date
+    open: float | None
+    high: float | None
+    low: float | None
+    close: float | None
+    volume: int | None
+    trade_days: int
+    complete: bool
+
+
+class StockBarListResponse(BaseModel):
+    """週足・月足一覧レスポンス"""
+
+    interval: str
+    total: int
+    items: list[StockBarResponse]
+
+
+class ScreenerItemResponse(StockPriceResponse):
+    """スクリーニング結果レスポンス"""
+
+    name: str
+    market: str | None
+    sector: str | None
+
+
+class ScreenerResponse(BaseModel):
+    """スクリーニング一覧レスポンス"""
+
+    trade_date: date | None
+    total: int
+    items: list[ScreenerItemResponse]
+
+
+class SectorReturnItemResponse(BaseModel):
+    """セクター別リターン順位レスポンス"""
+
+    code: str
+    name: str | None
+    sector: str | None
+    return_: float = Field(alias="return")
+    rank: int
+    sector_size: int
+
+
+class SectorReturnResponse(BaseModel):
+    """セクター別リターン順位一覧レスポンス"""
+
+    start_date: date
+    end_date: date
+    window: int
+    total: int
+    items: list[SectorReturnItemResponse]
+
+
+class BreadthItemResponse(BaseModel):
+    """騰落数レスポンス"""
+
+    trade_date: date
+    advancers: int
+    decliners: int
+    unchanged: int
+    ad_line: int
+
+
+class BreadthResponse(BaseModel):
+    """騰落数一覧レスポンス"""
+
+    total: int
+    items: list[BreadthItemResponse]
+
+
+class MarketStatResponse(BaseModel):
+    """日ごとの市場集計レスポンス"""
+
+    trade_date: date
+    scope: str
+    scope_value: str
+    codes: int
+    advancers: int
+    decliners: int
+    unchanged: int
+    new_highs: int
+    new_lows: int
+    above_ma20: int
+    ma20_codes: int
+    average_return: float | None
+    # 20日移動平均のある銘柄のうち上回る銘柄の割合
+    above_ma20_ratio: float | None = None
+
+    class Config:
+        from_attributes = True
+
+
+class MarketStatListResponse(BaseModel):
+    """日ごとの市場集計一覧レスポンス"""
+
+    total: int
+    items: list[MarketStatResponse]
+
+
+class CorrelationResponse(BaseModel):
+    """相関行列・共分散行列レスポンス"""
+
+    start_date: date | None
+    end_date: date | None
+    window: int
+    codes: list[str]
+    # ペアごとの計算に使った日数（両方にリターンがある日数）
+    observations: list[list[int]]
+    correlation: list[list[float | None]]
+    covariance: list[list[float | None]]
+    # include_returns=true の場合のみ（日付 × 銘柄）
+    dates: list[date] | None = None
+    returns: list[list[float | None]] | None = None
+
+
 @app.get("/health")
 def health_check():
     """ヘルスチェック"""
     return {"status": "ok"}
 
 
-@app.get("/stocks", response_model=StockListResponse)
+@app.get("/metrics", include_in_schema=False)
+def get_metrics():
+    """Prometheus形式のメトリクス"""
+    return metrics_response()
+
+
+@app.get("/stocks", response_model=StockListResponse, dependencies=[Depends(conditional_response)])
 def get_stocks(
     market: str | None = Query(None, description="市場区分でフィルタ"),
     sector: str | None = Query(None, description="業種でフィルタ"),
     limit: int = Query(100, ge=1, le=1000, description="取得件数"),
     offset: int = Query(0, ge=0, description="オフセット"),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
 ):
     """銘柄一覧を取得"""
     query = db.query(Stock)
@@ -104,8 +272,10 @@ def get_stocks(
     return StockListResponse(total=total, items=items)
 
 
-@app.get("/stocks/{code}", response_model=StockResponse)
-def get_stock(code: str, db: Session = Depends(get_db)):
+@app.get(
+    "/stocks/{code}", response_model=StockResponse, dependencies=[Depends(conditional_response)]
+)
+def get_stock(code: str, db: Session = Depends(get_read_db)):
     """銘柄詳細を取得"""
     stock = db.query(Stock).filter(Stock.code == code).first()
     if not stock:
@@ -113,14 +283,18 @@ def get_stock(code: str, db: Session = Depends(get_db)):
     return stock
 
 
-@app.get("/stocks/{code}/prices", response_model=StockPriceListResponse)
+@app.get(
+    "/stocks/{code}/prices",
+    response_model=StockPriceListResponse,
+    dependencies=[Depends(conditional_response)],
+)
 def get_stock_prices(
     code: str,
     start_date: date | None = Query(None, description="開始日"),
     end_date: date | None = Query(None, description="終了日"),
     limit: int = Query(100, ge=1, le=1000, description="取得件数"),
     offset: int = Query(0, ge=0, description="オフセット"),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
 ):
     """銘柄の株価履歴を取得"""
     # 銘柄存在チェック
@@ -141,16 +315,87 @@ def get_stock_prices(
     return StockPriceListResponse(total=total, items=items)
 
 
-@app.get("/prices/latest", response_model=StockPriceListResponse)
+@app.get(
+    "/stocks/{code}/bars",
+    response_model=StockBarListResponse,
+    dependencies=[Depends(conditional_response)],
+)
+def get_stock_bars(
+    code: str,
+    interval: str = Query("week", description="足種別（week / month）"),
+    start_date: date | None = Query(None, description="開始日"),
+    end_date: date | None = Query(None, description="終了日"),
+    limit: int = Query(100, ge=1, le=1000, description="取得件数"),
+    offset: int = Query(0, ge=0, description="オフセット"),
+    db: Session = Depends(get_read_db),
+):
+    """銘柄の週足・月足を取得"""
+    if interval not in INTERVALS:
+        raise HTTPException(status_code=400, detail=f"Invalid interval: {interval}")
+
+    stock = db.query(Stock).filter(Stock.code == code).first()
+    if not stock:
+        raise HTTPException(status_code=404, detail="Stock not found")
+
+    bars = get_bars(db, code, interval, start_date, end_date)
+
+    return StockBarListResponse(
+        interval=interval,
+        total=len(bars),
+        items=[StockBarResponse(**bar) for bar in bars[offset : offset + limit]],
+    )
+
+
+def _stream_intraday_bars(code: str, interval: str, start_date: date | None, end_date: date | None):
+    """分足を1行1件のJSON（NDJSON）で送る（レスポンスの間セッションを保持する）"""
+    db = ReadSessionLocal()
+    try:
+        for bar in iter_bars(db, code, interval, start_date, end_date):
+            yield json.dumps(bar) + "\n"
+    finally:
+        db.close()
+
+
+@app.get("/stocks/{code}/intraday")
+def get_stock_intraday(
+    code: str,
+    interval: str = Query("5m", description="足種別（1m / 5m）"),
+    start_date: date | None = Query(None, description="開始日"),
+    end_date: date | None = Query(None, description="終了日"),
+    db: Session = Depends(get_read_db),
+):
+    """銘柄の分足をNDJSONでストリーミング配信
+
+    件数が多いため一括でJSONにせず、サーバーサイドカーソルで読みながら時刻順に送る。
+    時刻（time）は足の開始時刻（JST）。
+    """
+    if interval not in INTRADAY_INTERVALS:
+        raise HTTPException(status_code=400, detail=f"Invalid interval: {interval}")
+
+    stock = db.query(Stock).filter(Stock.code == code).first()
+    if not stock:
+        raise HTTPException(status_code=404, detail="Stock not found")
+
+    return StreamingResponse(
+        _stream_intraday_bars(code, interval, start_date, end_date),
+        media_type="application/x-ndjson",
+    )
+
+
+@app.get(
+    "/prices/latest",
+    response_model=StockPriceListResponse,
+    dependencies=[Depends(conditional_response)],
+)
 def get_latest_prices(
     codes: str | None = Query(None, description="銘柄コード（カンマ区切り）"),
     limit: int = Query(100, ge=1, le=1000, description="取得件数"),
     offset: int = Query(0, ge=0, description="オフセット"),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
 ):
     """最新の株価を取得"""
     # 最新日付を取得
-    latest_date = db.query(func.max(StockPrice.trade_date)).scalar()
+    latest_date = get_latest_trade_date(db)
     if not latest_date:
         return StockPriceListResponse(total=0, items=[])
 
@@ -166,15 +411,293 @@ def get_latest_prices(
     return StockPriceListResponse(total=total, items=items)
 
 
-@app.get("/markets")
-def get_markets(db: Session = Depends(get_db)):
+def _load_stream_event(codes: list[str], last_generation: int | None) -> dict | None:
+    """SSEで配信するイベントを作成（購読開始時に取りこぼしがなければNone）
+
+    通知（NOTIFY）はプライマリから届くため、レプリカの遅延で古い世代を送らないようにプライマリを読む。
+    """
+    db = SessionLocal()
+    try:
+        version = get_data_version(db)
+        if last_generation is not None and version.generation <= last_generation:
+            return None
+
+        event: dict = {
+            "generation": version.generation,
+            "latest_trade_date": version.latest_trade_date,
+        }
+        if codes and version.latest_trade_date:
+            prices = (
+                db.query(StockPrice)
+                .filter(
+                    StockPrice.trade_date == version.latest_trade_date,
+                    StockPrice.code.in_(codes),
+                )
+                .order_by(StockPrice.code)
+                .all()
+            )
+            event["items"] = [
+                StockPriceResponse.model_validate(p).model_dump(mode="json") for p in prices
+            ]
+        return event
+    finally:
+        db.close()
+
+
+def _format_sse(event: dict) -> str:
+    data = json.dumps(event, default=str, ensure_ascii=False)
+    return f"event: prices_updated\nid: {event['generation']}\ndata: {data}\n\n"
+
+
+@app.get("/prices/stream")
+async def stream_price_updates(
+    request: Request,
+    codes: str | None = Query(None, description="最新株価も配信する銘柄コード（カンマ区切り）"),
+):
+    """日次データ更新の通知をServer-Sent Eventsで配信
+
+    日次ジョブのコミット時に1回 `prices_updated` イベントを送る。
+    `codes` を指定した場合はその銘柄の最新株価もイベントに含める。
+    再接続時に `Last-Event-ID` が古ければ、取りこぼした更新を即座に送る。
+    """
+    code_list = [c.strip() for c in codes.split(",") if c.strip()] if codes else []
+    if len(code_list) > STREAM_MAX_CODES:
+        raise HTTPException(status_code=400, detail=f"Too many codes (max {STREAM_MAX_CODES})")
+
+    last_event_id = request.headers.get("last-event-id")
+    last_generation = int(last_event_id) if last_event_id and last_event_id.isdigit() else None
+
+    queue = listener.subscribe()
+
+    async def events():
+        try:
+            yield f"retry: {STREAM_RETRY_MILLISECONDS}\n\n"
+            if last_generation is not None:
+                missed = await run_in_threadpool(_load_stream_event, code_list, last_generation)
+                if missed:
+                    yield _format_sse(missed)
+
+            while not await request.is_disconnected():
+                try:
+                    notification = await asyncio.wait_for(
+                        queue.get(), timeout=STREAM_KEEPALIVE_SECONDS
+                    )
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+
+                if code_list:
+                    event = await run_in_threadpool(_load_stream_event, code_list, None)
+                else:
+                    event = notification
+                if event:
+                    yield _format_sse(event)
+        finally:
+            listener.unsubscribe(queue)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.get("/screener", response_model=ScreenerResponse, dependencies=[Depends(conditional_response)])
+def screen_stocks(
+    q: str = Query(..., description="条件式（例: rsi9 < 30 and close < bb_lower）"),
+    market: str | None = Query(None, description="市場区分でフィルタ"),
+    sector: str | None = Query(None, description="業種でフィルタ"),
+    order_by: str = Query("code", description="並び替えカラム"),
+    desc: bool = Query(False, description="降順で並び替え"),
+    limit: int = Query(100, ge=1, le=1000, description="取得件数"),
+    offset: int = Query(0, ge=0, description="オフセット"),
+    db: Session = Depends(get_read_db),
+):
+    """最新日の株価・テクニカル指標で銘柄をスクリーニング"""
+    if order_by != "code" and order_by not in SCREENER_FIELDS:
+        raise HTTPException(status_code=400, detail=f"Invalid order_by: {order_by}")
+    # 構文エラーだけでなく、SQLに変換できない式（リテラル同士の比較・0除算）も400にする
+    try:
+        node = parse_expression(q)
+        prev = aliased(StockPrice, name="prev") if uses_prev(node) else None
+        condition = compile_expression(node, StockPrice, prev)
+    except ScreenerError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from e
+
+    # 最新日・前営業日はスカラーサブクエリにして1回のクエリで完結させる
+    latest_date = latest_trade_date_subquery()
+    query = db.query(
+        StockPrice,
+        Stock.name,
+        Stock.market,
+        Stock.sector,
+    ).join(Stock, Stock.code == StockPrice.code)
+
+    if prev is not None:
+        prev_date = previous_trade_date_subquery(latest_date)
+        query = query.join(prev, and_(prev.code == StockPrice.code, prev.trade_date == prev_date))
+
+    query = query.filter(StockPrice.trade_date == latest_date)
+    query = query.filter(condition)
+
+    if market:
+        query = query.filter(Stock.market == market)
+    if sector:
+        query = query.filter(Stock.sector == sector)
+
+    # ページ外（offsetが件数を超える場合）でも件数・日付を返すため、件数は別に数える
+    total = query.count()
+    if total == 0:
+        return ScreenerResponse(trade_date=None, total=0, items=[])
+
+    order_column = getattr(StockPrice, order_by)
+    order_column = order_column.desc().nulls_last() if desc else order_column.asc().nulls_last()
+    rows = query.order_by(order_column, StockPrice.code).offset(offset).limit(limit).all()
+
+    items = [
+        ScreenerItemResponse.model_validate(
+            {
+                **StockPriceResponse.model_validate(price).model_dump(),
+                "name": name,
+                "market": stock_market,
+                "sector": stock_sector,
+            }
+        )
+        for price, name, stock_market, stock_sector in rows
+    ]
+    trade_date = rows[0][0].trade_date if rows else db.scalar(select(latest_date))
+    return ScreenerResponse(trade_date=trade_date, total=total, items=items)
+
+
+def _analytics_dir() -> str:
+    if not config.analytics_dir:
+        raise HTTPException(status_code=503, detail="Analytics export is not configured")
+    return config.analytics_dir
+
+
+@app.get(
+    "/analytics/sector-returns",
+    response_model=SectorReturnResponse,
+    dependencies=[Depends(conditional_response)],
+)
+def get_sector_returns(
+    window: int = Query(20, ge=1, le=250, description="リターンの計算期間（営業日）"),
+    as_of: date | None = Query(None, description="基準日（デフォルト: 最新日）"),
+    sector: str | None = Query(None, description="業種でフィルタ"),
+):
+    """直近window営業日のリターンとセクター内順位（Parquetエクスポートを参照）"""
+    try:
+        start, end, rows = sector_return_ranks(_analytics_dir(), window, as_of, sector)
+    except AnalyticsError as e:
+        raise HTTPException(status_code=503, detail=str(e)) from e
+
+    items = [SectorReturnItemResponse.model_validate(row) for row in rows]
+    return SectorReturnResponse(
+        start_date=start, end_date=end, window=window, total=len(items), items=items
+    )
+
+
+@app.get(
+    "/analytics/breadth",
+    response_model=BreadthResponse,
+    dependencies=[Depends(conditional_response)],
+)
+def get_market_breadth(
+    start_date: date | None = Query(None, description="開始日"),
+    end_date: date | None = Query(None, description="終了日"),
+):
+    """日ごとの値上がり・値下がり銘柄数と騰落ライン（Parquetエクスポートを参照）"""
+    try:
+        rows = market_breadth(_analytics_dir(), start_date, end_date)
+    except AnalyticsError as e:
+        raise HTTPException(status_code=503, detail=str(e)) from e
+
+    items = [BreadthItemResponse(**row) for row in rows]
+    return BreadthResponse(total=len(items), items=items)
+
+
+@app.get("/markets", dependencies=[Depends(conditional_response)])
+def get_markets(db: Session = Depends(get_read_db)):
     """市場区分の一覧を取得"""
     markets = db.query(Stock.market).distinct().filter(Stock.market.isnot(None)).all()
     return {"markets": [m[0] for m in markets]}
 
 
-@app.get("/sectors")
-def get_sectors(db: Session = Depends(get_db)):
+@app.get("/sectors", dependencies=[Depends(conditional_response)])
+def get_sectors(db: Session = Depends(get_read_db)):
     """業種の一覧を取得"""
     sectors = db.query(Stock.sector).distinct().filter(Stock.sector.isnot(None)).all()
     return {"sectors": [s[0] for s in sectors]}
+
+
+@app.get("/analytics/correlation", response_model=CorrelationResponse)
+def get_correlation(
+    codes: str = Query(..., description="銘柄コード（カンマ区切り）"),
+    window: int = Query(60, ge=2, le=250, description="リターンの計算期間（営業日）"),
+    include_returns: bool = Query(False, description="日次リターンの行列も返す"),
+    version: DataVersion = Depends(conditional_response),
+    db: Session = Depends(get_read_db),
+):
+    """直近window営業日の日次リターンの相関行列・共分散行列
+
+    調整後終値から計算する。欠損はペアごとに除外し、両方にリターンがある日が2日未満のペアはnull。
+    """
+    code_list = sorted({c.strip() for c in codes.split(",") if c.strip()})
+    if not code_list:
+        raise HTTPException(status_code=400, detail="No codes specified")
+    if len(code_list) > CORRELATION_MAX_CODES:
+        raise HTTPException(status_code=400, detail=f"Too many codes (max {CORRELATION_MAX_CODES})")
+
+    result = correlation_matrix(db, code_list, window, version)
+    if result is None:
+        empty: list[list[float | None]] = [[None] * len(code_list) for _ in code_list]
+        return CorrelationResponse(
+            start_date=None,
+            end_date=None,
+            window=window,
+            codes=code_list,
+            observations=[[0] * len(code_list) for _ in code_list],
+            correlation=empty,
+            covariance=empty,
+        )
+
+    response = CorrelationResponse(
+        start_date=result.dates[0],
+        end_date=result.dates[-1],
+        window=window,
+        codes=result.codes,
+        observations=result.observations.tolist(),
+        correlation=to_nested_list(result.correlation),
+        covariance=to_nested_list(result.covariance),
+    )
+    if include_returns:
+        response.dates = result.dates
+        response.returns = to_nested_list(result.returns)
+    return response
+
+
+@app.get(
+    "/analytics/market-stats",
+    response_model=MarketStatListResponse,
+    dependencies=[Depends(conditional_response)],
+)
+def get_market_daily_stats(
+    scope: str = Query("all", description="集計単位（all / sector / market）"),
+    value: str | None = Query(None, description="業種・市場区分（省略時はscopeの全グループ）"),
+    start_date: date | None = Query(None, description="開始日"),
+    end_date: date | None = Query(None, description="終了日"),
+    db: Session = Depends(get_read_db),
+):
+    """日ごとの騰落数・20日高値安値の更新数・20日線を上回る銘柄数・平均リターン
+
+    日次ジョブが集計した market_daily_stats を返す。
+    """
+    if scope not in MARKET_STAT_SCOPES:
+        raise HTTPException(status_code=400, detail=f"Invalid scope: {scope}")
+
+    items = []
+    for row in get_market_stats(db, scope, value, start_date, end_date):
+        item = MarketStatResponse.model_validate(row)
+        item.above_ma20_ratio = row.above_ma20 / row.ma20_codes if row.ma20_codes else None
+        items.append(item)
+    return MarketStatListResponse(total=len(items), items=items)
@@ -0,0 +1,212 @@
+"""メモリマップした列指向のローカル株価ストア
+
+フィールドごとに1つの連続した配列（日付 × 銘柄, float64, 欠損はNaN）を .npy ファイルとして保存し、
+np.memmap で読み込む。日次ジョブの指標計算（StockDownloader.store）はDBを経由せずに
+銘柄の列をゼロコピーで読み、複数プロセスで同じページキャッシュを共有できる。
+
+ディレクトリ構成:
+    meta.json           銘柄コード・日付の索引（同期の最後に原子的に置き換える）
+    {field}.npy         フィールドごとの配列（shape = (日付の容量, 銘柄数)）
+
+日付は末尾に追記するのみで、銘柄は新規上場時に列を追加する（既存の列番号は変わらない）。
+列の追加・容量の拡張時は新しいファイルに書いてから置き換えるため、読み込み中のプロセスは
+古いファイルをそのまま参照し続けられる。
+"""
+
+import json
+import logging
+import os
+from datetime import date, timedelta
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import or_, select
+from sqlalchemy.orm import Session
+
+from src.models import StockPrice
+
+logger = logging.getLogger(__name__)
+
+FIELDS = ("open", "high", "low", "close", "volume", "adjusted_close")
+
+META_FILE = "meta.json"
+
+# 日付方向の容量を拡張する単位（約1年分）
+DATE_CAPACITY_STEP = 256
+
+# 同期時に再取り込みする直近の日数（日次ジョブが直近数日分を上書きするため）
+RESYNC_DAYS = 5
+
+
+class ColumnarStore:
+    """列指向ストアの読み込み用ハンドル"""
+
+    def __init__(self, directory: str | Path):
+        self.directory = Path(directory)
+        self._meta_mtime: float | None = None
+        self._columns: dict[str, np.ndarray] = {}
+        self.codes: list[str] = []
+        self.dates = np.array([], dtype="datetime64[D]")
+        self._code_index: dict[str, int] = {}
+        self.refresh()
+
+    @classmethod
+    def exists(cls, directory: str | Path) -> bool:
+        return (Path(directory) / META_FILE).exists()
+
+    def refresh(self) -> bool:
+        """同期で更新されていれば索引とメモリマップを開き直す
+
+        Returns:
+            開き直した場合True
+        """
+        meta_path = self.directory / META_FILE
+        mtime = meta_path.stat().st_mtime
+        if mtime == self._meta_mtime:
+            return False
+
+        meta = json.loads(meta_path.read_text())
+        n_dates = len(meta["dates"])
+        self.codes = meta["codes"]
+        self.dates = np.array(meta["dates"], dtype="datetime64[D]")
+        self._code_index = {code: i for i, code in enumerate(self.codes)}
+        self._columns = {
+            field: np.load(self.directory / f"{field}.npy", mmap_mode="r")[:n_dates]
+            for field in FIELDS
+        }
+        self._meta_mtime = mtime
+        return True
+
+    def __contains__(self, code: str) -> bool:
+        return code in self._code_index
+
+    def series(self, code: str, field: str = "close") -> pd.Series | None:
+        """銘柄の時系列（上場前・データの無い日は除く）
+
+        欠損の無い区間はメモリマップのビューをそのまま返す（コピーしない）。
+        途中に欠損がある銘柄だけ、欠損日を除いた配列をコピーして返す。
+        """
+        index = self._code_index.get(code)
+        if index is None:
+            return None
+        values = self._columns[field][:, index]
+        present = np.flatnonzero(~np.isnan(values))
+        if len(present) == 0:
+            return pd.Series(dtype=np.float64)
+        rows = slice(int(present[0]), int(present[-1]) + 1)
+        values, dates = values[rows], self.dates[rows]
+        if len(present) < len(values):
+            mask = ~np.isnan(values)
+            values, dates = values[mask], dates[mask]
+        return pd.Series(values, index=pd.Index(dates.astype(object)), copy=False)
+
+
+def _write_meta(directory: Path, codes: list[str], dates: list[str]) -> None:
+    tmp = directory / f"{META_FILE}.tmp"
+    tmp.write_text(json.dumps({"codes": codes, "dates": dates}))
+    os.replace(tmp, directory / META_FILE)
+
+
+def _resize(directory: Path, field: str, shape: tuple[int, int]) -> np.memmap:
+    """配列を拡張した新しいファイルを作って置き換え、書き込み用に開く"""
+    path = directory / f"{field}.npy"
+    tmp = directory / f"{field}.npy.tmp"
+    new = np.lib.format.open_memmap(tmp, mode="w+", dtype=np.float64, shape=shape)
+    new[:] = np.nan
+    if path.exists():
+        old = np.load(path, mmap_mode="r")
+        new[: old.shape[0], : old.shape[1]] = old
+        del old
+    new.flush()
+    del new
+    os.replace(tmp, path)
+    return np.lib.format.open_memmap(path, mode="r+")
+
+
+def sync_store(
+    db: Session, directory: str | Path, full: bool = False, full_codes: list[str] | None = None
+) -> int:
+    """stock_prices からストアへ差分を同期する
+
+    前回同期した最終日の RESYNC_DAYS 日前以降の行だけを読み込む。
+
+    Args:
+        full: Trueなら全期間を読み直す
+        full_codes: 全期間を読み直す銘柄（株式分割等で過去の値が変わった銘柄）
+
+    Returns:
+        書き込んだ行数
+    """
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+
+    codes: list[str] = []
+    dates: list[str] = []
+    if ColumnarStore.exists(directory) and not full:
+        meta = json.loads((directory / META_FILE).read_text())
+        codes, dates = meta["codes"], meta["dates"]
+
+    since = None
+    if dates:
+        since = date.fromisoformat(dates[-1]) - timedelta(days=RESYNC_DAYS)
+
+    query = select(
+        StockPrice.code, StockPrice.trade_date, *[getattr(StockPrice, f) for f in FIELDS]
+    )
+    if since is not None:
+        if full_codes:
+            query = query.where(
+                or_(StockPrice.trade_date >= since, StockPrice.code.in_(full_codes))
+            )
+        else:
+            query = query.where(StockPrice.trade_date >= since)
+    frame = pd.DataFrame(
+        db.execute(query.order_by(StockPrice.trade_date)).all(),
+        columns=["code", "trade_date", *FIELDS],
+    )
+    if frame.empty:
+        if not dates:
+            logger.info("No price data to sync")
+        return 0
+
+    # 新しい銘柄は末尾の列に、新しい日付は末尾の行に追加する
+    code_index = {code: i for i, code in enumerate(codes)}
+    for code in frame["code"].unique():
+        if code not in code_index:
+            code_index[code] = len(codes)
+            codes.append(code)
+
+    date_index = {d: i for i, d in enumerate(dates)}
+    for d in sorted({d.isoformat() for d in frame["trade_date"]}):
+        if d not in date_index:
+            if dates and d < dates[-1]:
+                # 過去日の追加（バックフィル）は並び順が崩れるため全体を作り直す
+                logger.info(f"Backfilled date {d} found; rebuilding columnar store")
+                return sync_store(db, directory, full=True)
+            date_index[d] = len(dates)
+            dates.append(d)
+
+    arrays: dict[str, np.memmap] = {}
+    for field in FIELDS:
+        path = directory / f"{field}.npy"
+        array = np.lib.format.open_memmap(path, mode="r+") if path.exists() and not full else None
+        if array is None or array.shape[0] < len(dates) or array.shape[1] < len(codes):
+            capacity = (len(dates) // DATE_CAPACITY_STEP + 1) * DATE_CAPACITY_STEP
+            if full and path.exists():
+                path.unlink()
+            array = _resize(directory, field, (capacity, len(codes)))
+        arrays[field] = array
+
+    rows = frame["trade_date"].map(lambda d: date_index[d.isoformat()]).to_numpy()
+    cols = frame["code"].map(code_index).to_numpy()
+    for field in FIELDS:
+        arrays[field][rows, cols] = frame[field].to_numpy(dtype=np.float64, na_value=np.nan)
+        arrays[field].flush()
+
+    # データを書き終えてから索引を更新する（読み込み側は索引の範囲だけを参照する）
+    _write_meta(directory, codes, dates)
+    logger.info(
+        f"Synced {len(frame)} rows to columnar store ({len(dates)} dates x {len(codes)} codes)"
+    )
+    return len(frame)
@@ -2,6 +2,23 @@ import os
 from dataclasses import dataclass
 
 
+@dataclass
+class EngineConfig:
+    """SQLAlchemyエンジン（コネクションプール）の設定"""
+
+    url: str
+    # 用途（pg_stat_activity の application_name・メトリクスのラベルに使用）
+    name: str
+    pool_size: int
+    max_overflow: int
+    # この秒数より古いコネクションはチェックアウト時に作り直す（-1で無効）
+    pool_recycle: int
+    # チェックアウトごとに疎通確認する（1往復増える）
+    pool_pre_ping: bool
+    # 文のタイムアウト（ミリ秒、0で無制限）
+    statement_timeout_ms: int
+
+
 @dataclass
 class Config:
     # PostgreSQL設定
@@ -11,9 +28,52 @@ class Config:
     postgres_user: str = os.getenv("POSTGRES_USER", "stockuser")
     postgres_password: str = os.getenv("POSTGRES_PASSWORD", "stockpass")
 
+    # 読み取り専用レプリカの接続URL（空ならプライマリを読む）
+    read_database_url: str = os.getenv("READ_DATABASE_URL", "")
+
+    # 書き込み用（取り込みジョブ・スクリプト）のコネクションプール
+    write_pool_size: int = int(os.getenv("WRITE_POOL_SIZE", "5"))
+    write_max_overflow: int = int(os.getenv("WRITE_MAX_OVERFLOW", "5"))
+    write_pool_recycle: int = int(os.getenv("WRITE_POOL_RECYCLE", "1800"))
+    write_statement_timeout_ms: int = int(os.getenv("WRITE_STATEMENT_TIMEOUT_MS", "0"))
+    # 読み取り用（APIの参照系エンドポイント）のコネクションプール
+    read_pool_size: int = int(os.getenv("READ_POOL_SIZE", "10"))
+    read_max_overflow: int = int(os.getenv("READ_MAX_OVERFLOW", "10"))
+    read_pool_recycle: int = int(os.getenv("READ_POOL_RECYCLE", "1800"))
+    read_statement_timeout_ms: int = int(os.getenv("READ_STATEMENT_TIMEOUT_MS", "30000"))
+    # チェックアウトごとの疎通確認（pool_recycle で古いコネクションは作り直すため既定は無効）
+    db_pool_pre_ping: bool = os.getenv("DB_POOL_PRE_PING", "false").lower() == "true"
+
     # アプリケーション設定
     log_level: str = os.getenv("LOG_LEVEL", "INFO")
     download_batch_size: int = int(os.getenv("DOWNLOAD_BATCH_SIZE", "50"))
+    # 日次ジョブで株式分割・配当による過去の値の変化を検出し、該当銘柄の全期間を取得し直す
+    detect_corporate_actions: bool = os.getenv("DETECT_CORPORATE_ACTIONS", "true").lower() == "true"
+    # 分足を取り込む銘柄コード（カンマ区切り、空なら無効）
+    intraday_codes: str = os.getenv("INTRADAY_CODES", "")
+    # 取り込む分足の種別（カンマ区切り、1m / 5m）
+    intraday_intervals: str = os.getenv("INTRADAY_INTERVALS", "1m,5m")
+    # 分足の保持日数（これより前の月のパーティションを削除）
+    intraday_retention_days: int = int(os.getenv("INTRADAY_RETENTION_DAYS", "90"))
+    # 列指向ローカルストアの保存先（空なら無効）
+    columnar_store_dir: str = os.getenv("COLUMNAR_STORE_DIR", "")
+    # 分析用Parquetの出力先（空なら無効）
+    analytics_dir: str = os.getenv("ANALYTICS_DIR", "")
+    # ジョブの実行サマリー（JSON）・プロファイルの出力先（空ならファイル出力しない）
+    job_summary_dir: str = os.getenv("JOB_SUMMARY_DIR", "data/job_runs")
+    # ジョブのプロファイリング（cprofile / sample、空なら無効）
+    job_profile: str = os.getenv("JOB_PROFILE", "")
+    # sample モードのスタック採取間隔（秒）
+    job_profile_interval: float = float(os.getenv("JOB_PROFILE_INTERVAL", "0.01"))
+    # 日次ダウンロードの実行時刻（JST, HH:MM）- APIのCache-Controlの有効期限に使用
+    ingest_schedule_jst: str = os.getenv("INGEST_SCHEDULE_JST", "16:30")
+    # 常駐スケジューラの手動実行用HTTP（--daemon時のみ）
+    scheduler_host: str = os.getenv("SCHEDULER_HOST", "127.0.0.1")
+    scheduler_port: int = int(os.getenv("SCHEDULER_PORT", "8001"))
+    # この時間（ミリ秒）以上かかったクエリをログに出力（0で無効）
+    slow_query_ms: int = int(os.getenv("SLOW_QUERY_MS", "500"))
+    # 遅いクエリをログに出力する割合（0.0〜1.0）
+    slow_query_sample_rate: float = float(os.getenv("SLOW_QUERY_SAMPLE_RATE", "1.0"))
 
     @property
     def database_url(self) -> str:
@@ -22,5 +82,29 @@ class Config:
             f"@{self.postgres_host}:{self.postgres_port}/{self.postgres_db}"
         )
 
+    @property
+    def writer_engine(self) -> EngineConfig:
+        return EngineConfig(
+            url=self.database_url,
+            name="writer",
+            pool_size=self.write_pool_size,
+            max_overflow=self.write_max_overflow,
+            pool_recycle=self.write_pool_recycle,
+            pool_pre_ping=self.db_pool_pre_ping,
+            statement_timeout_ms=self.write_statement_timeout_ms,
+        )
+
+    @property
+    def reader_engine(self) -> EngineConfig:
+        return EngineConfig(
+            url=self.read_database_url or self.database_url,
+            name="reader",
+            pool_size=self.read_pool_size,
+            max_overflow=self.read_max_overflow,
+            pool_recycle=self.read_pool_recycle,
+            pool_pre_ping=self.db_pool_pre_ping,
+            statement_timeout_ms=self.read_statement_timeout_ms,
+        )
+
 
 config = Config()
@@ -0,0 +1,93 @@
+"""株式分割・配当による過去データの変化の検出
+
+yfinance の Close は分割調整済み、Adj Close は分割・配当調整済みのため、
+権利落ち日を迎えると過去の日付の値が遡って変わる。日次ジョブは前営業日を含めてダウンロードし、
+保存済みの行と比べて終値、または調整後終値/終値の比率が変わった銘柄を検出する。
+検出した銘柄だけ全期間を取得し直し、指標・列指向ストア・週足月足を作り直す。
+"""
+
+import logging
+from datetime import date
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from src.models import StockPrice
+
+logger = logging.getLogger(__name__)
+
+# 比率の相対変化がこれを超えたら調整済みの値が変わったとみなす（0.1%）
+ADJUSTMENT_TOLERANCE = 1e-3
+
+COLUMNS = ["code", "trade_date", "close", "adjusted_close"]
+
+
+def price_frame(data: pd.DataFrame, ticker_to_code: dict[str, str]) -> pd.DataFrame:
+    """yf.download の結果を (code, trade_date, close, adjusted_close) の縦持ちに変換する"""
+    frames = []
+    for ticker, code in ticker_to_code.items():
+        if len(ticker_to_code) == 1:
+            ticker_data = data
+        elif ticker in data.columns.get_level_values(0):
+            ticker_data = data[ticker]
+        else:
+            continue
+        if "Close" not in ticker_data or "Adj Close" not in ticker_data:
+            continue
+        dates = [d.date() if hasattr(d, "date") else d for d in ticker_data.index]
+        frames.append(
+            pd.DataFrame(
+                {
+                    "code": code,
+                    "trade_date": dates,
+                    "close": ticker_data["Close"].to_numpy(dtype=np.float64),
+                    "adjusted_close": ticker_data["Adj Close"].to_numpy(dtype=np.float64),
+                }
+            )
+        )
+    if not frames:
+        return pd.DataFrame(columns=COLUMNS)
+    return pd.concat(frames, ignore_index=True)
+
+
+def load_stored(db: Session, codes: list[str], start: date, end: date) -> pd.DataFrame:
+    """保存済みの終値・調整後終値（end は含まない）"""
+    rows = db.execute(
+        select(
+            StockPrice.code, StockPrice.trade_date, StockPrice.close, StockPrice.adjusted_close
+        ).where(
+            StockPrice.code.in_(codes),
+            StockPrice.trade_date >= start,
+            StockPrice.trade_date < end,
+        )
+    ).all()
+    return pd.DataFrame(rows, columns=COLUMNS)
+
+
+def detect_adjusted_codes(
+    stored: pd.DataFrame, downloaded: pd.DataFrame, tolerance: float = ADJUSTMENT_TOLERANCE
+) -> list[str]:
+    """同じ日付の保存済みの値とダウンロードした値を比べ、調整が変わった銘柄を返す
+
+    - 終値の変化: 株式分割（Close は分割調整済み）
+    - 調整後終値/終値の比率の変化: 配当（および分割）
+    """
+    merged = stored.merge(downloaded, on=["code", "trade_date"], suffixes=("_stored", "_new"))
+    if merged.empty:
+        return []
+
+    def values(column: str) -> np.ndarray:
+        array: np.ndarray = merged[column].to_numpy(dtype=np.float64, na_value=np.nan)
+        return array
+
+    close_stored, close_new = values("close_stored"), values("close_new")
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ratio_stored = values("adjusted_close_stored") / close_stored
+        ratio_new = values("adjusted_close_new") / close_new
+        # NaN同士の比較はFalseになるため、欠損値のある行は検出しない
+        changed = (np.abs(close_new / close_stored - 1) > tolerance) | (
+            np.abs(ratio_new / ratio_stored - 1) > tolerance
+        )
+    return sorted(merged.loc[changed, "code"].unique())
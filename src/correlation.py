@@ -0,0 +1,186 @@
+"""複数銘柄の日次リターンの相関行列・共分散行列
+
+指定銘柄の調整後終値を1回のクエリで読み、trade_date で揃えた (日付, 銘柄) の配列から
+リターン・相関・共分散をNumPyで計算する。欠損（上場前・売買停止など）はペアごとに除外し、
+2銘柄の両方にリターンがある日だけで計算する（pandas の DataFrame.corr / cov と同じ扱い）。
+
+結果は (銘柄の集合, 期間, 最新取引日, データ世代) ごとにプロセス内にキャッシュする。
+APIから呼ばれるため、NumPyは使用時にimportする。
+"""
+
+import math
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import date
+from typing import TYPE_CHECKING
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from src.freshness import DataVersion
+from src.models import StockPrice
+
+if TYPE_CHECKING:
+    import numpy as np
+
+# 1リクエストで指定できる銘柄数の上限
+MAX_CODES = 100
+
+# 両方にリターンがある日がこれ未満のペアは相関・共分散をNaNとする
+MIN_OBSERVATIONS = 2
+
+# キャッシュする結果の数
+CACHE_SIZE = 128
+
+
+@dataclass(frozen=True)
+class CorrelationResult:
+    codes: list[str]
+    # リターンの日付（最初の終値の日は含まない）
+    dates: list[date]
+    # 日次リターン（日付 × 銘柄）
+    returns: "np.ndarray"
+    # ペアごとの計算に使った日数（銘柄 × 銘柄）
+    observations: "np.ndarray"
+    correlation: "np.ndarray"
+    covariance: "np.ndarray"
+
+
+_cache: OrderedDict[tuple, CorrelationResult] = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def align_closes(
+    rows: list[tuple[str, date, float | None]], codes: list[str]
+) -> tuple[list[date], "np.ndarray"]:
+    """(code, trade_date, close) の行を trade_date で揃えた (日付, 銘柄) の配列にする"""
+    import numpy as np
+
+    dates = sorted({trade_date for _, trade_date, _ in rows})
+    date_index = {d: i for i, d in enumerate(dates)}
+    code_index = {code: j for j, code in enumerate(codes)}
+    closes = np.full((len(dates), len(codes)), np.nan)
+    for code, trade_date, close in rows:
+        if close is not None:
+            closes[date_index[trade_date], code_index[code]] = close
+    return dates, closes
+
+
+def daily_returns(closes: "np.ndarray") -> "np.ndarray":
+    """終値の配列から日次リターン（前日か当日の終値が無い・0以下の日はNaN）"""
+    import numpy as np
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        returns = closes[1:] / closes[:-1] - 1
+    valid = (closes[1:] > 0) & (closes[:-1] > 0)
+    return np.where(valid, returns, np.nan)
+
+
+def pairwise_moments(
+    returns: "np.ndarray", min_observations: int = MIN_OBSERVATIONS
+) -> tuple["np.ndarray", "np.ndarray", "np.ndarray"]:
+    """欠損をペアごとに除外した (日数, 共分散, 相関) の行列
+
+    ペア (i, j) ごとに両方が欠損でない日だけの和を行列積でまとめて求める。
+    """
+    import numpy as np
+
+    present = ~np.isnan(returns)
+    mask = present.astype(np.float64)
+    values = np.where(present, returns, 0.0)
+
+    n = mask.T @ mask
+    # sums[i, j]: j も欠損でない日の i の和、squares[i, j]: 同じく i の2乗和
+    sums = values.T @ mask
+    squares = (values**2).T @ mask
+    products = values.T @ values
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        covariance = (products - sums * sums.T / n) / (n - 1)
+        variance = (squares - sums**2 / n) / (n - 1)
+        correlation = covariance / np.sqrt(variance * variance.T)
+
+    insufficient = n < max(min_observations, 2)
+    covariance[insufficient] = np.nan
+    correlation[insufficient] = np.nan
+    # 丸め誤差で [-1, 1] をわずかに超えないようにする（対角は1）
+    correlation = np.clip(correlation, -1.0, 1.0)
+    diagonal = np.diag_indices_from(correlation)
+    correlation[diagonal] = np.where(np.isnan(correlation[diagonal]), np.nan, 1.0)
+    return n.astype(np.int64), covariance, correlation
+
+
+def load_closes(
+    db: Session, codes: list[str], window: int, latest: date
+) -> list[tuple[str, date, float | None]]:
+    """latest までの直近 window+1 取引日の調整後終値（無ければ終値）を1回のクエリで読む"""
+    recent_dates = (
+        select(StockPrice.trade_date)
+        .where(StockPrice.code.in_(codes), StockPrice.trade_date <= latest)
+        .distinct()
+        .order_by(StockPrice.trade_date.desc())
+        .limit(window + 1)
+        .subquery()
+    )
+    start = select(func.min(recent_dates.c.trade_date)).scalar_subquery()
+    rows = db.execute(
+        select(
+            StockPrice.code,
+            StockPrice.trade_date,
+            func.coalesce(StockPrice.adjusted_close, StockPrice.close),
+        ).where(
+            StockPrice.code.in_(codes),
+            StockPrice.trade_date >= start,
+            StockPrice.trade_date <= latest,
+        )
+    ).all()
+    return [tuple(row) for row in rows]
+
+
+def correlation_matrix(
+    db: Session, codes: list[str], window: int, version: DataVersion
+) -> CorrelationResult | None:
+    """直近 window 日の日次リターンの相関・共分散（データが無ければNone）
+
+    結果の銘柄は重複を除いてコード順に並べる。返した配列は書き込み不可（キャッシュと共有）。
+    """
+    codes = sorted(set(codes))
+    if version.latest_trade_date is None:
+        return None
+
+    key = (tuple(codes), window, version.latest_trade_date, version.generation)
+    with _cache_lock:
+        if key in _cache:
+            _cache.move_to_end(key)
+            return _cache[key]
+
+    dates, closes = align_closes(load_closes(db, codes, window, version.latest_trade_date), codes)
+    if len(dates) < 2:
+        return None
+
+    returns = daily_returns(closes)
+    observations, covariance, correlation = pairwise_moments(returns)
+    for array in (returns, observations, covariance, correlation):
+        array.flags.writeable = False
+    result = CorrelationResult(
+        codes=codes,
+        dates=dates[1:],
+        returns=returns,
+        observations=observations,
+        correlation=correlation,
+        covariance=covariance,
+    )
+
+    # 日次ジョブの実行中は途中のデータなのでキャッシュしない
+    if not version.in_progress:
+        with _cache_lock:
+            _cache[key] = result
+            while len(_cache) > CACHE_SIZE:
+                _cache.popitem(last=False)
+    return result
+
+
+def to_nested_list(values: "np.ndarray") -> list[list[float | None]]:
+    """JSON用のリスト（NaNはNone）"""
+    return [[None if math.isnan(value) else value for value in row] for row in values.tolist()]
@@ -1,15 +1,90 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import DeclarativeBase, sessionmaker
+import threading
+from collections.abc import Callable
+from contextlib import contextmanager
 
-from src.config import config
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import DeclarativeBase, Session, sessionmaker
+
+from src.config import EngineConfig, config
+from src.metrics import InstrumentedQueuePool, instrument_engine
 
 
 class Base(DeclarativeBase):
     pass
 
 
-engine = create_engine(config.database_url, echo=False, pool_pre_ping=True)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+_engine: Engine | None = None
+_read_engine: Engine | None = None
+_engine_lock = threading.Lock()
+
+
+def create_db_engine(settings: EngineConfig) -> Engine:
+    """設定からエンジンを作成する（文のタイムアウト・application_name は接続時に設定）"""
+    options = f"-c statement_timeout={settings.statement_timeout_ms}"
+    engine = create_engine(
+        settings.url,
+        echo=False,
+        poolclass=InstrumentedQueuePool,
+        pool_size=settings.pool_size,
+        max_overflow=settings.max_overflow,
+        pool_recycle=settings.pool_recycle,
+        pool_pre_ping=settings.pool_pre_ping,
+        connect_args={"options": options, "application_name": f"stock-{settings.name}"},
+    )
+    instrument_engine(engine, settings.name)
+    return engine
+
+
+def get_engine() -> Engine:
+    """書き込み用（プライマリ）のエンジンを取得する
+
+    初回呼び出し時に作成する。import時には接続・ドライバ読み込みを行わない。
+    """
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = create_db_engine(config.writer_engine)
+    return _engine
+
+
+def get_read_engine() -> Engine:
+    """読み取り用のエンジンを取得する（READ_DATABASE_URL が無ければプライマリに接続する）
+
+    書き込み用とはプールを分けるため、取り込みジョブの負荷でAPIのコネクションが枯渇しない。
+    """
+    global _read_engine
+    if _read_engine is None:
+        with _engine_lock:
+            if _read_engine is None:
+                _read_engine = create_db_engine(config.reader_engine)
+    return _read_engine
+
+
+def __getattr__(name: str):
+    # 互換性のため `from src.database import engine` を初回アクセス時に解決する
+    if name == "engine":
+        return get_engine()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+class _LazySessionmaker(sessionmaker[Session]):
+    """最初のセッション作成時にエンジンをバインドするsessionmaker"""
+
+    def __init__(self, engine_factory: Callable[[], Engine] = get_engine, **kw):
+        super().__init__(**kw)
+        self.engine_factory = engine_factory
+
+    def __call__(self, **local_kw) -> Session:
+        if self.kw.get("bind") is None:
+            self.configure(bind=self.engine_factory())
+        return super().__call__(**local_kw)
+
+
+SessionLocal = _LazySessionmaker(autocommit=False, autoflush=False)
+# APIの参照系エンドポイント用（レプリカを読む場合は書き込み直後の値が見えないことがある）
+ReadSessionLocal = _LazySessionmaker(get_read_engine, autocommit=False, autoflush=False)
 
 
 def get_db():
@@ -18,3 +93,28 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+def get_read_db():
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+@contextmanager
+def advisory_lock(key: int):
+    """PostgreSQLのセッションレベルのアドバイザリロックを試行する
+
+    取得できたかどうかをyieldし、ブロックを抜けると解放する（接続が切れた場合も解放される）。
+    """
+    with get_engine().connect() as conn:
+        acquired = conn.execute(text("SELECT pg_try_advisory_lock(:key)"), {"key": key}).scalar()
+        conn.commit()
+        try:
+            yield bool(acquired)
+        finally:
+            if acquired:
+                conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": key})
+                conn.commit()
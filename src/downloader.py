@@ -3,16 +3,24 @@
 import logging
 import time
 from datetime import datetime, timedelta
+from typing import Any
 
+import numpy as np
 import pandas as pd
-import yfinance as yf
-from sqlalchemy import update
+from sqlalchemy import func, select, update
 from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.orm import Session
 
+from src.columnar import ColumnarStore
+from src.corporate_actions import detect_adjusted_codes, load_stored, price_frame
 from src.indicators import calculate_all_indicators
-from src.models import Stock, StockPrice
+from src.journal import IngestionJournal
+from src.metrics import current_query_stats
+from src.models import IngestionBatch, PriceQuarantine, Stock, StockPrice
+from src.partitions import ensure_partitions
 from src.stock_list import StockInfo, get_yahoo_ticker
+from src.trading_calendar import previous_trading_day
+from src.validation import validate_prices
 
 logger = logging.getLogger(__name__)
 
@@ -21,16 +29,35 @@ BATCH_DELAY_SECONDS = 2
 
 
 class StockDownloader:
-    def __init__(self, db: Session, batch_size: int = 50):
+    def __init__(
+        self,
+        db: Session,
+        batch_size: int = 50,
+        store: ColumnarStore | None = None,
+        detect_corporate_actions: bool = False,
+        validate: bool = True,
+    ):
         self.db = db
         self.batch_size = batch_size
-
-    def download_daily_prices(self, stock_list: list[StockInfo]) -> int:
+        # 指定時は指標計算の終値を列指向ストアから読む（DBへの全件クエリを省略）
+        self.store = store
+        # 保存前に既存の行と比べ、株式分割・配当で過去の値が変わった銘柄を記録する
+        self.detect_corporate_actions = detect_corporate_actions
+        self.corporate_actions: set[str] = set()
+        # 保存前に品質チェックを行い、疑わしい行は price_quarantine に退避する
+        self.validate = validate
+        # バッチごとの計測値（ダウンロード時間・保存行数・SQL文の数）
+        self.batch_stats: list[dict] = []
+
+    def download_daily_prices(
+        self, stock_list: list[StockInfo], journal: IngestionJournal | None = None
+    ) -> int:
         """
         本日分の株価データをダウンロードしてDBに保存する（日次更新用）
 
         Args:
             stock_list: 銘柄リスト
+            journal: バッチごとのチェックポイントを記録するジャーナル
 
         Returns:
             保存したレコード数
@@ -38,15 +65,22 @@ class StockDownloader:
         # 今日と明日の日付（yfinanceは終了日を含まないため+1日）
         today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
         tomorrow = today + timedelta(days=1)
+        start_date = today
+        if self.detect_corporate_actions:
+            # 保存済みの前営業日の値と比べるため前営業日から取得する
+            start_date = datetime.combine(previous_trading_day(today.date()), today.time())
 
         logger.info(f"Downloading daily prices for {today.strftime('%Y-%m-%d')}")
-        return self.download_stock_prices(stock_list, start_date=today, end_date=tomorrow)
+        return self.download_stock_prices(
+            stock_list, start_date=start_date, end_date=tomorrow, journal=journal
+        )
 
     def download_stock_prices(
         self,
         stock_list: list[StockInfo],
         start_date: datetime | None = None,
         end_date: datetime | None = None,
+        journal: IngestionJournal | None = None,
     ) -> int:
         """
         株価データをダウンロードしてDBに保存する
@@ -55,6 +89,8 @@ class StockDownloader:
             stock_list: 銘柄リスト
             start_date: 開始日（デフォルト: 3日前 - 休日対応）
             end_date: 終了日（デフォルト: 明日）
+            journal: バッチごとのチェックポイントを記録するジャーナル
+                （再開時は完了済みのバッチを飛ばし、中断した実行の期間で取得する）
 
         Returns:
             保存したレコード数
@@ -64,31 +100,64 @@ class StockDownloader:
         if end_date is None:
             end_date = datetime.now() + timedelta(days=1)
 
+        batches: list[tuple[IngestionBatch | None, list[StockInfo]]]
+        if journal is not None:
+            batches = list(journal.plan(stock_list, self.batch_size, start_date, end_date))
+            start_date, end_date = journal.start_date, journal.end_date
+        else:
+            batches = [
+                (None, stock_list[i : i + self.batch_size])
+                for i in range(0, len(stock_list), self.batch_size)
+            ]
+
         total_saved = 0
 
-        # バッチ処理
-        for i in range(0, len(stock_list), self.batch_size):
-            batch = stock_list[i : i + self.batch_size]
-            logger.info(
-                f"Processing batch {i // self.batch_size + 1}"
-                f" ({len(batch)} stocks, {i + 1}-{i + len(batch)}/{len(stock_list)})"
-            )
+        # 書き込み先の年パーティションを用意
+        ensure_partitions(self.db, start_date.date(), end_date.date())
 
-            # 銘柄マスタを更新
-            self._upsert_stocks(batch)
+        # バッチ処理
+        for n, (checkpoint, batch) in enumerate(batches, 1):
+            logger.info(f"Processing batch {n}/{len(batches)} ({len(batch)} stocks)")
+            if checkpoint is not None and journal is not None:
+                journal.begin(checkpoint)
 
-            # 株価データをダウンロード
-            saved = self._download_batch(batch, start_date, end_date)
+            saved, error = self.download_batch(batch, start_date, end_date)
             total_saved += saved
 
+            if checkpoint is not None and journal is not None:
+                if error:
+                    journal.fail(checkpoint, error)
+                else:
+                    journal.complete(checkpoint, saved)
+
             logger.info(f"Batch completed: {saved} records saved")
 
             # レート制限対策で少し待機
-            if i + self.batch_size < len(stock_list):
+            if n < len(batches):
                 time.sleep(BATCH_DELAY_SECONDS)
 
+        if journal is not None:
+            journal.finish()
         return total_saved
 
+    def download_batch(
+        self, stocks: list[StockInfo], start_date: datetime, end_date: datetime
+    ) -> tuple[int, str | None]:
+        """1バッチ分の銘柄マスタを更新し、株価データをダウンロードして保存する
+
+        Returns:
+            (保存したレコード数, エラー内容（成功時はNone）)
+        """
+        if not stocks:
+            return 0, None
+
+        # 銘柄マスタを更新
+        self._upsert_stocks(stocks)
+
+        # 株価データをダウンロード
+        saved = self._download_batch(stocks, start_date, end_date)
+        return saved, self.batch_stats[-1].get("error")
+
     def _upsert_stocks(self, stocks: list[StockInfo]) -> None:
         """銘柄マスタをupsertする"""
         for stock in stocks:
@@ -116,9 +185,22 @@ class StockDownloader:
         """バッチで株価データをダウンロードする"""
         tickers = [get_yahoo_ticker(s.code) for s in stocks]
         ticker_to_code = {get_yahoo_ticker(s.code): s.code for s in stocks}
+        stats: dict[str, Any] = {
+            "stocks": len(stocks),
+            "download_seconds": 0.0,
+            "save_seconds": 0.0,
+            "rows": 0,
+        }
+        self.batch_stats.append(stats)
+        queries = current_query_stats()
+        query_count = queries.count if queries else 0
 
         try:
+            # yfinanceは読み込みが重いため実際にダウンロードする時にimportする
+            import yfinance as yf
+
             # yfinanceでまとめてダウンロード
+            start = time.perf_counter()
             data = yf.download(
                 tickers,
                 start=start_date.strftime("%Y-%m-%d"),
@@ -127,16 +209,126 @@ class StockDownloader:
                 auto_adjust=False,
                 progress=False,
             )
+            stats["download_seconds"] = round(time.perf_counter() - start, 3)
 
             if data.empty:
                 logger.warning("No data downloaded")
                 return 0
 
-            return self._save_price_data(data, ticker_to_code, tickers)
+            if self.validate:
+                data = self._quarantine_suspect_rows(data, ticker_to_code, stats)
+
+            if self.detect_corporate_actions:
+                self._detect_corporate_actions(data, ticker_to_code, start_date, end_date)
+
+            start = time.perf_counter()
+            saved = self._save_price_data(data, ticker_to_code, tickers)
+            stats["save_seconds"] = round(time.perf_counter() - start, 3)
+            stats["rows"] = saved
+            return saved
 
         except Exception as e:
             logger.error(f"Error downloading data: {e}")
+            # 保存途中の失敗でもジャーナル等の後続の書き込みができるようにする
+            self.db.rollback()
+            stats["error"] = str(e)
             return 0
+        finally:
+            if queries is not None:
+                stats["statements"] = queries.count - query_count
+
+    def _quarantine_suspect_rows(
+        self, data: pd.DataFrame, ticker_to_code: dict[str, str], stats: dict
+    ) -> pd.DataFrame:
+        """疑わしい行を price_quarantine に退避し、その終値を欠損にしたデータを返す
+
+        終値が欠損した行は保存時に読み飛ばされる。
+        """
+        start = time.perf_counter()
+        result = validate_prices(data, ticker_to_code)
+        stats["validate_seconds"] = round(time.perf_counter() - start, 4)
+        stats["quarantined"] = len(result.quarantined)
+        if not result.quarantined:
+            return data
+
+        now = datetime.utcnow()
+        stmt = insert(PriceQuarantine).values(
+            [{**row, "detected_at": now} for row in result.quarantined]
+        )
+        stmt = stmt.on_conflict_do_update(
+            constraint="uq_price_quarantine_code_date",
+            set_={
+                column: getattr(stmt.excluded, column)
+                for column in (
+                    "reasons",
+                    "open",
+                    "high",
+                    "low",
+                    "close",
+                    "volume",
+                    "adjusted_close",
+                    "detected_at",
+                )
+            },
+        )
+        self.db.execute(stmt)
+        self.db.commit()
+        logger.warning(
+            f"Quarantined {len(result.quarantined)} rows: "
+            + ", ".join(
+                f"{row['code']} {row['trade_date']} {row['reasons']}"
+                for row in result.quarantined[:10]
+            )
+        )
+
+        data = data.copy()
+        multi = isinstance(data.columns, pd.MultiIndex)
+        code_to_ticker = {code: ticker for ticker, code in ticker_to_code.items()}
+        for code in result.suspect.columns[result.suspect.any()]:
+            column = (code_to_ticker[code], "Close") if multi else "Close"
+            data.loc[result.suspect[code].to_numpy(), column] = np.nan
+        return data
+
+    def _detect_corporate_actions(
+        self,
+        data: pd.DataFrame,
+        ticker_to_code: dict[str, str],
+        start_date: datetime,
+        end_date: datetime,
+    ) -> None:
+        """保存前の値と比べて調整が変わった銘柄を記録する（上書きする前に呼ぶこと）"""
+        stored = load_stored(
+            self.db, list(ticker_to_code.values()), start_date.date(), end_date.date()
+        )
+        codes = detect_adjusted_codes(stored, price_frame(data, ticker_to_code))
+        if codes:
+            logger.info(f"Adjusted history changed (split/dividend): {', '.join(codes)}")
+            self.corporate_actions.update(codes)
+
+    def refetch_history(self, stocks: list[StockInfo]) -> int:
+        """保存済みの全期間を取得し直して書き込む（株式分割・配当で調整後の値が変わった銘柄用）
+
+        Returns:
+            保存したレコード数
+        """
+        codes = [stock.code for stock in stocks]
+        first = self.db.scalar(
+            select(func.min(StockPrice.trade_date)).where(StockPrice.code.in_(codes))
+        )
+        if first is None:
+            return 0
+
+        end_date = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+        end_date += timedelta(days=1)
+        logger.info(f"Re-downloading {len(codes)} codes from {first}")
+        # 全期間の再取得では既存の値と異なるのが当然なので検出しない
+        detect, self.detect_corporate_actions = self.detect_corporate_actions, False
+        try:
+            return self.download_stock_prices(
+                stocks, start_date=datetime.combine(first, end_date.time()), end_date=end_date
+            )
+        finally:
+            self.detect_corporate_actions = detect
 
     def _save_price_data(
         self, data: pd.DataFrame, ticker_to_code: dict[str, str], tickers: list[str]
@@ -220,46 +412,22 @@ class StockDownloader:
         Returns:
             更新したレコード数
         """
-        # 指標計算に必要な過去データを取得（MA20, RSI9用に余裕を持って取得）
-        prices = (
-            self.db.query(StockPrice)
-            .filter(StockPrice.code == code)
-            .order_by(StockPrice.trade_date.asc())
-            .all()
-        )
-
-        if len(prices) < 20:
+        df = self._load_closes(code)
+        if df is None or len(df) < 20:
             return 0
 
-        # DataFrameに変換
-        df = pd.DataFrame(
-            [
-                {
-                    "trade_date": p.trade_date,
-                    "close": p.close,
-                }
-                for p in prices
-            ]
-        )
-        df = df.set_index("trade_date")
-
         # テクニカル指標を計算
         df = calculate_all_indicators(df)
 
         # 直近limit_days分のデータを更新
         updated_count = 0
-        recent_prices = prices[-limit_days:] if limit_days else prices
-
-        for price in recent_prices:
-            if price.trade_date not in df.index:
-                continue
-
-            row = df.loc[price.trade_date]
+        recent = df.iloc[-limit_days:] if limit_days else df
 
-            # 指標がNaNでない場合のみ更新
+        for trade_date, row in recent.iterrows():
+            # パーティションキーで絞り込んで対象パーティションのみを更新
             stmt = (
                 update(StockPrice)
-                .where(StockPrice.id == price.id)
+                .where(StockPrice.code == code, StockPrice.trade_date == trade_date)
                 .values(
                     ma5=self._to_float(row.get("ma5")),
                     ma20=self._to_float(row.get("ma20")),
@@ -275,6 +443,26 @@ class StockDownloader:
         self.db.commit()
         return updated_count
 
+    def _load_closes(self, code: str) -> pd.DataFrame | None:
+        """指標計算用の終値（trade_date昇順、'close'カラム）を読み込む"""
+        if self.store is not None:
+            series = self.store.series(code, "close")
+            if series is not None:
+                return series.to_frame("close")
+
+        prices = (
+            self.db.query(StockPrice.trade_date, StockPrice.close)
+            .filter(StockPrice.code == code)
+            .order_by(StockPrice.trade_date.asc())
+            .all()
+        )
+        if not prices:
+            return None
+
+        # DataFrameに変換
+        df = pd.DataFrame(prices, columns=["trade_date", "close"])
+        return df.set_index("trade_date")
+
     def update_all_indicators(self, stock_codes: list[str], limit_days: int = 30) -> int:
         """複数銘柄のテクニカル指標を更新する
 
@@ -0,0 +1,162 @@
+"""データの鮮度（ingestion_state の世代番号・最新取引日）の管理
+
+取り込みジョブは開始・終了を記録し、終了時に世代番号を進める。
+APIはこの世代番号をETag・キャッシュ制御（src.http_cache）やSSEの通知に使う。
+"""
+
+import logging
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import Row, func, select, update
+from sqlalchemy.orm import Session
+
+from src.config import config
+from src.models import IngestionState, StockPrice
+from src.notifications import notify_prices_updated
+from src.trading_calendar import last_scheduled_run, next_scheduled_run
+
+logger = logging.getLogger(__name__)
+
+STATE_ID = 1
+
+# 異常終了したジョブの started_at が残っていても、この時間を過ぎたら実行中とみなさない
+INGESTION_TIMEOUT = timedelta(hours=6)
+
+# 取り込みジョブの多重実行を防ぐアドバイザリロックのキー
+INGESTION_LOCK_KEY = 7_203_001
+
+# 前営業日を探す範囲（日数）。年末年始・連休を跨いでも足りる幅にする
+PREVIOUS_DATE_LOOKBACK_DAYS = 14
+
+
+@dataclass(frozen=True)
+class DataVersion:
+    generation: int
+    latest_trade_date: date | None
+    updated_at: datetime | None
+    in_progress: bool = False
+
+
+def get_data_version(db: Session) -> DataVersion:
+    """現在のデータ世代を取得"""
+    state = db.get(IngestionState, STATE_ID)
+    if state is None:
+        # マイグレーション直後など状態が無い場合は最新取引日のみで判定
+        latest = db.query(func.max(StockPrice.trade_date)).scalar()
+        return DataVersion(generation=0, latest_trade_date=latest, updated_at=None)
+
+    in_progress = (
+        state.started_at is not None
+        and state.started_at > state.updated_at
+        and datetime.utcnow() - state.started_at < INGESTION_TIMEOUT
+    )
+    return DataVersion(
+        generation=state.generation,
+        latest_trade_date=state.latest_trade_date,
+        updated_at=state.updated_at,
+        in_progress=in_progress,
+    )
+
+
+def latest_trade_date_subquery():
+    """最新取引日を返すスカラー式
+
+    trade_date はBRINインデックスのみのため max() は全件走査になる。
+    ingestion_state に記録した値を優先し、未記録の場合のみ stock_prices から求める。
+    """
+    recorded = (
+        select(IngestionState.latest_trade_date)
+        .where(IngestionState.id == STATE_ID)
+        .correlate(None)
+        .scalar_subquery()
+    )
+    scanned = select(func.max(StockPrice.trade_date)).correlate(None).scalar_subquery()
+    return func.coalesce(recorded, scanned)
+
+
+def previous_trade_date_subquery(latest):
+    """latest の前営業日を返すスカラー式（直近の範囲だけをBRINで読む）"""
+    return (
+        select(func.max(StockPrice.trade_date))
+        .where(
+            StockPrice.trade_date < latest,
+            StockPrice.trade_date >= latest - PREVIOUS_DATE_LOOKBACK_DAYS,
+        )
+        .correlate(None)
+        .scalar_subquery()
+    )
+
+
+def get_latest_trade_date(db: Session) -> date | None:
+    """最新取引日を取得"""
+    return db.execute(select(latest_trade_date_subquery())).scalar()
+
+
+def begin_ingestion(db: Session) -> None:
+    """データ更新の開始を記録（完了までAPIはキャッシュさせない）"""
+    db.execute(
+        update(IngestionState)
+        .where(IngestionState.id == STATE_ID)
+        .values(started_at=datetime.utcnow())
+    )
+    db.commit()
+
+
+def finish_ingestion(db: Session) -> int:
+    """データ更新の完了を記録して世代番号を進める
+
+    同じトランザクションで更新通知（NOTIFY）を発行するため、購読中のクライアントには
+    コミットと同時に通知が届く。
+
+    Returns:
+        新しい世代番号
+    """
+    # 記録済みの最新取引日以降だけを走査する（BRINで直近のブロックのみ読む）
+    recorded = db.execute(
+        select(IngestionState.latest_trade_date).where(IngestionState.id == STATE_ID)
+    ).scalar()
+    latest_query = select(func.max(StockPrice.trade_date))
+    if recorded is not None:
+        latest_query = latest_query.where(StockPrice.trade_date >= recorded)
+    latest = db.execute(latest_query).scalar()
+
+    row: Row[tuple[int, date | None]] | None = db.execute(
+        update(IngestionState)
+        .where(IngestionState.id == STATE_ID)
+        .values(
+            generation=IngestionState.generation + 1,
+            latest_trade_date=func.greatest(IngestionState.latest_trade_date, latest),
+            updated_at=datetime.utcnow(),
+        )
+        .returning(IngestionState.generation, IngestionState.latest_trade_date)
+    ).first()
+    if row is None:
+        db.commit()
+        return 0
+
+    generation, latest_trade_date = row.tuple()
+    notify_prices_updated(db, {"generation": generation, "latest_trade_date": latest_trade_date})
+    db.commit()
+    return generation
+
+
+def end_ingestion(db: Session) -> None:
+    """データ更新の終了を記録する（失敗時も呼ぶこと。例外は送出しない）"""
+    try:
+        # 失敗時の未コミット分を破棄してから記録する
+        db.rollback()
+        generation = finish_ingestion(db)
+        logger.info(f"Data generation advanced to {generation}")
+    except Exception as e:
+        logger.warning(f"Failed to record ingestion finish: {e}")
+
+
+def next_ingestion_at(now: datetime) -> datetime:
+    """次回の日次ダウンロード予定時刻（JST、東証の休業日はスキップ）"""
+    return next_scheduled_run(now, config.ingest_schedule_jst)
+
+
+def last_ingestion_at(now: datetime) -> datetime:
+    """直近（now以前）の日次ダウンロード予定時刻（JST、東証の休業日はスキップ）"""
+    return last_scheduled_run(now, config.ingest_schedule_jst)
@@ -0,0 +1,108 @@
+"""データ鮮度に基づくHTTP条件付きリクエスト（ETag / Last-Modified / Cache-Control）
+
+APIが返すデータは日次ジョブがコミットした時にしか変わらないため、
+ingestion_state の世代番号とクエリパラメータからETagを作り、
+If-None-Match が一致すればメインのクエリを実行せずに304を返す。
+"""
+
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+
+from fastapi import Depends, HTTPException, Request, Response
+from sqlalchemy.orm import Session
+
+from src.database import get_read_db
+from src.freshness import (
+    INGESTION_TIMEOUT,
+    DataVersion,
+    get_data_version,
+    last_ingestion_at,
+    next_ingestion_at,
+)
+
+
+def compute_etag(version: DataVersion, request: Request) -> str:
+    """データ世代・パス・クエリパラメータから強いETagを作る"""
+    params = "&".join(f"{k}={v}" for k, v in sorted(request.query_params.multi_items()))
+    key = f"{version.generation}:{version.latest_trade_date}:{request.url.path}?{params}"
+    digest = hashlib.sha256(key.encode()).hexdigest()[:32]
+    return f'"{version.generation}-{digest}"'
+
+
+def _etag_matches(etag: str, if_none_match: str) -> bool:
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return True
+        # If-None-Match は弱い比較を行う（RFC 9110）
+        if candidate.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+def _not_modified_since(updated_at: datetime, if_modified_since: str) -> bool:
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    # HTTP日付は秒単位のため切り捨てて比較
+    return updated_at.replace(tzinfo=timezone.utc, microsecond=0) <= since
+
+
+def cache_control(version: DataVersion, now: datetime) -> str:
+    """Cache-Control の値
+
+    次回の日次ダウンロード予定時刻までキャッシュさせる。予定時刻を過ぎても
+    begin_ingestion が記録されるまで（スケジューラの遅延など）は更新前のデータなので、
+    予定時刻以降に世代が進むまで（最大 INGESTION_TIMEOUT）はキャッシュさせない。
+    """
+    if version.in_progress:
+        # 日次ジョブの実行中はデータが途中の状態なのでキャッシュさせない
+        return "no-cache"
+
+    last_run = last_ingestion_at(now)
+    updated_at = version.updated_at.replace(tzinfo=timezone.utc) if version.updated_at else None
+    if (updated_at is None or updated_at < last_run) and now - last_run < INGESTION_TIMEOUT:
+        return "no-cache"
+
+    max_age = max(int((next_ingestion_at(now) - now).total_seconds()), 0)
+    return f"public, max-age={max_age}"
+
+
+def conditional_response(
+    request: Request, response: Response, db: Session = Depends(get_read_db)
+) -> DataVersion:
+    """読み取り系エンドポイント用の依存関係
+
+    ETag / Last-Modified / Cache-Control を付与し、クライアントのキャッシュが有効なら304を返す。
+    """
+    version = get_data_version(db)
+    cache = cache_control(version, datetime.now(timezone.utc))
+
+    if version.in_progress:
+        response.headers["Cache-Control"] = cache
+        return version
+
+    headers = {"ETag": compute_etag(version, request), "Cache-Control": cache}
+    if version.updated_at is not None:
+        headers["Last-Modified"] = format_datetime(
+            version.updated_at.replace(tzinfo=timezone.utc), usegmt=True
+        )
+
+    if_none_match = request.headers.get("if-none-match")
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_none_match is not None:
+        not_modified = _etag_matches(headers["ETag"], if_none_match)
+    elif if_modified_since is not None and version.updated_at is not None:
+        not_modified = _not_modified_since(version.updated_at, if_modified_since)
+    else:
+        not_modified = False
+
+    if not_modified:
+        raise HTTPException(status_code=304, headers=headers)
+
+    response.headers.update(headers)
+    return version
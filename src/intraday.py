@@ -0,0 +1,313 @@
+"""分足（1分足・5分足）の取り込み・保存・読み出し
+
+流動性の高い一部の銘柄（INTRADAY_CODES）の分足を yfinance から取得して intraday_bars に保存する。
+日足の数百倍の行数になるため、日足（StockDownloader）とは別の経路で書き込む:
+
+- 列は最小限にし、価格は PRICE_SCALE 倍の整数、時刻は9:00（JST）からの経過分（smallint）で持つ
+- ORMを通さず、COPY で一時テーブルに流し込んでから INSERT ... ON CONFLICT で反映する
+- trade_date の月単位でパーティション化し、保持期間を過ぎた月はパーティションごと削除する
+
+yfinance で取得できるのは1分足が直近7日、5分足が直近60日まで。
+APIは読み出し（iter_bars）しか使わないため、pandas・NumPy・yfinanceは使用時にimportする。
+"""
+
+import io
+import logging
+import re
+import time
+from collections.abc import Iterator
+from datetime import date, datetime, timedelta
+from typing import TYPE_CHECKING
+
+from sqlalchemy import select, text
+from sqlalchemy.orm import Session
+
+from src.models import IntradayBar
+from src.trading_calendar import JST
+
+if TYPE_CHECKING:
+    import numpy as np
+    import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+PARENT_TABLE = "intraday_bars"
+
+# 価格の保存倍率（0.1円単位の整数で持つ）
+PRICE_SCALE = 10
+
+# 足種別 → 足の長さ（分）
+INTERVALS = {"1m": 1, "5m": 5}
+
+# yfinance で取得できる期間（日）
+MAX_PERIOD_DAYS = {"1m": 7, "5m": 60}
+
+# 前場の開始時刻（9:00）の0時からの経過分
+SESSION_OPEN_MINUTE = 9 * 60
+
+COLUMNS = ("code", "interval", "trade_date", "minute", "open", "high", "low", "close", "volume")
+
+PRICE_FIELDS = ("Open", "High", "Low", "Close")
+
+
+def to_ticks(prices: "np.ndarray") -> "np.ndarray":
+    """円 → 保存用の整数"""
+    import numpy as np
+
+    ticks: np.ndarray = np.rint(prices * PRICE_SCALE).astype(np.int32)
+    return ticks
+
+
+def from_ticks(ticks: int) -> float:
+    """保存用の整数 → 円"""
+    return ticks / PRICE_SCALE
+
+
+def bar_time(trade_date: date, minute: int) -> datetime:
+    """trade_date と9:00からの経過分 → 足の開始時刻（JST）"""
+    start = datetime(trade_date.year, trade_date.month, trade_date.day, tzinfo=JST)
+    return start + timedelta(minutes=SESSION_OPEN_MINUTE + minute)
+
+
+def bar_frame(
+    data: "pd.DataFrame", ticker_to_code: dict[str, str], interval: str
+) -> "pd.DataFrame":
+    """yf.download の分足を intraday_bars の列の縦持ちに変換する（四本値に欠損のある足は除く）"""
+    import numpy as np
+    import pandas as pd
+
+    frames = []
+    for ticker, code in ticker_to_code.items():
+        if len(ticker_to_code) == 1 and not isinstance(data.columns, pd.MultiIndex):
+            ticker_data = data
+        elif ticker in data.columns.get_level_values(0):
+            ticker_data = data[ticker]
+        else:
+            continue
+        if not all(field in ticker_data for field in PRICE_FIELDS):
+            continue
+
+        prices = ticker_data[list(PRICE_FIELDS)].to_numpy(dtype=np.float64, na_value=np.nan)
+        present = ~np.isnan(prices).any(axis=1)
+        if not present.any():
+            continue
+        index = pd.DatetimeIndex(ticker_data.index[present])
+        index = index.tz_convert(JST) if index.tz is not None else index.tz_localize(JST)
+        ticks = to_ticks(prices[present])
+        volume = (
+            ticker_data["Volume"]
+            if "Volume" in ticker_data
+            else pd.Series(0, index=ticker_data.index)
+        )
+        frames.append(
+            pd.DataFrame(
+                {
+                    "code": code,
+                    "interval": INTERVALS[interval],
+                    "trade_date": index.date,
+                    "minute": (index.hour * 60 + index.minute - SESSION_OPEN_MINUTE).to_numpy(
+                        dtype=np.int16
+                    ),
+                    "open": ticks[:, 0],
+                    "high": ticks[:, 1],
+                    "low": ticks[:, 2],
+                    "close": ticks[:, 3],
+                    "volume": volume.to_numpy(dtype=np.float64, na_value=0)[present].astype(
+                        np.int64
+                    ),
+                }
+            )
+        )
+    if not frames:
+        return pd.DataFrame(columns=COLUMNS)
+    return pd.concat(frames, ignore_index=True)
+
+
+def partition_name(month: date) -> str:
+    """月に対応するパーティション名"""
+    return f"{PARENT_TABLE}_m{month:%Y%m}"
+
+
+def _next_month(month: date) -> date:
+    return date(month.year + month.month // 12, month.month % 12 + 1, 1)
+
+
+def ensure_partitions(db: Session, start_date: date, end_date: date) -> list[str]:
+    """期間をカバーする月のパーティションを作成する（既存のものはそのまま）"""
+    names = []
+    month = start_date.replace(day=1)
+    while month <= end_date:
+        name = partition_name(month)
+        db.execute(
+            text(
+                f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {PARENT_TABLE} "
+                f"FOR VALUES FROM ('{month}') TO ('{_next_month(month)}')"
+            )
+        )
+        names.append(name)
+        month = _next_month(month)
+    db.commit()
+    return names
+
+
+def drop_expired_partitions(
+    db: Session, retention_days: int, today: date | None = None
+) -> list[str]:
+    """保持期間より前の月のパーティションを削除する
+
+    DELETEと違いVACUUMの対象となる不要行を残さない。月の途中で保持期間が切れる場合、
+    その月は月末まで残る。
+    """
+    cutoff = (today or date.today()) - timedelta(days=retention_days)
+    names = db.scalars(
+        text(
+            """
+            SELECT c.relname
+            FROM pg_inherits i
+            JOIN pg_class c ON c.oid = i.inhrelid
+            WHERE i.inhparent = CAST(:parent AS regclass)
+            ORDER BY c.relname
+            """
+        ),
+        {"parent": PARENT_TABLE},
+    ).all()
+
+    dropped = []
+    for name in names:
+        match = re.fullmatch(rf"{PARENT_TABLE}_m(\d{{4}})(\d{{2}})", name)
+        if not match:
+            continue
+        month = date(int(match.group(1)), int(match.group(2)), 1)
+        if _next_month(month) <= cutoff:
+            db.execute(text(f"DROP TABLE {name}"))
+            dropped.append(name)
+    db.commit()
+    for name in dropped:
+        logger.info(f"Dropped intraday partition {name}")
+    return dropped
+
+
+def copy_bars(db: Session, frame: "pd.DataFrame") -> int:
+    """分足を COPY で一時テーブルに流し込み、intraday_bars に反映する（同じ足は上書き）"""
+    if frame.empty:
+        return 0
+    ensure_partitions(db, min(frame["trade_date"]), max(frame["trade_date"]))
+
+    buffer = io.StringIO()
+    frame.to_csv(buffer, columns=list(COLUMNS), header=False, index=False)
+    buffer.seek(0)
+
+    columns = ", ".join(COLUMNS)
+    updates = ", ".join(f"{c} = EXCLUDED.{c}" for c in ("open", "high", "low", "close", "volume"))
+    # SQLAlchemyのセッションと同じトランザクションでpsycopg2のCOPYを使う
+    cursor = db.connection().connection.cursor()
+    try:
+        cursor.execute(f"CREATE TEMP TABLE intraday_bars_load (LIKE {PARENT_TABLE}) ON COMMIT DROP")
+        cursor.copy_expert(
+            f"COPY intraday_bars_load ({columns}) FROM STDIN WITH (FORMAT csv)", buffer
+        )
+        cursor.execute(
+            f"INSERT INTO {PARENT_TABLE} ({columns}) "
+            f"SELECT {columns} FROM intraday_bars_load "
+            f"ON CONFLICT (code, interval, trade_date, minute) DO UPDATE SET {updates}"
+        )
+        rows = cursor.rowcount
+    finally:
+        cursor.close()
+    db.commit()
+    return rows
+
+
+def download_intraday(
+    db: Session,
+    codes: list[str],
+    interval: str,
+    days: int | None = None,
+    batch_size: int = 50,
+) -> int:
+    """分足をダウンロードして保存する
+
+    Args:
+        codes: 銘柄コード
+        interval: 足種別（1m / 5m）
+        days: 取得する日数（省略時は yfinance で取得できる最大の日数）
+
+    Returns:
+        保存した足の数
+    """
+    if interval not in INTERVALS:
+        raise ValueError(f"Invalid interval: {interval}")
+    days = min(days or MAX_PERIOD_DAYS[interval], MAX_PERIOD_DAYS[interval])
+
+    # yfinanceは読み込みが重いため実際にダウンロードする時にimportする
+    import yfinance as yf
+
+    from src.stock_list import get_yahoo_ticker
+
+    saved = 0
+    for i in range(0, len(codes), batch_size):
+        ticker_to_code = {get_yahoo_ticker(code): code for code in codes[i : i + batch_size]}
+        try:
+            start = time.perf_counter()
+            data = yf.download(
+                list(ticker_to_code),
+                period=f"{days}d",
+                interval=interval,
+                group_by="ticker",
+                auto_adjust=False,
+                prepost=False,
+                progress=False,
+            )
+            download_seconds = time.perf_counter() - start
+            if data.empty:
+                logger.warning("No intraday data downloaded")
+                continue
+
+            start = time.perf_counter()
+            rows = copy_bars(db, bar_frame(data, ticker_to_code, interval))
+            saved += rows
+            logger.info(
+                f"Saved {rows} {interval} bars for {len(ticker_to_code)} stocks "
+                f"(download {download_seconds:.1f}s, copy {time.perf_counter() - start:.1f}s)"
+            )
+        except Exception as e:
+            logger.error(f"Error downloading intraday data: {e}")
+            db.rollback()
+    return saved
+
+
+def iter_bars(
+    db: Session,
+    code: str,
+    interval: str,
+    start_date: date | None = None,
+    end_date: date | None = None,
+    chunk_size: int = 5000,
+) -> Iterator[dict]:
+    """分足を時刻順に読み出す（サーバーサイドカーソルで chunk_size 行ずつ取得する）"""
+    query = select(
+        IntradayBar.trade_date,
+        IntradayBar.minute,
+        IntradayBar.open,
+        IntradayBar.high,
+        IntradayBar.low,
+        IntradayBar.close,
+        IntradayBar.volume,
+    ).where(IntradayBar.code == code, IntradayBar.interval == INTERVALS[interval])
+    if start_date:
+        query = query.where(IntradayBar.trade_date >= start_date)
+    if end_date:
+        query = query.where(IntradayBar.trade_date <= end_date)
+    query = query.order_by(IntradayBar.trade_date, IntradayBar.minute)
+
+    for trade_date, minute, open_, high, low, close, volume in db.execute(
+        query.execution_options(yield_per=chunk_size)
+    ):
+        yield {
+            "time": bar_time(trade_date, minute).isoformat(),
+            "open": from_ticks(open_),
+            "high": from_ticks(high),
+            "low": from_ticks(low),
+            "close": from_ticks(close),
+            "volume": volume,
+        }
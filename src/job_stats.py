@@ -0,0 +1,167 @@
+"""バッチジョブのステージ別計測
+
+ジョブをステージ（入れ子可）に分けて所要時間・SQL文の数・DB時間を記録し、
+実行サマリーをJSONファイルと job_runs テーブルに保存する。
+
+    stats = JobStats("daily_download")
+    with stats.stage("download") as stage:
+        ...
+        stage.add_batch(rows=100, download_seconds=1.2)
+    stats.finish()
+"""
+
+import json
+import logging
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+
+from sqlalchemy.orm import Session
+
+from src.metrics import start_query_stats
+from src.models import JobRun
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Stage:
+    name: str
+    seconds: float = 0.0
+    queries: int = 0
+    query_seconds: float = 0.0
+    # ステージ固有の値（処理件数など）
+    values: dict = field(default_factory=dict)
+    batches: list[dict] = field(default_factory=list)
+    stages: list["Stage"] = field(default_factory=list)
+
+    def add(self, **values) -> None:
+        """処理件数などの値を記録する"""
+        self.values.update(values)
+
+    def add_batch(self, **values) -> None:
+        """バッチ単位の値を記録する"""
+        self.batches.append(values)
+
+    def to_dict(self) -> dict:
+        result = {
+            "name": self.name,
+            "seconds": round(self.seconds, 3),
+            "queries": self.queries,
+            "query_seconds": round(self.query_seconds, 3),
+            **self.values,
+        }
+        if self.batches:
+            result["batches"] = self.batches
+        if self.stages:
+            result["stages"] = [stage.to_dict() for stage in self.stages]
+        return result
+
+
+class JobStats:
+    """ジョブ1回分の計測"""
+
+    def __init__(self, job: str):
+        self.job = job
+        self.started_at = datetime.utcnow()
+        self.finished_at: datetime | None = None
+        self.status = "running"
+        self.error: str | None = None
+        self.failed_stage: str | None = None
+        self._start = time.perf_counter()
+        self._queries = start_query_stats()
+        self._root = Stage(job)
+        self._stack = [self._root]
+
+    @property
+    def current(self) -> Stage:
+        return self._stack[-1]
+
+    @contextmanager
+    def stage(self, name: str):
+        """ステージの所要時間・クエリ数を計測する（入れ子にできる）"""
+        stage = Stage(name)
+        self.current.stages.append(stage)
+        self._stack.append(stage)
+        queries, query_seconds = self._queries.count, self._queries.seconds
+        start = time.perf_counter()
+        try:
+            yield stage
+        except BaseException:
+            if self.failed_stage is None:
+                self.failed_stage = name
+            raise
+        finally:
+            stage.seconds = time.perf_counter() - start
+            stage.queries = self._queries.count - queries
+            stage.query_seconds = self._queries.seconds - query_seconds
+            self._stack.pop()
+            logger.info(
+                f"Stage {name}: {stage.seconds:.2f}s, {stage.queries} queries"
+                f" ({stage.query_seconds:.2f}s in DB)"
+            )
+
+    def finish(self, error: BaseException | None = None) -> None:
+        self.finished_at = datetime.utcnow()
+        self._root.seconds = time.perf_counter() - self._start
+        self._root.queries = self._queries.count
+        self._root.query_seconds = self._queries.seconds
+        if error is None:
+            self.status = "success"
+        else:
+            self.status = "failed"
+            self.error = f"{type(error).__name__}: {error}"
+
+    def summary(self) -> dict:
+        return {
+            "job": self.job,
+            "status": self.status,
+            "started_at": self.started_at.isoformat(),
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+            "duration_seconds": round(self._root.seconds, 3),
+            "queries": self._root.queries,
+            "query_seconds": round(self._root.query_seconds, 3),
+            "error": self.error,
+            "failed_stage": self.failed_stage,
+            "stages": [stage.to_dict() for stage in self._root.stages],
+        }
+
+    def write_summary(self, directory: str | Path) -> Path:
+        """サマリーをJSONファイルに書き出す"""
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        path = directory / f"{self.job}_{self.started_at:%Y%m%dT%H%M%S}.json"
+        path.write_text(json.dumps(self.summary(), indent=2, ensure_ascii=False))
+        return path
+
+    def save(self, db: Session) -> None:
+        """サマリーを job_runs テーブルに保存する"""
+        summary = self.summary()
+        db.add(
+            JobRun(
+                job=self.job,
+                status=self.status,
+                started_at=self.started_at,
+                finished_at=self.finished_at or datetime.utcnow(),
+                duration_seconds=summary["duration_seconds"],
+                summary=summary,
+                error=self.error,
+            )
+        )
+        db.commit()
+
+    def record(self, db: Session, directory: str | Path | None) -> None:
+        """サマリーをファイルとテーブルに保存する（失敗してもジョブは失敗させない）"""
+        if directory:
+            try:
+                path = self.write_summary(directory)
+                logger.info(f"Job summary written to {path}")
+            except OSError as e:
+                logger.warning(f"Failed to write job summary: {e}")
+        try:
+            self.save(db)
+        except Exception as e:
+            db.rollback()
+            logger.warning(f"Failed to save job run: {e}")
@@ -0,0 +1,173 @@
+"""取り込みジョブの実行ジャーナル（バッチ単位のチェックポイント）
+
+download_stock_prices のバッチごとに銘柄コード・状態・保存行数を ingestion_batches に記録する。
+ジョブが途中で落ちても（OOM・DB再起動・レート制限など）、--resume を付けて実行すれば
+完了済みのバッチを飛ばし、失敗・未処理のバッチだけを中断した実行と同じ期間で取得し直す。
+
+保存はupsertのため、途中まで書き込まれたバッチを再実行しても重複しない。
+異常終了した実行は status が running のまま残る（finished_at が空）。
+"""
+
+import logging
+from datetime import date, datetime, time
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from src.models import IngestionBatch, IngestionRun
+from src.stock_list import StockInfo
+
+logger = logging.getLogger(__name__)
+
+# --resume で再開の対象にする実行の状態
+RESUMABLE_STATUSES = ("running", "failed")
+
+
+def _to_datetime(day: date) -> datetime:
+    return datetime.combine(day, time())
+
+
+class IngestionJournal:
+    """取り込みジョブ1回分のジャーナル"""
+
+    def __init__(self, db: Session, job: str, resume: bool = False):
+        self.db = db
+        self.job = job
+        self.run: IngestionRun | None = None
+        self.batches: list[IngestionBatch] = []
+        self.resumed = False
+        if resume:
+            self._load_unfinished()
+
+    @property
+    def start_date(self) -> datetime:
+        assert self.run is not None
+        return _to_datetime(self.run.start_date)
+
+    @property
+    def end_date(self) -> datetime:
+        assert self.run is not None
+        return _to_datetime(self.run.end_date)
+
+    def _load_unfinished(self) -> None:
+        run = self.db.scalar(
+            select(IngestionRun)
+            .where(IngestionRun.job == self.job)
+            .order_by(IngestionRun.started_at.desc())
+            .limit(1)
+        )
+        if run is None or run.status not in RESUMABLE_STATUSES:
+            logger.info(f"No unfinished {self.job} run to resume; starting a new run")
+            return
+
+        self.run = run
+        self.resumed = True
+        self.batches = list(
+            self.db.scalars(
+                select(IngestionBatch)
+                .where(IngestionBatch.run_id == run.id)
+                .order_by(IngestionBatch.batch_no)
+            )
+        )
+        run.status = "running"
+        run.finished_at = None
+        self.db.commit()
+        done = sum(batch.status == "done" for batch in self.batches)
+        logger.info(
+            f"Resuming {self.job} run {run.id} ({run.start_date} to {run.end_date}):"
+            f" {done}/{len(self.batches)} batches already done"
+        )
+
+    def plan(
+        self,
+        stock_list: list[StockInfo],
+        batch_size: int,
+        start_date: datetime,
+        end_date: datetime,
+    ) -> list[tuple[IngestionBatch, list[StockInfo]]]:
+        """未完了のバッチとその銘柄の一覧を返す
+
+        新しい実行ではバッチを分割して記録する。再開時は記録済みのバッチ・期間を使い、
+        start_date / end_date は無視する（self.start_date / self.end_date を参照）。
+        """
+        if not self.resumed:
+            self._create_run(stock_list, batch_size, start_date, end_date)
+
+        stocks = {stock.code: stock for stock in stock_list}
+        pending = []
+        for batch in self.batches:
+            if batch.status == "done":
+                continue
+            # 銘柄リストから外れた銘柄は銘柄マスタの情報が無いので取得しない
+            batch_stocks = [stocks[code] for code in batch.codes if code in stocks]
+            if len(batch_stocks) < len(batch.codes):
+                logger.warning(
+                    f"Batch {batch.batch_no}: {len(batch.codes) - len(batch_stocks)}"
+                    " codes are no longer in the stock list"
+                )
+            pending.append((batch, batch_stocks))
+        return pending
+
+    def _create_run(
+        self,
+        stock_list: list[StockInfo],
+        batch_size: int,
+        start_date: datetime,
+        end_date: datetime,
+    ) -> None:
+        now = datetime.utcnow()
+        self.run = IngestionRun(
+            job=self.job,
+            start_date=start_date.date(),
+            end_date=end_date.date(),
+            status="running",
+            started_at=now,
+        )
+        self.db.add(self.run)
+        self.db.flush()
+        self.batches = [
+            IngestionBatch(
+                run_id=self.run.id,
+                batch_no=batch_no,
+                codes=[stock.code for stock in stock_list[i : i + batch_size]],
+                status="pending",
+                rows=0,
+                attempts=0,
+                updated_at=now,
+            )
+            for batch_no, i in enumerate(range(0, len(stock_list), batch_size))
+        ]
+        self.db.add_all(self.batches)
+        self.db.commit()
+
+    def begin(self, batch: IngestionBatch) -> None:
+        batch.status = "running"
+        batch.attempts += 1
+        batch.updated_at = datetime.utcnow()
+        self.db.commit()
+
+    def complete(self, batch: IngestionBatch, rows: int) -> None:
+        batch.status = "done"
+        batch.rows = rows
+        batch.error = None
+        batch.updated_at = datetime.utcnow()
+        self.db.commit()
+
+    def fail(self, batch: IngestionBatch, error: str) -> None:
+        batch.status = "failed"
+        batch.error = error
+        batch.updated_at = datetime.utcnow()
+        self.db.commit()
+
+    def finish(self) -> None:
+        """全バッチが完了していれば completed、失敗が残っていれば failed にする"""
+        assert self.run is not None
+        failed = [batch.batch_no for batch in self.batches if batch.status != "done"]
+        self.run.status = "failed" if failed else "completed"
+        self.run.finished_at = datetime.utcnow()
+        self.db.commit()
+        if failed:
+            logger.warning(
+                f"{self.job} run {self.run.id}: {len(failed)} batches failed"
+                f" (rerun with --resume to retry them)"
+            )
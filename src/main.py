@@ -1,13 +1,21 @@
 """メインエントリーポイント"""
 
+import argparse
 import logging
 import sys
-from datetime import datetime
+import urllib.request
+from datetime import timedelta
+from pathlib import Path
+
+from sqlalchemy import text
 
 from src.config import config
-from src.database import SessionLocal
-from src.downloader import StockDownloader
-from src.stock_list import get_stock_list
+from src.database import SessionLocal, advisory_lock
+from src.freshness import INGESTION_LOCK_KEY, begin_ingestion, end_ingestion
+from src.job_stats import JobStats
+from src.profiling import profile
+from src.resample import refresh_all_bars
+from src.scheduler import Scheduler
 
 # ログ設定
 logging.basicConfig(
@@ -20,40 +28,186 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
-def daily_download_job():
-    """日次株価ダウンロードジョブ（当日分のみ）"""
+def daily_download_job(resume: bool = False) -> bool:
+    """日次株価ダウンロードジョブ（当日分のみ）
+
+    Args:
+        resume: 中断した実行があれば、完了済みのバッチを飛ばして再開する
+
+    Returns:
+        実行した場合True（他のプロセスが実行中でスキップした場合False）
+    """
+    with advisory_lock(INGESTION_LOCK_KEY) as acquired:
+        if not acquired:
+            logger.warning("Another ingestion job is running; skipping")
+            return False
+        _daily_download_job(resume)
+        return True
+
+
+def _daily_download_job(resume: bool) -> None:
     logger.info("Starting daily stock price download job")
-    start_time = datetime.now()
+    stats = JobStats("daily_download")
+    profile_output = Path(config.job_summary_dir or ".") / (
+        f"{stats.job}_{stats.started_at:%Y%m%dT%H%M%S}"
+    )
 
     db = SessionLocal()
+    error = None
     try:
-        downloader = StockDownloader(db, batch_size=config.download_batch_size)
+        with profile(config.job_profile, profile_output, config.job_profile_interval):
+            _run_daily_download(db, stats, resume)
+    except Exception as e:
+        error = e
+        logger.error(f"Error in daily download job: {e}", exc_info=True)
+        raise
+    finally:
+        end_ingestion(db)
+        stats.finish(error)
+        stats.record(db, config.job_summary_dir)
+        db.close()
+
+
+def _run_daily_download(db, stats: JobStats, resume: bool) -> None:
+    # pandas・yfinance等の重いモジュールは --trigger / --status では不要なので実行時にimportする
+    from src.analytics import export_parquet
+    from src.columnar import ColumnarStore, sync_store
+    from src.downloader import StockDownloader
+    from src.journal import IngestionJournal
+    from src.market_stats import refresh_market_stats
+    from src.stock_list import get_stock_list
 
+    begin_ingestion(db)
+    downloader = StockDownloader(
+        db,
+        batch_size=config.download_batch_size,
+        detect_corporate_actions=config.detect_corporate_actions,
+    )
+
+    with stats.stage("stock_list") as stage:
         stock_list = get_stock_list()
-        logger.info(f"Downloading daily prices for {len(stock_list)} stocks")
+        stage.add(stocks=len(stock_list))
+    logger.info(f"Downloading daily prices for {len(stock_list)} stocks")
+
+    with stats.stage("download") as stage:
+        journal = IngestionJournal(db, stats.job, resume=resume)
+        saved_count = downloader.download_daily_prices(stock_list, journal=journal)
+        stage.add(
+            rows=saved_count,
+            run_id=journal.run.id if journal.run else None,
+            resumed=journal.resumed,
+        )
+        for batch in downloader.batch_stats:
+            stage.add_batch(**batch)
+    logger.info(f"Daily download completed: {saved_count} records saved")
 
-        saved_count = downloader.download_daily_prices(stock_list)
+    # 株式分割・配当で過去の調整済みの値が変わった銘柄は全期間を取得し直す
+    adjusted = sorted(downloader.corporate_actions)
+    if adjusted:
+        with stats.stage("corporate_actions") as stage:
+            stocks = [s for s in stock_list if s.code in downloader.corporate_actions]
+            stage.add(codes=adjusted, rows=downloader.refetch_history(stocks))
 
-        elapsed = datetime.now() - start_time
-        logger.info(f"Daily download completed: {saved_count} records saved in {elapsed}")
+    # 列指向ストアを同期し、指標計算の読み込み元にする
+    if config.columnar_store_dir:
+        with stats.stage("columnar_sync") as stage:
+            stage.add(rows=sync_store(db, config.columnar_store_dir, full_codes=adjusted))
+            downloader.store = ColumnarStore(config.columnar_store_dir)
 
-        # テクニカル指標を更新（直近5日分のみ）
-        logger.info("Updating technical indicators")
-        stock_codes = [s.code for s in stock_list]
+    # テクニカル指標を更新（直近5日分のみ、取得し直した銘柄は全期間）
+    logger.info("Updating technical indicators")
+    with stats.stage("indicators") as stage:
+        stock_codes = [s.code for s in stock_list if s.code not in downloader.corporate_actions]
         updated_count = downloader.update_all_indicators(stock_codes, limit_days=5)
-        logger.info(f"Technical indicators updated: {updated_count} records")
+        updated_count += downloader.update_all_indicators(adjusted, limit_days=0)
+        stage.add(rows=updated_count)
+    logger.info(f"Technical indicators updated: {updated_count} records")
+
+    # 取り込んだ日付の市場全体・業種別・市場区分別の集計を作り直す（20日線を使うため指標の後）
+    with stats.stage("market_stats") as stage:
+        start, end = journal.start_date.date(), journal.end_date.date() - timedelta(days=1)
+        stage.add(
+            start=start.isoformat(), end=end.isoformat(), rows=refresh_market_stats(db, start, end)
+        )
+
+    # 新たに確定した週足・月足をキャッシュ（取得し直した銘柄は全期間を再集計）
+    with stats.stage("bars") as stage:
+        bar_count = refresh_all_bars(db)
+        if adjusted:
+            bar_count += refresh_all_bars(db, codes=adjusted)
+        stage.add(rows=bar_count)
+    logger.info(f"Weekly/monthly bars cached: {bar_count} bars")
 
+    # 分析用のParquetを書き出す（重い横断クエリはDuckDBで実行）
+    # 過去の値が変わった銘柄は、過去の日付のファイルでもその銘柄の行だけを差し替える
+    if config.analytics_dir:
+        with stats.stage("analytics_export") as stage:
+            stage.add(days=export_parquet(db, config.analytics_dir, full_codes=adjusted))
+
+    # 分足を取り込み、保持期間を過ぎた月を削除する（対象銘柄を設定した場合のみ）
+    intraday_codes = [c.strip() for c in config.intraday_codes.split(",") if c.strip()]
+    if intraday_codes:
+        from src.intraday import download_intraday, drop_expired_partitions
+
+        with stats.stage("intraday") as stage:
+            rows = {}
+            for interval in [i.strip() for i in config.intraday_intervals.split(",") if i.strip()]:
+                rows[interval] = download_intraday(
+                    db, intraday_codes, interval, batch_size=config.download_batch_size
+                )
+            dropped = drop_expired_partitions(db, config.intraday_retention_days)
+            stage.add(codes=len(intraday_codes), rows=rows, dropped=dropped)
+
+
+def run_daemon() -> None:
+    """常駐して東証の営業日ごとに日次ジョブを実行する"""
+    from src.stock_list import get_stock_list
+
+    # 初回実行前にコネクションと銘柄リストのキャッシュを温めておく
+    with SessionLocal() as db:
+        db.execute(text("SELECT 1"))
+    try:
+        get_stock_list()
     except Exception as e:
-        logger.error(f"Error in daily download job: {e}", exc_info=True)
-        raise
-    finally:
-        db.close()
+        logger.warning(f"Failed to preload stock list: {e}")
+
+    scheduler = Scheduler(daily_download_job, "daily_download", config.ingest_schedule_jst)
+    scheduler.serve(config.scheduler_host, config.scheduler_port)
+    scheduler.run_forever()
+
+
+def request_daemon(path: str, method: str) -> None:
+    """常駐中のスケジューラのHTTPに要求を送り、応答を表示する"""
+    url = f"http://{config.scheduler_host}:{config.scheduler_port}{path}"
+    with urllib.request.urlopen(urllib.request.Request(url, method=method), timeout=10) as res:
+        sys.stdout.write(res.read().decode() + "\n")
 
 
 def main():
-    """メイン関数 - 日次ダウンロードを1回実行"""
+    """メイン関数 - 日次ダウンロードを1回実行（--daemon で常駐）"""
+    parser = argparse.ArgumentParser(description="日本株の日次ダウンロード")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--daemon", action="store_true", help="常駐して営業日ごとに実行する")
+    mode.add_argument("--trigger", action="store_true", help="常駐中のスケジューラで今すぐ実行する")
+    mode.add_argument("--status", action="store_true", help="常駐中のスケジューラの状態を表示する")
+    parser.add_argument(
+        "--resume", action="store_true", help="中断した実行を完了済みのバッチを飛ばして再開する"
+    )
+    args = parser.parse_args()
+
+    if args.trigger:
+        request_daemon("/trigger", "POST")
+        return
+    if args.status:
+        request_daemon("/status", "GET")
+        return
+    if args.daemon:
+        logger.info("Stock Downloader daemon started")
+        run_daemon()
+        return
+
     logger.info("Stock Downloader started")
-    daily_download_job()
+    daily_download_job(resume=args.resume)
     logger.info("Stock Downloader finished")
 
 
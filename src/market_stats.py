@@ -0,0 +1,191 @@
+"""日ごとの市場全体・業種別・市場区分別の集計（market_daily_stats）
+
+騰落数・20日高値安値の更新数・20日移動平均を上回る銘柄数・平均リターンを、
+stock_prices と stocks を結合した1回の集計（GROUPING SETS）で全体・業種別・市場区分別に求める。
+日次ジョブは取り込んだ日付だけを集計し直し、APIはこのテーブルを読むだけにする。
+
+騰落・新高値安値・平均リターンは調整後終値（無ければ終値）を基準に比較する。高値・安値は
+その日の終値に対する調整比率を掛けて同じ基準に揃える。生の値で比べると、株式分割・配当の
+権利落ち日に値下がり・新安値として数えてしまう。20日線（ma20）は終値から計算しているため、
+20日線との比較だけは終値で行う。
+
+株式分割・配当で変わるのは権利落ち日より前の調整後の値が一律の比率で調整されることだけなので、
+過去の日の前日比・20日高値安値との比較・リターンは（値の丸めで同値の判定が変わる場合を除き）
+変わらない。そのため取り込んだ日付以外は集計し直さない。
+"""
+
+import logging
+from datetime import date, timedelta
+
+from sqlalchemy import Float, and_, case, delete, func, or_, select, tuple_
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from src.models import MarketDailyStat, Stock, StockPrice
+
+logger = logging.getLogger(__name__)
+
+SCOPES = ("all", "sector", "market")
+
+# 新高値・新安値の判定期間（営業日、当日を含む）
+HIGH_LOW_WINDOW = 20
+
+# 判定期間の前日までの値を読むための遡り日数（暦日、連休を考慮）
+LOOKBACK_DAYS = 40
+
+STAT_COLUMNS = (
+    "trade_date",
+    "scope",
+    "scope_value",
+    "codes",
+    "advancers",
+    "decliners",
+    "unchanged",
+    "new_highs",
+    "new_lows",
+    "above_ma20",
+    "ma20_codes",
+    "average_return",
+)
+
+
+def stats_select(start_date: date, end_date: date):
+    """期間の各日の集計を全体・業種別・市場区分別に返すSELECT
+
+    新高値（新安値）は、調整後の高値（安値）が前19営業日の調整後の高値（安値）を上回る
+    （下回る）銘柄。前19営業日のデータが揃っていない銘柄は数えない。
+    """
+    price = func.coalesce(StockPrice.adjusted_close, StockPrice.close)
+    # 高値・安値を調整後の基準に揃える比率（調整後終値が無ければ1）
+    ratio = price / func.nullif(StockPrice.close, 0, type_=Float)
+    high, low = StockPrice.high * ratio, StockPrice.low * ratio
+    by_code, by_date = StockPrice.code, StockPrice.trade_date
+    prior_rows = (-(HIGH_LOW_WINDOW - 1), -1)
+    previous_price = func.lag(price).over(partition_by=by_code, order_by=by_date)
+    base = (
+        select(
+            StockPrice.trade_date,
+            StockPrice.close,
+            high.label("high"),
+            low.label("low"),
+            StockPrice.ma20,
+            Stock.sector,
+            Stock.market,
+            (price - previous_price).label("change"),
+            (price / func.nullif(previous_price, 0, type_=Float) - 1).label("daily_return"),
+            func.max(high)
+            .over(partition_by=by_code, order_by=by_date, rows=prior_rows)
+            .label("prior_high"),
+            func.min(low)
+            .over(partition_by=by_code, order_by=by_date, rows=prior_rows)
+            .label("prior_low"),
+            func.count()
+            .over(partition_by=by_code, order_by=by_date, rows=prior_rows)
+            .label("prior_days"),
+        )
+        .join(Stock, Stock.code == StockPrice.code)
+        .where(
+            StockPrice.trade_date >= start_date - timedelta(days=LOOKBACK_DAYS),
+            StockPrice.trade_date <= end_date,
+        )
+        .subquery()
+    )
+
+    by_sector = func.grouping(base.c.sector) == 0
+    by_market = func.grouping(base.c.market) == 0
+    full_window = base.c.prior_days == HIGH_LOW_WINDOW - 1
+    return (
+        select(
+            base.c.trade_date,
+            case((by_sector, "sector"), (by_market, "market"), else_="all").label("scope"),
+            func.coalesce(base.c.sector, base.c.market, "").label("scope_value"),
+            func.count().label("codes"),
+            func.count().filter(base.c.change > 0).label("advancers"),
+            func.count().filter(base.c.change < 0).label("decliners"),
+            func.count().filter(base.c.change == 0).label("unchanged"),
+            func.count().filter(full_window & (base.c.high > base.c.prior_high)).label("new_highs"),
+            func.count().filter(full_window & (base.c.low < base.c.prior_low)).label("new_lows"),
+            func.count().filter(base.c.close > base.c.ma20).label("above_ma20"),
+            func.count(base.c.ma20).label("ma20_codes"),
+            func.avg(base.c.daily_return).label("average_return"),
+        )
+        .where(base.c.trade_date >= start_date, base.c.close.isnot(None))
+        .group_by(
+            func.grouping_sets(
+                tuple_(base.c.trade_date),
+                tuple_(base.c.trade_date, base.c.sector),
+                tuple_(base.c.trade_date, base.c.market),
+            )
+        )
+        # 業種・市場区分が未設定の銘柄のグループは除く（全体には含める）
+        .having(
+            or_(
+                and_(by_sector, base.c.sector.isnot(None)),
+                and_(by_market, base.c.market.isnot(None)),
+                and_(~by_sector, ~by_market),
+            )
+        )
+    )
+
+
+def refresh_market_stats(db: Session, start_date: date, end_date: date) -> int:
+    """期間（両端を含む）の集計を作り直す
+
+    Returns:
+        書き込んだ行数
+    """
+    # 銘柄が無くなったグループの行が残らないように、期間の行を消してから書き込む
+    db.execute(
+        delete(MarketDailyStat).where(
+            MarketDailyStat.trade_date >= start_date, MarketDailyStat.trade_date <= end_date
+        )
+    )
+    stats = stats_select(start_date, end_date).subquery()
+    stmt = insert(MarketDailyStat).from_select(list(STAT_COLUMNS), select(*stats.c))
+    stmt = stmt.on_conflict_do_update(
+        constraint="uq_market_daily_stat",
+        set_={
+            **{column: getattr(stmt.excluded, column) for column in STAT_COLUMNS[3:]},
+            "updated_at": func.now(),
+        },
+    )
+    # Connection.execute は CursorResult を返すため rowcount を型付きで読める
+    result = db.connection().execute(stmt)
+    db.commit()
+
+    logger.info(f"Refreshed {result.rowcount} market stats ({start_date} - {end_date})")
+    return result.rowcount
+
+
+def refresh_market_stats_by_year(db: Session, start_date: date, end_date: date) -> int:
+    """長い期間の集計を年単位（stock_prices のパーティション単位）に分けて作り直す
+
+    一括取得（バックフィル）で書き直した期間に使う。1回の集計が大きくなりすぎないようにする。
+    """
+    total = 0
+    for year in range(start_date.year, end_date.year + 1):
+        total += refresh_market_stats(
+            db, max(start_date, date(year, 1, 1)), min(end_date, date(year, 12, 31))
+        )
+    return total
+
+
+def get_market_stats(
+    db: Session,
+    scope: str = "all",
+    scope_value: str | None = None,
+    start_date: date | None = None,
+    end_date: date | None = None,
+) -> list[MarketDailyStat]:
+    """集計を日付順に取得する（scope_value を省略するとそのscopeの全グループ）"""
+    if scope not in SCOPES:
+        raise ValueError(f"Invalid scope: {scope}")
+    query = select(MarketDailyStat).where(MarketDailyStat.scope == scope)
+    if scope_value is not None:
+        query = query.where(MarketDailyStat.scope_value == scope_value)
+    if start_date:
+        query = query.where(MarketDailyStat.trade_date >= start_date)
+    if end_date:
+        query = query.where(MarketDailyStat.trade_date <= end_date)
+    query = query.order_by(MarketDailyStat.trade_date, MarketDailyStat.scope_value)
+    return list(db.scalars(query))
@@ -0,0 +1,199 @@
+"""APIのレイテンシ・DBクエリ時間・コネクションプールの計測（Prometheus形式）
+
+- HTTPミドルウェアでルート別のレイテンシとステータス数を記録
+- SQLAlchemyのイベントでクエリ数・クエリ時間を記録（リクエスト単位でも集計）
+- QueuePoolのチェックアウト待ち時間とプールの使用状況を記録
+- 遅いクエリはサンプリングしてログに出力
+
+uvicornをマルチワーカーで動かす場合は環境変数 PROMETHEUS_MULTIPROC_DIR を設定すると
+全ワーカー分を集約して返す。プールのゲージは集約できないため、スクレイプを受けた
+ワーカー自身の値を engine ラベル付きでそのまま返す。
+"""
+
+import logging
+import os
+import random
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from prometheus_client.core import GaugeMetricFamily
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import QueuePool
+from starlette.requests import Request
+from starlette.responses import Response
+
+from src.config import config
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 500)
+
+REQUEST_LATENCY = Histogram(
+    "api_request_duration_seconds",
+    "APIリクエストの処理時間",
+    ["method", "route"],
+    buckets=LATENCY_BUCKETS,
+)
+REQUEST_COUNT = Counter(
+    "api_requests_total",
+    "APIリクエスト数",
+    ["method", "route", "status"],
+)
+REQUEST_DB_QUERIES = Histogram(
+    "api_request_db_queries",
+    "1リクエストあたりのDBクエリ数",
+    ["route"],
+    buckets=QUERY_COUNT_BUCKETS,
+)
+REQUEST_DB_TIME = Histogram(
+    "api_request_db_duration_seconds",
+    "1リクエストあたりのDBクエリ時間の合計",
+    ["route"],
+    buckets=LATENCY_BUCKETS,
+)
+QUERY_DURATION = Histogram(
+    "db_query_duration_seconds",
+    "DBクエリの実行時間",
+    buckets=LATENCY_BUCKETS,
+)
+POOL_CHECKOUT_WAIT = Histogram(
+    "db_pool_checkout_wait_seconds",
+    "コネクションプールからの取得待ち時間",
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0),
+)
+
+
+@dataclass
+class QueryStats:
+    """処理単位（リクエスト・ジョブのステージ等）のクエリ集計"""
+
+    count: int = 0
+    seconds: float = 0.0
+
+
+_query_stats: ContextVar[QueryStats | None] = ContextVar("query_stats", default=None)
+
+
+def start_query_stats() -> QueryStats:
+    """現在のコンテキストでクエリ集計を開始する"""
+    stats = QueryStats()
+    _query_stats.set(stats)
+    return stats
+
+
+def current_query_stats() -> QueryStats | None:
+    """現在のコンテキストで集計中のクエリ数（未開始ならNone）"""
+    return _query_stats.get()
+
+
+class InstrumentedQueuePool(QueuePool):
+    """チェックアウト待ち時間を計測するQueuePool"""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            POOL_CHECKOUT_WAIT.observe(time.perf_counter() - start)
+
+
+class _PoolCollector:
+    """プールの使用状況をスクレイプ時に読むコレクター（エンジンごとに engine ラベルを付ける）"""
+
+    def __init__(self):
+        self.engines: dict[str, Engine] = {}
+
+    def collect(self):
+        families = [
+            (GaugeMetricFamily(name, documentation, labels=["engine"]), read)
+            for name, documentation, read in (
+                ("db_pool_size", "プールサイズ", QueuePool.size),
+                ("db_pool_checked_out", "使用中のコネクション数", QueuePool.checkedout),
+                ("db_pool_checked_in", "待機中のコネクション数", QueuePool.checkedin),
+                ("db_pool_overflow", "オーバーフロー中のコネクション数", QueuePool.overflow),
+            )
+        ]
+        for engine_name, engine in list(self.engines.items()):
+            pool = engine.pool
+            if not isinstance(pool, QueuePool):
+                continue
+            for family, read in families:
+                family.add_metric([engine_name], read(pool))
+        for family, _ in families:
+            yield family
+
+
+_pool_collector = _PoolCollector()
+REGISTRY.register(_pool_collector)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_start_time"].pop()
+    QUERY_DURATION.observe(elapsed)
+
+    stats = _query_stats.get()
+    if stats is not None:
+        stats.count += 1
+        stats.seconds += elapsed
+
+    if (
+        config.slow_query_ms > 0
+        and elapsed * 1000 >= config.slow_query_ms
+        and random.random() < config.slow_query_sample_rate
+    ):
+        logger.warning(f"Slow query ({elapsed * 1000:.1f} ms): {statement[:2000]}")
+
+
+def instrument_engine(engine: Engine, name: str = "writer") -> None:
+    """エンジンにクエリ計測のイベントを登録し、プールの使用状況を name のラベルで公開する"""
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    _pool_collector.engines[name] = engine
+
+
+async def metrics_middleware(request: Request, call_next):
+    """ルート別のレイテンシ・ステータス・クエリ数を記録するミドルウェア"""
+    stats = start_query_stats()
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        elapsed = time.perf_counter() - start
+        route = request.scope.get("route")
+        # 未定義パスはラベルの種類が増えないようにまとめる
+        route_name = getattr(route, "path", "unmatched")
+        REQUEST_LATENCY.labels(request.method, route_name).observe(elapsed)
+        REQUEST_COUNT.labels(request.method, route_name, str(status)).inc()
+        REQUEST_DB_QUERIES.labels(route_name).observe(stats.count)
+        REQUEST_DB_TIME.labels(route_name).observe(stats.seconds)
+
+
+def metrics_response() -> Response:
+    """Prometheus形式のメトリクスを返す"""
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        # プールのゲージはプロセス内の値なので、集約用のレジストリにも載せる
+        registry.register(_pool_collector)
+    else:
+        registry = REGISTRY
+    return Response(generate_latest(registry), media_type=CONTENT_TYPE_LATEST)
@@ -1,6 +1,19 @@
 from datetime import date, datetime
 
-from sqlalchemy import BigInteger, Date, DateTime, Float, Index, String, UniqueConstraint
+from sqlalchemy import (
+    BigInteger,
+    Date,
+    DateTime,
+    Float,
+    Index,
+    Integer,
+    SmallInteger,
+    String,
+    Text,
+    UniqueConstraint,
+    func,
+)
+from sqlalchemy.dialects.postgresql import ARRAY, JSONB
 from sqlalchemy.orm import Mapped, mapped_column
 
 from src.database import Base
@@ -14,8 +27,8 @@ class Stock(Base):
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
     code: Mapped[str] = mapped_column(String(10), unique=True, nullable=False, index=True)
     name: Mapped[str] = mapped_column(String(255), nullable=False)
-    market: Mapped[str | None] = mapped_column(String(50))
-    sector: Mapped[str | None] = mapped_column(String(100))
+    market: Mapped[str | None] = mapped_column(String(50), index=True)
+    sector: Mapped[str | None] = mapped_column(String(100), index=True)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
     updated_at: Mapped[datetime] = mapped_column(
         DateTime, default=datetime.utcnow, onupdate=datetime.utcnow
@@ -23,13 +36,13 @@ class Stock(Base):
 
 
 class StockPrice(Base):
-    """株価データ"""
+    """株価データ（trade_dateの年単位でレンジパーティション化）"""
 
     __tablename__ = "stock_prices"
 
     id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
-    code: Mapped[str] = mapped_column(String(10), nullable=False, index=True)
-    trade_date: Mapped[date] = mapped_column(Date, nullable=False, index=True)
+    code: Mapped[str] = mapped_column(String(10), nullable=False)
+    trade_date: Mapped[date] = mapped_column(Date, primary_key=True)
     open: Mapped[float | None] = mapped_column(Float)
     high: Mapped[float | None] = mapped_column(Float)
     low: Mapped[float | None] = mapped_column(Float)
@@ -46,6 +59,210 @@ class StockPrice(Base):
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
 
     __table_args__ = (
+        # (code, trade_date) の検索はこの一意制約のインデックスで賄う
         UniqueConstraint("code", "trade_date", name="uq_stock_price_code_date"),
-        Index("ix_stock_prices_code_date", "code", "trade_date"),
+        Index(
+            "ix_stock_prices_trade_date_brin",
+            "trade_date",
+            postgresql_using="brin",
+            postgresql_with={"pages_per_range": 32},
+        ),
+        {"postgresql_partition_by": "RANGE (trade_date)"},
     )
+
+
+class StockPriceBar(Base):
+    """週足・月足（確定済み期間のキャッシュ）"""
+
+    __tablename__ = "stock_price_bars"
+
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
+    code: Mapped[str] = mapped_column(String(10), nullable=False)
+    interval: Mapped[str] = mapped_column(String(10), nullable=False)
+    period_start: Mapped[date] = mapped_column(Date, nullable=False)
+    open: Mapped[float | None] = mapped_column(Float)
+    high: Mapped[float | None] = mapped_column(Float)
+    low: Mapped[float | None] = mapped_column(Float)
+    close: Mapped[float | None] = mapped_column(Float)
+    volume: Mapped[int | None] = mapped_column(BigInteger)
+    trade_days: Mapped[int] = mapped_column(Integer, nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, server_default=func.now())
+
+    __table_args__ = (
+        UniqueConstraint("code", "interval", "period_start", name="uq_stock_price_bar"),
+    )
+
+
+class MarketDailyStat(Base):
+    """日ごとの市場全体・業種別・市場区分別の騰落などの集計（src.market_stats）"""
+
+    __tablename__ = "market_daily_stats"
+
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
+    # all / sector / market
+    scope: Mapped[str] = mapped_column(String(10), nullable=False)
+    # 業種・市場区分（scope=all は空文字）
+    scope_value: Mapped[str] = mapped_column(String(100), nullable=False)
+    trade_date: Mapped[date] = mapped_column(Date, nullable=False)
+    # 終値のある銘柄数
+    codes: Mapped[int] = mapped_column(Integer, nullable=False)
+    advancers: Mapped[int] = mapped_column(Integer, nullable=False)
+    decliners: Mapped[int] = mapped_column(Integer, nullable=False)
+    unchanged: Mapped[int] = mapped_column(Integer, nullable=False)
+    # 20日高値・安値の更新銘柄数
+    new_highs: Mapped[int] = mapped_column(Integer, nullable=False)
+    new_lows: Mapped[int] = mapped_column(Integer, nullable=False)
+    # 終値が20日移動平均を上回る銘柄数と、20日移動平均のある銘柄数
+    above_ma20: Mapped[int] = mapped_column(Integer, nullable=False)
+    ma20_codes: Mapped[int] = mapped_column(Integer, nullable=False)
+    # 日次リターン（調整後終値）の単純平均
+    average_return: Mapped[float | None] = mapped_column(Float)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, server_default=func.now())
+
+    __table_args__ = (
+        UniqueConstraint("scope", "scope_value", "trade_date", name="uq_market_daily_stat"),
+    )
+
+
+class IngestionState(Base):
+    """データ更新の世代管理（1行のみ）
+
+    日次ジョブ等がデータを書き換えるたびに generation を進める。
+    APIのETag・キャッシュ制御に使用する。
+    """
+
+    __tablename__ = "ingestion_state"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    generation: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    latest_trade_date: Mapped[date | None] = mapped_column(Date)
+    started_at: Mapped[datetime | None] = mapped_column(DateTime)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+
+
+class JobRun(Base):
+    """バッチジョブの実行記録（ステージ別の所要時間・クエリ数を summary に保存）"""
+
+    __tablename__ = "job_runs"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    job: Mapped[str] = mapped_column(String(50), nullable=False)
+    status: Mapped[str] = mapped_column(String(20), nullable=False)
+    started_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    finished_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    duration_seconds: Mapped[float] = mapped_column(Float, nullable=False)
+    summary: Mapped[dict] = mapped_column(JSONB, nullable=False)
+    error: Mapped[str | None] = mapped_column(Text)
+
+    __table_args__ = (Index("ix_job_runs_job_started_at", "job", "started_at"),)
+
+
+class IngestionRun(Base):
+    """取り込みジョブの実行ジャーナル（--resume で未完了のバッチから再開する）"""
+
+    __tablename__ = "ingestion_runs"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    job: Mapped[str] = mapped_column(String(50), nullable=False)
+    # ダウンロード期間（end_date は含まない）
+    start_date: Mapped[date] = mapped_column(Date, nullable=False)
+    end_date: Mapped[date] = mapped_column(Date, nullable=False)
+    status: Mapped[str] = mapped_column(String(20), nullable=False)
+    started_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    finished_at: Mapped[datetime | None] = mapped_column(DateTime)
+
+    __table_args__ = (Index("ix_ingestion_runs_job_started_at", "job", "started_at"),)
+
+
+class IngestionBatch(Base):
+    """取り込みジョブのバッチ単位のチェックポイント"""
+
+    __tablename__ = "ingestion_batches"
+
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
+    run_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    batch_no: Mapped[int] = mapped_column(Integer, nullable=False)
+    codes: Mapped[list[str]] = mapped_column(ARRAY(String(10)), nullable=False)
+    # pending / running / done / failed
+    status: Mapped[str] = mapped_column(String(20), nullable=False)
+    rows: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    error: Mapped[str | None] = mapped_column(Text)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+
+    __table_args__ = (UniqueConstraint("run_id", "batch_no", name="uq_ingestion_batch"),)
+
+
+class WorkUnit(Base):
+    """分散取り込みの作業単位（銘柄グループ×期間）
+
+    ワーカーは SELECT ... FOR UPDATE SKIP LOCKED で取得し、leased_until までリースを持つ。
+    """
+
+    __tablename__ = "work_units"
+
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
+    queue: Mapped[str] = mapped_column(String(50), nullable=False)
+    codes: Mapped[list[str]] = mapped_column(ARRAY(String(10)), nullable=False)
+    # ダウンロード期間（end_date は含まない）
+    start_date: Mapped[date] = mapped_column(Date, nullable=False)
+    end_date: Mapped[date] = mapped_column(Date, nullable=False)
+    # pending / leased / done / failed
+    status: Mapped[str] = mapped_column(String(20), nullable=False)
+    worker: Mapped[str | None] = mapped_column(String(100))
+    leased_until: Mapped[datetime | None] = mapped_column(DateTime)
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    rows: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    error: Mapped[str | None] = mapped_column(Text)
+    created_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+
+    __table_args__ = (Index("ix_work_units_queue_status", "queue", "status"),)
+
+
+class PriceQuarantine(Base):
+    """品質チェックで疑わしいと判定し、stock_prices に書き込まなかった株価"""
+
+    __tablename__ = "price_quarantine"
+
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
+    code: Mapped[str] = mapped_column(String(10), nullable=False)
+    trade_date: Mapped[date] = mapped_column(Date, nullable=False)
+    # 理由コード（src.validation.REASONS）
+    reasons: Mapped[list[str]] = mapped_column(ARRAY(String(30)), nullable=False)
+    open: Mapped[float | None] = mapped_column(Float)
+    high: Mapped[float | None] = mapped_column(Float)
+    low: Mapped[float | None] = mapped_column(Float)
+    close: Mapped[float | None] = mapped_column(Float)
+    volume: Mapped[int | None] = mapped_column(BigInteger)
+    adjusted_close: Mapped[float | None] = mapped_column(Float)
+    detected_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint("code", "trade_date", name="uq_price_quarantine_code_date"),
+        Index("ix_price_quarantine_detected_at", "detected_at"),
+    )
+
+
+class IntradayBar(Base):
+    """分足（1分足・5分足）
+
+    件数が多いため列を絞り、価格は PRICE_SCALE 倍の整数（呼値単位）、時刻は9:00（JST）からの
+    経過分で持つ（src.intraday）。trade_date の月単位でレンジパーティション化している。
+    """
+
+    __tablename__ = "intraday_bars"
+
+    code: Mapped[str] = mapped_column(String(10), primary_key=True)
+    # 足の長さ（分）
+    interval: Mapped[int] = mapped_column(SmallInteger, primary_key=True)
+    trade_date: Mapped[date] = mapped_column(Date, primary_key=True)
+    # 9:00（JST）からの経過分
+    minute: Mapped[int] = mapped_column(SmallInteger, primary_key=True)
+    open: Mapped[int] = mapped_column(Integer, nullable=False)
+    high: Mapped[int] = mapped_column(Integer, nullable=False)
+    low: Mapped[int] = mapped_column(Integer, nullable=False)
+    close: Mapped[int] = mapped_column(Integer, nullable=False)
+    volume: Mapped[int] = mapped_column(Integer, nullable=False)
+
+    __table_args__ = ({"postgresql_partition_by": "RANGE (trade_date)"},)
@@ -0,0 +1,104 @@
+"""PostgreSQLのLISTEN/NOTIFYによるデータ更新通知
+
+日次ジョブがデータ世代を進めたトランザクションで NOTIFY を発行し、
+APIの各ワーカープロセスは専用コネクションで LISTEN して購読者（SSE接続）に配信する。
+NOTIFY はコミット時にのみ配信されるため、クライアントは確定したデータだけを取得できる。
+"""
+
+import asyncio
+import json
+import logging
+import select
+import threading
+import time
+
+import psycopg2
+import psycopg2.extensions
+from sqlalchemy import func
+from sqlalchemy import select as sql_select
+from sqlalchemy.orm import Session
+
+from src.config import config
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "prices_updated"
+
+# LISTENコネクションが切れた場合の再接続間隔（秒）
+RECONNECT_DELAY_SECONDS = 5
+POLL_TIMEOUT_SECONDS = 5
+
+
+def notify_prices_updated(db: Session, payload: dict) -> None:
+    """データ更新を通知する（呼び出し側のトランザクションのコミット時に配信される）"""
+    db.execute(sql_select(func.pg_notify(CHANNEL, json.dumps(payload, default=str))))
+
+
+class PriceUpdateListener:
+    """LISTENした通知をasyncioのキューに配信する（ワーカープロセスごとに1つ）"""
+
+    def __init__(self, dsn: str, channel: str = CHANNEL):
+        self.dsn = dsn
+        self.channel = channel
+        self._subscribers: set[tuple[asyncio.AbstractEventLoop, asyncio.Queue]] = set()
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+
+    def subscribe(self) -> asyncio.Queue:
+        """購読を開始してキューを返す（初回呼び出し時にLISTENスレッドを起動）"""
+        queue: asyncio.Queue = asyncio.Queue()
+        with self._lock:
+            self._subscribers.add((asyncio.get_running_loop(), queue))
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name="price-update-listener", daemon=True
+                )
+                self._thread.start()
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue) -> None:
+        with self._lock:
+            self._subscribers = {s for s in self._subscribers if s[1] is not queue}
+
+    def _broadcast(self, payload: dict) -> None:
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for loop, queue in subscribers:
+            try:
+                loop.call_soon_threadsafe(queue.put_nowait, payload)
+            except RuntimeError:
+                # イベントループが既に閉じている
+                self.unsubscribe(queue)
+
+    def _run(self) -> None:
+        while True:
+            conn = None
+            try:
+                conn = psycopg2.connect(self.dsn)
+                conn.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+                with conn.cursor() as cursor:
+                    cursor.execute(f"LISTEN {self.channel}")
+                logger.info(f"Listening for notifications on {self.channel}")
+
+                while True:
+                    readable, _, _ = select.select([conn], [], [], POLL_TIMEOUT_SECONDS)
+                    if not readable:
+                        continue
+                    conn.poll()
+                    while conn.notifies:
+                        notify = conn.notifies.pop(0)
+                        try:
+                            payload = json.loads(notify.payload)
+                        except ValueError:
+                            payload = {"message": notify.payload}
+                        self._broadcast(payload)
+            except Exception as e:
+                logger.warning(f"Notification listener error: {e}")
+                time.sleep(RECONNECT_DELAY_SECONDS)
+            finally:
+                if conn is not None:
+                    conn.close()
+
+
+# LISTENはスタンバイ（読み取りレプリカ）では使えないため常にプライマリに接続する
+listener = PriceUpdateListener(config.database_url)
@@ -0,0 +1,140 @@
+"""stock_prices の年単位パーティションを管理するモジュール
+
+stock_prices は trade_date の年ごとにレンジパーティション化されている（マイグレーション006）。
+取り込み前に対象期間のパーティションを作成し、古い年はVACUUM FREEZEや切り離し（アーカイブ）を
+パーティション単位で安価に行えるようにする。
+"""
+
+import logging
+from dataclasses import dataclass
+from datetime import date
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from src.database import get_engine
+
+logger = logging.getLogger(__name__)
+
+PARENT_TABLE = "stock_prices"
+
+
+@dataclass
+class PartitionInfo:
+    name: str
+    bounds: str
+    estimated_rows: int
+    total_bytes: int
+
+
+def partition_name(year: int) -> str:
+    """年に対応するパーティション名"""
+    return f"{PARENT_TABLE}_y{year}"
+
+
+def detached_name(year: int) -> str:
+    """切り離したパーティションの名前（同じ年のパーティションを作り直せるように別名にする）"""
+    return f"{partition_name(year)}_detached"
+
+
+def _attached_partitions(db: Session) -> set[str]:
+    return set(
+        db.scalars(
+            text(
+                """
+                SELECT c.relname
+                FROM pg_inherits i
+                JOIN pg_class c ON c.oid = i.inhrelid
+                WHERE i.inhparent = CAST(:parent AS regclass)
+                """
+            ),
+            {"parent": PARENT_TABLE},
+        )
+    )
+
+
+def ensure_partitions(db: Session, start_date: date, end_date: date) -> list[str]:
+    """期間をカバーするパーティションを作成する（既存のものはそのまま）
+
+    存在の判定は名前ではなく pg_inherits で行う。同じ名前の独立したテーブル（切り離し済みの
+    パーティション等）がある場合は、そのままでは書き込めないためエラーにする。
+
+    Returns:
+        対象となったパーティション名のリスト
+    """
+    attached = _attached_partitions(db)
+    names = []
+    for year in range(start_date.year, end_date.year + 1):
+        name = partition_name(year)
+        names.append(name)
+        if name in attached:
+            continue
+        if db.scalar(text("SELECT to_regclass(:name) IS NOT NULL"), {"name": name}):
+            db.rollback()
+            raise ValueError(
+                f"{name} exists but is not a partition of {PARENT_TABLE}; "
+                f"rename it (e.g. to {detached_name(year)}) or drop it"
+            )
+        db.execute(
+            text(
+                f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {PARENT_TABLE} "
+                f"FOR VALUES FROM ('{year}-01-01') TO ('{year + 1}-01-01')"
+            )
+        )
+    db.commit()
+    return names
+
+
+def list_partitions(db: Session) -> list[PartitionInfo]:
+    """パーティションの一覧（行数は統計情報による推定値）"""
+    rows = db.execute(
+        text(
+            """
+            SELECT c.relname,
+                   pg_get_expr(c.relpartbound, c.oid),
+                   c.reltuples::bigint,
+                   pg_total_relation_size(c.oid)
+            FROM pg_inherits i
+            JOIN pg_class c ON c.oid = i.inhrelid
+            WHERE i.inhparent = CAST(:parent AS regclass)
+            ORDER BY c.relname
+            """
+        ),
+        {"parent": PARENT_TABLE},
+    ).all()
+    return [
+        PartitionInfo(name=name, bounds=bounds, estimated_rows=max(rows_, 0), total_bytes=size)
+        for name, bounds, rows_, size in rows
+    ]
+
+
+def freeze_partition(year: int) -> None:
+    """書き込みの終わった年のパーティションをVACUUM FREEZEする
+
+    全行が凍結済みになるため、以降の周回防止（anti-wraparound）のVACUUMでは
+    このパーティションの全件スキャンが不要になる（autovacuum の対象からは外れない）。
+    """
+    name = partition_name(year)
+    # VACUUMはトランザクション内では実行できないため、セッションとは別の接続を使う
+    with get_engine().connect() as connection:
+        connection = connection.execution_options(isolation_level="AUTOCOMMIT")
+        connection.execute(text(f"VACUUM (FREEZE, ANALYZE) {name}"))
+    logger.info(f"Vacuumed partition {name}")
+
+
+def detach_partition(db: Session, year: int) -> str:
+    """パーティションを切り離す（独立したテーブルとして残るのでダンプ・削除が可能）
+
+    切り離したテーブルは detached_name(year) に改名する。元の名前のまま残すと、後でその年の
+    データを取り込む際に ensure_partitions がパーティションを作り直せない。
+
+    Returns:
+        改名後のテーブル名
+    """
+    name = partition_name(year)
+    archived = detached_name(year)
+    db.execute(text(f"ALTER TABLE {PARENT_TABLE} DETACH PARTITION {name}"))
+    db.execute(text(f"ALTER TABLE {name} RENAME TO {archived}"))
+    db.commit()
+    logger.info(f"Detached partition {name} as {archived}")
+    return archived
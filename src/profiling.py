@@ -0,0 +1,107 @@
+"""バッチジョブのプロファイリング（環境変数 JOB_PROFILE で有効化）
+
+- cprofile: cProfile の結果を .prof に保存し、累積時間の上位をログに出力
+           （``python -m pstats`` や snakeviz で参照）
+- sample:   別スレッドから一定間隔でメインスレッドのスタックを採取し、
+           flamegraph.pl / speedscope で読める collapsed 形式（.folded）で保存
+           （cProfile より低オーバーヘッドで、yfinanceの待ち時間なども見える）
+"""
+
+import cProfile
+import io
+import logging
+import pstats
+import sys
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+PROFILE_MODES = ("cprofile", "sample")
+
+# ログに出力する関数の数
+TOP_FUNCTIONS = 30
+
+
+class StackSampler:
+    """対象スレッドのスタックを定期的に採取するサンプリングプロファイラ"""
+
+    def __init__(self, thread_id: int, interval: float):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.samples: Counter[str] = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({code.co_filename}:{code.co_firstlineno})")
+                frame = frame.f_back
+            self.samples[";".join(reversed(stack))] += 1
+
+    def write(self, path: Path) -> None:
+        with path.open("w") as f:
+            for stack, count in self.samples.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+@contextmanager
+def profile(mode: str, output: str | Path, interval: float = 0.01):
+    """ブロック内の処理をプロファイルする
+
+    Args:
+        mode: "cprofile" / "sample"（空文字なら何もしない）
+        output: 出力ファイルのパス（拡張子は mode に応じて付ける）
+        interval: sample モードの採取間隔（秒）
+    """
+    if not mode:
+        yield
+        return
+    if mode not in PROFILE_MODES:
+        logger.warning(f"Unknown profile mode {mode!r} (expected one of {PROFILE_MODES})")
+        yield
+        return
+
+    output = Path(output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+
+    if mode == "cprofile":
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            path = output.with_suffix(".prof")
+            profiler.dump_stats(path)
+            buffer = io.StringIO()
+            pstats.Stats(profiler, stream=buffer).sort_stats("cumulative").print_stats(
+                TOP_FUNCTIONS
+            )
+            logger.info(f"Profile written to {path}\n{buffer.getvalue()}")
+        return
+
+    sampler = StackSampler(threading.get_ident(), interval)
+    sampler.start()
+    try:
+        yield
+    finally:
+        sampler.stop()
+        path = output.with_suffix(".folded")
+        sampler.write(path)
+        logger.info(f"Stack samples written to {path} ({sum(sampler.samples.values())} samples)")
@@ -0,0 +1,213 @@
+"""日足から週足・月足を集計するモジュール
+
+集計はSQL（date_trunc + ウィンドウ関数）で行う。確定済みの期間（最新取引日を含まない期間）は
+stock_price_bars テーブルにキャッシュし、未確定の期間だけをリクエスト時に集計する。
+"""
+
+import logging
+from datetime import date, timedelta
+
+from sqlalchemy import Date, cast, func, literal, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from src.freshness import get_latest_trade_date
+from src.models import StockPrice, StockPriceBar
+
+logger = logging.getLogger(__name__)
+
+INTERVALS = ("week", "month")
+
+BAR_COLUMNS = ("code", "period_start", "open", "high", "low", "close", "volume", "trade_days")
+
+
+def period_start(day: date, interval: str) -> date:
+    """日付が属する期間の開始日（週は月曜始まり）"""
+    if interval == "week":
+        return day - timedelta(days=day.weekday())
+    if interval == "month":
+        return day.replace(day=1)
+    raise ValueError(f"Unsupported interval: {interval}")
+
+
+def next_period_start(day: date, interval: str) -> date:
+    """日付が属する期間の次の期間の開始日"""
+    start = period_start(day, interval)
+    if interval == "week":
+        return start + timedelta(days=7)
+    if start.month == 12:
+        return start.replace(year=start.year + 1, month=1)
+    return start.replace(month=start.month + 1)
+
+
+def bars_select(
+    interval: str,
+    code: str | None = None,
+    start_date: date | None = None,
+    end_date: date | None = None,
+    codes: list[str] | None = None,
+):
+    """日足を集計して足を返すSELECT文を組み立てる
+
+    始値は期間の最初の始値、終値は最後の終値、高値・安値は最大・最小、出来高は合計。
+    start_date は期間の開始日に揃えて指定すること（途中からだと始値がずれるため）。
+    """
+    if interval not in INTERVALS:
+        raise ValueError(f"Unsupported interval: {interval}")
+
+    period = cast(func.date_trunc(interval, StockPrice.trade_date), Date)
+    partition = (StockPrice.code, period)
+
+    daily = select(
+        StockPrice.code.label("code"),
+        period.label("period_start"),
+        StockPrice.high.label("high"),
+        StockPrice.low.label("low"),
+        StockPrice.volume.label("volume"),
+        func.first_value(StockPrice.open)
+        .over(partition_by=partition, order_by=StockPrice.trade_date)
+        .label("first_open"),
+        func.last_value(StockPrice.close)
+        .over(partition_by=partition, order_by=StockPrice.trade_date, range_=(None, None))
+        .label("last_close"),
+    ).where(StockPrice.close.isnot(None))
+
+    if code is not None:
+        daily = daily.where(StockPrice.code == code)
+    if codes is not None:
+        daily = daily.where(StockPrice.code.in_(codes))
+    if start_date is not None:
+        daily = daily.where(StockPrice.trade_date >= start_date)
+    if end_date is not None:
+        daily = daily.where(StockPrice.trade_date <= end_date)
+
+    sub = daily.subquery()
+    return select(
+        sub.c.code,
+        sub.c.period_start,
+        func.min(sub.c.first_open).label("open"),
+        func.max(sub.c.high).label("high"),
+        func.min(sub.c.low).label("low"),
+        func.min(sub.c.last_close).label("close"),
+        func.sum(sub.c.volume).label("volume"),
+        func.count().label("trade_days"),
+    ).group_by(sub.c.code, sub.c.period_start)
+
+
+def refresh_bars(
+    db: Session, interval: str, since: date | None = None, codes: list[str] | None = None
+) -> int:
+    """確定済みの足をキャッシュテーブルに書き込む
+
+    Args:
+        interval: week / month
+        since: この日を含む期間以降を再集計する。省略時はキャッシュ済みの最終期間より
+            後に確定した期間のみを集計する（日次実行用）
+        codes: 指定した銘柄だけを再集計する（株式分割等で過去の値が変わった銘柄用）。
+            since を省略した場合は全期間
+
+    Returns:
+        書き込んだ足の数
+    """
+    latest = get_latest_trade_date(db)
+    if latest is None:
+        return 0
+
+    # 最新取引日を含む期間は未確定なのでキャッシュしない
+    current_start = period_start(latest, interval)
+
+    if since is not None:
+        start = period_start(since, interval)
+    elif codes is not None:
+        # 銘柄指定時は全期間を再集計する
+        start = None
+    else:
+        cached_until = (
+            db.query(func.max(StockPriceBar.period_start))
+            .filter(StockPriceBar.interval == interval)
+            .scalar()
+        )
+        start = next_period_start(cached_until, interval) if cached_until else None
+
+    if start is not None and start >= current_start:
+        return 0
+
+    source = bars_select(
+        interval, start_date=start, end_date=current_start - timedelta(days=1), codes=codes
+    )
+    bars = source.subquery()
+    stmt = insert(StockPriceBar).from_select(
+        ["interval", *BAR_COLUMNS],
+        select(literal(interval), *bars.c),
+    )
+    stmt = stmt.on_conflict_do_update(
+        constraint="uq_stock_price_bar",
+        set_={
+            **{
+                column: getattr(stmt.excluded, column)
+                for column in ("open", "high", "low", "close", "volume", "trade_days")
+            },
+            "updated_at": func.now(),
+        },
+    )
+    # Connection.execute は CursorResult を返すため rowcount を型付きで読める
+    result = db.connection().execute(stmt)
+    db.commit()
+
+    logger.info(f"Refreshed {result.rowcount} {interval} bars (from {start or 'beginning'})")
+    return result.rowcount
+
+
+def refresh_all_bars(db: Session, since: date | None = None, codes: list[str] | None = None) -> int:
+    """全ての足種別についてキャッシュを更新する"""
+    return sum(refresh_bars(db, interval, since, codes) for interval in INTERVALS)
+
+
+def get_bars(
+    db: Session,
+    code: str,
+    interval: str,
+    start_date: date | None = None,
+    end_date: date | None = None,
+) -> list[dict]:
+    """銘柄の足を取得する（新しい順）
+
+    キャッシュ済みの確定足を読み、キャッシュに無い期間（未確定の期間を含む）だけを集計する。
+    """
+    start = period_start(start_date, interval) if start_date else None
+    # end_dateの翌日が属する期間より前 = end_dateまでに完結している期間
+    cached_end = period_start(end_date + timedelta(days=1), interval) if end_date else None
+
+    cached_query = db.query(StockPriceBar).filter(
+        StockPriceBar.code == code, StockPriceBar.interval == interval
+    )
+    if start is not None:
+        cached_query = cached_query.filter(StockPriceBar.period_start >= start)
+    if cached_end is not None:
+        cached_query = cached_query.filter(StockPriceBar.period_start < cached_end)
+    cached = cached_query.all()
+
+    bars = [
+        {column: getattr(bar, column) for column in BAR_COLUMNS} | {"complete": True}
+        for bar in cached
+    ]
+
+    live_start = start
+    if cached:
+        live_start = next_period_start(max(bar.period_start for bar in cached), interval)
+
+    if end_date is None or live_start is None or live_start <= end_date:
+        latest = get_latest_trade_date(db)
+        current_start = period_start(latest, interval) if latest else None
+        for row in db.execute(bars_select(interval, code, live_start, end_date)).mappings():
+            bar = {column: row[column] for column in BAR_COLUMNS}
+            # end_dateで途中までしか集計していない期間も未確定として扱う
+            complete = (
+                current_start is not None
+                and row["period_start"] < current_start
+                and (cached_end is None or row["period_start"] < cached_end)
+            )
+            bars.append(bar | {"complete": complete})
+
+    bars.sort(key=lambda bar: bar["period_start"], reverse=True)
+    return bars
@@ -0,0 +1,180 @@
+"""常駐スケジューラ（python -m src.main --daemon）
+
+東証の営業日の INGEST_SCHEDULE_JST に日次ジョブを実行する。プロセスを常駐させることで
+pandas・yfinance等のimport、DBコネクションプール、銘柄リストのキャッシュを実行間で再利用する。
+
+手動実行はローカルのHTTPで受け付ける（python -m src.main --trigger / --status からも呼べる）:
+    POST http://127.0.0.1:8001/trigger   ジョブを今すぐ実行
+    GET  http://127.0.0.1:8001/status    実行状況・次回予定時刻
+
+ジョブ側でアドバイザリロックを取るため、GitHub Actions等からの単発実行と重なっても二重には走らない。
+"""
+
+import json
+import logging
+import signal
+import threading
+import time
+from collections.abc import Callable
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from sqlalchemy import select
+
+from src.database import SessionLocal
+from src.models import JobRun
+from src.trading_calendar import JST, last_scheduled_run, next_scheduled_run
+
+logger = logging.getLogger(__name__)
+
+# 待機中に時刻を確認し直す間隔（秒）- スリープ復帰や時刻変更でずれないように
+MAX_WAIT_SECONDS = 60
+
+
+def _now_jst() -> datetime:
+    return datetime.now(JST)
+
+
+class Scheduler:
+    def __init__(
+        self,
+        job: Callable[[], bool | None],
+        job_name: str,
+        schedule: str,
+        clock: Callable[[], datetime] = _now_jst,
+    ):
+        self.job = job
+        self.job_name = job_name
+        self.schedule = schedule
+        # 現在時刻（JST）。テストでは固定・進める時計に差し替える
+        self.clock = clock
+        self.running = False
+        self.next_run: datetime | None = None
+        self.last_run: dict | None = None
+        self._wake = threading.Event()
+        self._manual = False
+        self._stopping = False
+        self._server: ThreadingHTTPServer | None = None
+
+    def trigger(self) -> None:
+        """ジョブを今すぐ実行するよう要求する（実行中なら終了後にもう一度実行）"""
+        self._manual = True
+        self._wake.set()
+
+    def stop(self) -> None:
+        """実行中のジョブが終わったら停止する"""
+        self._stopping = True
+        self._wake.set()
+
+    def status(self) -> dict:
+        return {
+            "job": self.job_name,
+            "running": self.running,
+            "next_run": self.next_run.isoformat() if self.next_run else None,
+            "last_run": self.last_run,
+        }
+
+    def missed_todays_run(self) -> bool:
+        """本日の予定時刻を過ぎていて、まだ成功した実行が無いかどうか"""
+        now = self.clock()
+        last = last_scheduled_run(now, self.schedule)
+        if last.date() != now.date():
+            return False
+        since = last.astimezone(timezone.utc).replace(tzinfo=None)
+        db = SessionLocal()
+        try:
+            run = db.scalar(
+                select(JobRun.id).where(
+                    JobRun.job == self.job_name,
+                    JobRun.status == "success",
+                    JobRun.started_at >= since,
+                )
+            )
+        finally:
+            db.close()
+        return run is None
+
+    def run_once(self, reason: str) -> None:
+        logger.info(f"Running {self.job_name} ({reason})")
+        self.running = True
+        started_at = self.clock()
+        start = time.perf_counter()
+        status = "success"
+        try:
+            if self.job() is False:
+                # 他のプロセスが実行中
+                status = "skipped"
+        except Exception:
+            # ジョブ側でログ・job_runsに記録済み。次回の予定まで待機を続ける
+            status = "failed"
+        finally:
+            self.running = False
+            self.last_run = {
+                "reason": reason,
+                "status": status,
+                "started_at": started_at.isoformat(),
+                "seconds": round(time.perf_counter() - start, 3),
+            }
+
+    def serve(self, host: str, port: int) -> None:
+        """手動実行用のHTTPサーバーを別スレッドで起動する"""
+        self._server = ThreadingHTTPServer((host, port), _handler(self))
+        thread = threading.Thread(target=self._server.serve_forever, name="scheduler-http")
+        thread.daemon = True
+        thread.start()
+        logger.info(f"Manual trigger listening on http://{host}:{port}/trigger")
+
+    def run_forever(self) -> None:
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            signal.signal(sig, lambda signum, frame: self.stop())
+
+        if self.missed_todays_run():
+            self.trigger()
+
+        while not self._stopping:
+            now = self.clock()
+            self.next_run = next_scheduled_run(now, self.schedule)
+            timeout = min((self.next_run - now).total_seconds(), MAX_WAIT_SECONDS)
+            self._wake.wait(max(timeout, 0))
+            self._wake.clear()
+            if self._stopping:
+                break
+            if self._manual:
+                self._manual = False
+                self.run_once("manual")
+            elif self.clock() >= self.next_run:
+                self.run_once("schedule")
+
+        if self._server is not None:
+            self._server.shutdown()
+        logger.info("Scheduler stopped")
+
+
+def _handler(scheduler: Scheduler) -> type[BaseHTTPRequestHandler]:
+    class Handler(BaseHTTPRequestHandler):
+        def _reply(self, status: int, body: dict) -> None:
+            payload = json.dumps(body, ensure_ascii=False).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def do_GET(self):  # noqa: N802
+            if self.path == "/status":
+                self._reply(200, scheduler.status())
+            else:
+                self._reply(404, {"detail": "Not Found"})
+
+        def do_POST(self):  # noqa: N802
+            if self.path == "/trigger":
+                queued = scheduler.running
+                scheduler.trigger()
+                self._reply(202, {"triggered": True, "queued": queued})
+            else:
+                self._reply(404, {"detail": "Not Found"})
+
+        def log_message(self, format, *args):
+            logger.debug(format % args)
+
+    return Handler
@@ -0,0 +1,345 @@
+"""スクリーニング条件式をSQLに変換するモジュール
+
+条件式の文法（小さく安全なサブセットのみ受け付ける）:
+
+    expr       := or_expr
+    or_expr    := and_expr ("or" and_expr)*
+    and_expr   := not_expr ("and" not_expr)*
+    not_expr   := "not" not_expr | comparison
+    comparison := arith (("<" | "<=" | ">" | ">=" | "==" | "!=") arith)?
+    arith      := term (("+" | "-") term)*
+    term       := unary (("*" | "/") unary)*
+    unary      := "-" unary | primary
+    primary    := NUMBER | FIELD | FUNC "(" args ")" | "(" expr ")"
+
+使用できる関数:
+    prev(x)             前営業日の値
+    cross_above(a, b)   aがbを上抜け（前営業日 a <= b かつ 当日 a > b）
+    cross_below(a, b)   aがbを下抜け（前営業日 a >= b かつ 当日 a < b）
+
+例: ``rsi9 < 30 and close < bb_lower``、``cross_above(ma5, ma20)``
+"""
+
+import re
+from dataclasses import dataclass
+from typing import cast
+
+from sqlalchemy import and_, func, not_, or_
+from sqlalchemy.sql.elements import ColumnElement
+
+# 条件式で参照できるカラム（StockPriceの属性名）
+SCREENER_FIELDS = (
+    "open",
+    "high",
+    "low",
+    "close",
+    "volume",
+    "adjusted_close",
+    "ma5",
+    "ma20",
+    "rsi9",
+    "bb_upper",
+    "bb_middle",
+    "bb_lower",
+)
+
+# 条件式の長さ・ノード数の上限（巨大なSQLの生成を防ぐ）
+MAX_EXPRESSION_LENGTH = 500
+MAX_NODES = 100
+
+_TOKEN_RE = re.compile(
+    r"\s*(?:"
+    r"(?P<number>\d+(?:\.\d+)?|\.\d+)"
+    r"|(?P<name>[A-Za-z_][A-Za-z0-9_]*)"
+    r"|(?P<op><=|>=|==|!=|<|>|\+|-|\*|/|\(|\)|,)"
+    r")"
+)
+
+_COMPARISONS = ("<", "<=", ">", ">=", "==", "!=")
+_FUNCTIONS = {"prev": 1, "cross_above": 2, "cross_below": 2}
+_KEYWORDS = ("and", "or", "not")
+
+
+class ScreenerError(ValueError):
+    """条件式が不正な場合の例外"""
+
+
+@dataclass(frozen=True)
+class Token:
+    kind: str
+    value: str
+    pos: int
+
+
+@dataclass(frozen=True)
+class Node:
+    """構文木のノード
+
+    kind: number / field / unary / binary / compare / and / or / not / call
+    """
+
+    kind: str
+    value: str | float | None = None
+    args: tuple["Node", ...] = ()
+
+
+def tokenize(expression: str) -> list[Token]:
+    """条件式をトークン列に分割"""
+    tokens: list[Token] = []
+    pos = 0
+    length = len(expression)
+    while pos < length:
+        if expression[pos:].strip() == "":
+            break
+        match = _TOKEN_RE.match(expression, pos)
+        if not match or match.end() == pos:
+            raise ScreenerError(f"Unexpected character at position {pos}: {expression[pos]!r}")
+        kind = match.lastgroup
+        assert kind is not None
+        value = match.group(kind)
+        start = match.start(kind)
+        if kind == "name":
+            value = value.lower()
+            if value in _KEYWORDS:
+                kind = "keyword"
+        tokens.append(Token(kind, value, start))
+        pos = match.end()
+    return tokens
+
+
+class _Parser:
+    """再帰下降パーサー"""
+
+    def __init__(self, tokens: list[Token]):
+        self.tokens = tokens
+        self.index = 0
+        self.node_count = 0
+
+    def parse(self) -> Node:
+        if not self.tokens:
+            raise ScreenerError("Empty expression")
+        node = self._or()
+        if self.index < len(self.tokens):
+            token = self.tokens[self.index]
+            raise ScreenerError(f"Unexpected token {token.value!r} at position {token.pos}")
+        return node
+
+    def _peek(self) -> Token | None:
+        return self.tokens[self.index] if self.index < len(self.tokens) else None
+
+    def _accept(self, kind: str, *values: str) -> Token | None:
+        token = self._peek()
+        if token and token.kind == kind and (not values or token.value in values):
+            self.index += 1
+            return token
+        return None
+
+    def _expect(self, kind: str, value: str) -> Token:
+        token = self._accept(kind, value)
+        if token is None:
+            found = self._peek()
+            where = f"{found.value!r} at position {found.pos}" if found else "end of expression"
+            raise ScreenerError(f"Expected {value!r}, found {where}")
+        return token
+
+    def _node(self, kind: str, value=None, args: tuple[Node, ...] = ()) -> Node:
+        self.node_count += 1
+        if self.node_count > MAX_NODES:
+            raise ScreenerError("Expression is too complex")
+        return Node(kind, value, args)
+
+    def _or(self) -> Node:
+        node = self._and()
+        while self._accept("keyword", "or"):
+            node = self._node("or", args=(node, self._and()))
+        return node
+
+    def _and(self) -> Node:
+        node = self._not()
+        while self._accept("keyword", "and"):
+            node = self._node("and", args=(node, self._not()))
+        return node
+
+    def _not(self) -> Node:
+        if self._accept("keyword", "not"):
+            return self._node("not", args=(self._not(),))
+        return self._comparison()
+
+    def _comparison(self) -> Node:
+        node = self._arith()
+        token = self._accept("op", *_COMPARISONS)
+        if token:
+            node = self._node("compare", token.value, (node, self._arith()))
+        return node
+
+    def _arith(self) -> Node:
+        node = self._term()
+        while token := self._accept("op", "+", "-"):
+            node = self._node("binary", token.value, (node, self._term()))
+        return node
+
+    def _term(self) -> Node:
+        node = self._unary()
+        while token := self._accept("op", "*", "/"):
+            node = self._node("binary", token.value, (node, self._unary()))
+        return node
+
+    def _unary(self) -> Node:
+        if self._accept("op", "-"):
+            return self._node("unary", "-", (self._unary(),))
+        return self._primary()
+
+    def _primary(self) -> Node:
+        token = self._peek()
+        if token is None:
+            raise ScreenerError("Unexpected end of expression")
+
+        if self._accept("number"):
+            return self._node("number", float(token.value))
+
+        if self._accept("op", "("):
+            node = self._or()
+            self._expect("op", ")")
+            return node
+
+        if self._accept("name"):
+            name = token.value
+            if name in _FUNCTIONS:
+                self._expect("op", "(")
+                args = [self._arith()]
+                while self._accept("op", ","):
+                    args.append(self._arith())
+                self._expect("op", ")")
+                if len(args) != _FUNCTIONS[name]:
+                    raise ScreenerError(
+                        f"{name}() takes {_FUNCTIONS[name]} argument(s), got {len(args)}"
+                    )
+                return self._node("call", name, tuple(args))
+            if name in SCREENER_FIELDS:
+                return self._node("field", name)
+            raise ScreenerError(f"Unknown field {name!r} at position {token.pos}")
+
+        raise ScreenerError(f"Unexpected token {token.value!r} at position {token.pos}")
+
+
+def _is_boolean(node: Node) -> bool:
+    if node.kind in ("compare", "and", "or", "not"):
+        return True
+    return node.kind == "call" and node.value in ("cross_above", "cross_below")
+
+
+def _check_types(node: Node, boolean: bool) -> None:
+    """論理式と数値式の取り違えを検出"""
+    if _is_boolean(node) != boolean:
+        expected = "a condition" if boolean else "a numeric value"
+        raise ScreenerError(f"Expected {expected}")
+
+    if node.kind in ("and", "or", "not"):
+        for arg in node.args:
+            _check_types(arg, True)
+    elif node.kind in ("compare", "binary", "unary", "call"):
+        for arg in node.args:
+            _check_types(arg, False)
+        if node.kind == "call" and node.value == "prev" and uses_prev(node.args[0]):
+            raise ScreenerError("prev() cannot be nested")
+
+
+def parse_expression(expression: str) -> Node:
+    """条件式をパースして構文木を返す
+
+    Raises:
+        ScreenerError: 条件式が不正な場合
+    """
+    if len(expression) > MAX_EXPRESSION_LENGTH:
+        raise ScreenerError(f"Expression is longer than {MAX_EXPRESSION_LENGTH} characters")
+    node = _Parser(tokenize(expression)).parse()
+    _check_types(node, True)
+    return node
+
+
+def uses_prev(node: Node) -> bool:
+    """前営業日のデータを参照するかどうか"""
+    if node.kind == "call":
+        return True
+    return any(uses_prev(arg) for arg in node.args)
+
+
+def compile_expression(node: Node, current, previous=None) -> ColumnElement:
+    """構文木をSQLAlchemyの式に変換
+
+    Args:
+        node: parse_expressionで得た構文木
+        current: 当日の株価エンティティ（StockPriceまたはそのalias）
+        previous: 前営業日の株価エンティティ（prev/crossを使う場合に必須）
+    """
+
+    def value(n: Node, table):
+        if n.kind == "number":
+            return n.value
+        if n.kind == "field":
+            return getattr(table, str(n.value))
+        if n.kind == "unary":
+            return -value(n.args[0], table)
+        if n.kind == "binary":
+            left, right = value(n.args[0], table), value(n.args[1], table)
+            if n.value == "+":
+                return left + right
+            if n.value == "-":
+                return left - right
+            if n.value == "*":
+                return left * right
+            if isinstance(right, float):
+                if right == 0:
+                    raise ScreenerError("Division by zero")
+                return left / right
+            # ゼロ除算はNULL扱い（その銘柄は条件に一致しない）
+            return left / func.nullif(right, 0)
+        if n.kind == "call" and n.value == "prev":
+            if previous is None:
+                raise ScreenerError("prev() requires the previous trading day")
+            return value(n.args[0], previous)
+        raise ScreenerError(f"Unsupported expression: {n.kind}")
+
+    def condition(n: Node) -> ColumnElement:
+        if n.kind == "and":
+            return and_(condition(n.args[0]), condition(n.args[1]))
+        if n.kind == "or":
+            return or_(condition(n.args[0]), condition(n.args[1]))
+        if n.kind == "not":
+            return not_(condition(n.args[0]))
+        if n.kind == "compare":
+            left, right = value(n.args[0], current), value(n.args[1], current)
+            return cast(ColumnElement, _compare(str(n.value), left, right))
+        if n.kind == "call":
+            if previous is None:
+                raise ScreenerError(f"{n.value}() requires the previous trading day")
+            a, b = n.args
+            if n.value == "cross_above":
+                return and_(
+                    value(a, previous) <= value(b, previous),
+                    value(a, current) > value(b, current),
+                )
+            return and_(
+                value(a, previous) >= value(b, previous),
+                value(a, current) < value(b, current),
+            )
+        raise ScreenerError(f"Unsupported condition: {n.kind}")
+
+    return condition(node)
+
+
+def _compare(op: str, left, right):
+    # 数値リテラル同士の比較はSQLに落とせないため拒否する
+    if isinstance(left, float) and isinstance(right, float):
+        raise ScreenerError("Comparison must reference at least one field")
+    if op == "<":
+        return left < right
+    if op == "<=":
+        return left <= right
+    if op == ">":
+        return left > right
+    if op == ">=":
+        return left >= right
+    if op == "==":
+        return left == right
+    return left != right
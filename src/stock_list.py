@@ -26,6 +26,10 @@ class StockInfo:
     sector: str = ""
 
 
+# 常駐プロセス用: キャッシュファイルの更新時刻と読み込んだ銘柄リスト
+_loaded_cache: tuple[float, list[StockInfo]] | None = None
+
+
 def fetch_jpx_stock_list() -> list[StockInfo]:
     """JPXから上場銘柄一覧を取得する"""
     logger.info("Fetching stock list from JPX...")
@@ -84,9 +88,13 @@ def _save_cache(stocks: list[StockInfo]) -> None:
 
 
 def _load_cache() -> list[StockInfo] | None:
-    """キャッシュから銘柄リストを読み込み"""
+    """キャッシュから銘柄リストを読み込み（ファイルが更新されていなければ前回の結果を返す）"""
+    global _loaded_cache
     try:
         if CACHE_FILE.exists():
+            mtime = CACHE_FILE.stat().st_mtime
+            if _loaded_cache is not None and _loaded_cache[0] == mtime:
+                return list(_loaded_cache[1])
             df = pd.read_csv(CACHE_FILE, dtype=str)
             stocks = [
                 StockInfo(
@@ -97,7 +105,8 @@ def _load_cache() -> list[StockInfo] | None:
                 )
                 for _, row in df.iterrows()
             ]
-            return stocks
+            _loaded_cache = (mtime, stocks)
+            return list(stocks)
     except Exception as e:
         logger.warning(f"Failed to load cache: {e}")
     return None
@@ -0,0 +1,170 @@
+"""東証の営業日カレンダー（JST）
+
+休業日は土日・国民の祝日（振替休日・国民の休日を含む）・年末年始（12/31〜1/3）。
+祝日はハッピーマンデー制度が始まった2000年以降について、その年に施行されていた祝日法の規則
+（海の日・敬老の日の月曜移動、山の日の新設、天皇誕生日の変更、振替休日の規則変更）と、
+一時的な祝日・移動（2019年の即位関連、2020・2021年の五輪特例）から計算する。
+それより前の年は祝日を正しく計算できないため、確実な休業日は土日と年末年始のみとなる。
+"""
+
+from datetime import date, datetime, timedelta, timezone
+from functools import lru_cache
+
+JST = timezone(timedelta(hours=9))
+
+# 年末年始の休業日（月, 日）
+YEAR_END_HOLIDAYS = ((12, 31), (1, 1), (1, 2), (1, 3))
+
+# 祝日を計算できる最初の年
+FIRST_MODELLED_YEAR = 2000
+
+# その年限りの祝日（即位の日・即位礼正殿の儀）
+EXTRA_HOLIDAYS = {
+    2019: (date(2019, 5, 1), date(2019, 10, 22)),
+}
+
+# 五輪特例で移動した祝日（祝日名 -> 移動先）
+MOVED_HOLIDAYS = {
+    2020: {
+        "海の日": date(2020, 7, 23),
+        "スポーツの日": date(2020, 7, 24),
+        "山の日": date(2020, 8, 10),
+    },
+    2021: {
+        "海の日": date(2021, 7, 22),
+        "スポーツの日": date(2021, 7, 23),
+        "山の日": date(2021, 8, 8),
+    },
+}
+
+
+def _nth_monday(year: int, month: int, n: int) -> date:
+    first = date(year, month, 1)
+    offset = (7 - first.weekday()) % 7
+    return first + timedelta(days=offset + 7 * (n - 1))
+
+
+def _equinox_day(year: int, base: float) -> int:
+    # 1980〜2099年に有効な近似式
+    return int(base + 0.242194 * (year - 1980) - (year - 1980) // 4)
+
+
+def _emperors_birthday(year: int) -> date | None:
+    # 2018年までは12/23、譲位のあった2019年は無し
+    if year < 2019:
+        return date(year, 12, 23)
+    return date(year, 2, 23) if year > 2019 else None
+
+
+def _fixed_holidays(year: int) -> dict[str, date | None]:
+    """祝日名 -> 日付（その年に無い祝日はNone）"""
+    return {
+        "元日": date(year, 1, 1),
+        "成人の日": _nth_monday(year, 1, 2),
+        "建国記念の日": date(year, 2, 11),
+        "天皇誕生日": _emperors_birthday(year),
+        "春分の日": date(year, 3, _equinox_day(year, 20.8431)),
+        "昭和の日": date(year, 4, 29),
+        "憲法記念日": date(year, 5, 3),
+        # 2006年までの5/4は国民の休日（祝日に挟まれた日）として休み
+        "みどりの日": date(year, 5, 4) if year >= 2007 else None,
+        "こどもの日": date(year, 5, 5),
+        "海の日": _nth_monday(year, 7, 3) if year >= 2003 else date(year, 7, 20),
+        "山の日": date(year, 8, 11) if year >= 2016 else None,
+        "敬老の日": _nth_monday(year, 9, 3) if year >= 2003 else date(year, 9, 15),
+        "秋分の日": date(year, 9, _equinox_day(year, 23.2488)),
+        "スポーツの日": _nth_monday(year, 10, 2),
+        "文化の日": date(year, 11, 3),
+        "勤労感謝の日": date(year, 11, 23),
+    }
+
+
+@lru_cache(maxsize=64)
+def national_holidays(year: int) -> frozenset[date]:
+    """国民の祝日・振替休日・国民の休日"""
+    named = _fixed_holidays(year) | MOVED_HOLIDAYS.get(year, {})
+    holidays = {day for day in named.values() if day is not None}
+    holidays.update(EXTRA_HOLIDAYS.get(year, ()))
+
+    # 国民の休日: 前後を祝日に挟まれた平日
+    for day in sorted(holidays):
+        between = day + timedelta(days=1)
+        if between not in holidays and between + timedelta(days=1) in holidays:
+            if between.weekday() != 6:
+                holidays.add(between)
+
+    # 振替休日: 祝日が日曜日なら、その後の最初の祝日でない日（2006年までは翌日が祝日なら無し）
+    for day in sorted(holidays):
+        if day.weekday() == 6:
+            substitute = day + timedelta(days=1)
+            if year < 2007 and substitute in holidays:
+                continue
+            while substitute in holidays:
+                substitute += timedelta(days=1)
+            holidays.add(substitute)
+
+    return frozenset(holidays)
+
+
+def is_trading_day(day: date) -> bool:
+    """東証の営業日かどうか"""
+    if day.weekday() >= 5:
+        return False
+    if (day.month, day.day) in YEAR_END_HOLIDAYS:
+        return False
+    return day not in national_holidays(day.year)
+
+
+def is_known_non_trading_day(day: date) -> bool:
+    """確実に休業日かどうか（祝日を計算できない年は土日・年末年始のみ休業日とみなす）"""
+    if day.year < FIRST_MODELLED_YEAR:
+        return day.weekday() >= 5 or (day.month, day.day) in YEAR_END_HOLIDAYS
+    return not is_trading_day(day)
+
+
+def next_trading_day(day: date) -> date:
+    """dayより後の最初の営業日"""
+    day += timedelta(days=1)
+    while not is_trading_day(day):
+        day += timedelta(days=1)
+    return day
+
+
+def previous_trading_day(day: date) -> date:
+    """dayより前の最後の営業日"""
+    day -= timedelta(days=1)
+    while not is_trading_day(day):
+        day -= timedelta(days=1)
+    return day
+
+
+def parse_schedule(schedule: str) -> tuple[int, int]:
+    """HH:MM 形式の時刻を (時, 分) に変換"""
+    hour, minute = (int(part) for part in schedule.split(":"))
+    return hour, minute
+
+
+def scheduled_at(day: date, schedule: str) -> datetime:
+    """営業日dayの実行予定時刻（JST）"""
+    hour, minute = parse_schedule(schedule)
+    return datetime(day.year, day.month, day.day, hour, minute, tzinfo=JST)
+
+
+def next_scheduled_run(now: datetime, schedule: str) -> datetime:
+    """nowより後の、営業日の実行予定時刻（JST）"""
+    today = now.astimezone(JST).date()
+    day = today if is_trading_day(today) else next_trading_day(today)
+    run_at = scheduled_at(day, schedule)
+    if run_at <= now:
+        run_at = scheduled_at(next_trading_day(day), schedule)
+    return run_at
+
+
+def last_scheduled_run(now: datetime, schedule: str) -> datetime:
+    """now以前で直近の、営業日の実行予定時刻（JST）"""
+    today = now.astimezone(JST).date()
+    day = today if is_trading_day(today) else previous_trading_day(today)
+    run_at = scheduled_at(day, schedule)
+    if run_at > now:
+        run_at = scheduled_at(previous_trading_day(day), schedule)
+    return run_at
@@ -0,0 +1,148 @@
+"""ダウンロードした株価の品質チェック
+
+yf.download の結果（日付 × 銘柄）をNumPyの2次元配列として一度に検査し、疑わしい行を
+理由コード付きで返す。疑わしい行は stock_prices に書き込まず price_quarantine に退避する。
+
+理由コード:
+- high_below_low:      高値 < 安値
+- close_out_of_range:  終値が高値・安値の範囲外
+- non_positive_price:  0以下の価格
+- zero_volume_move:    出来高0なのに前日から終値が動いている
+- price_spike:         前日終値から SPIKE_RATIO 倍以上・分の1以下への変化
+- non_trading_day:     東証の休業日の行（休日に前日の値が複製されたもの）
+- stale_duplicate:     四本値・出来高が前日と全く同じ行
+
+前日の値はバッチ内の直前の行と比べる（日次ジョブは前営業日から取得するため前日を含む）。
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from src.trading_calendar import is_known_non_trading_day
+
+# 前日終値からこの倍率以上（またはこの分の1以下）の変化を異常値とみなす
+SPIKE_RATIO = 10.0
+
+# 終値と高値・安値の比較の許容誤差（相対）
+RANGE_TOLERANCE = 1e-6
+
+FIELDS = ("Open", "High", "Low", "Close", "Adj Close", "Volume")
+
+REASONS = (
+    "high_below_low",
+    "close_out_of_range",
+    "non_positive_price",
+    "zero_volume_move",
+    "price_spike",
+    "non_trading_day",
+    "stale_duplicate",
+)
+
+
+@dataclass
+class ValidationResult:
+    # 疑わしい行（日付 × 銘柄コード）
+    suspect: pd.DataFrame
+    # 退避する行（code, trade_date, reasons, 各フィールド）
+    quarantined: list[dict]
+
+
+def _field(data: pd.DataFrame, tickers: list[str], name: str) -> np.ndarray:
+    """フィールドの (日付, 銘柄) 配列（無いものはNaN）"""
+    if name not in data.columns.get_level_values(1):
+        return np.full((len(data), len(tickers)), np.nan)
+    frame = data.xs(name, axis=1, level=1).reindex(columns=tickers)
+    values: np.ndarray = frame.to_numpy(dtype=np.float64, na_value=np.nan)
+    return values
+
+
+def _previous(values: np.ndarray) -> np.ndarray:
+    """1行前の値（先頭行はNaN）"""
+    previous = np.full_like(values, np.nan)
+    previous[1:] = values[:-1]
+    return previous
+
+
+def _extreme(ratio: np.ndarray) -> np.ndarray:
+    return (ratio >= SPIKE_RATIO) | (ratio <= 1 / SPIKE_RATIO)
+
+
+def validate_prices(data: pd.DataFrame, ticker_to_code: dict[str, str]) -> ValidationResult:
+    """yf.download の結果を検査する
+
+    Args:
+        data: yf.download(group_by="ticker") の結果（単一銘柄の場合は列が1階層）
+        ticker_to_code: ティッカー → 銘柄コード
+    """
+    tickers = list(ticker_to_code)
+    if not isinstance(data.columns, pd.MultiIndex):
+        data = pd.concat({tickers[0]: data}, axis=1)
+        tickers = tickers[:1]
+
+    open_, high, low, close, adjusted, volume = (_field(data, tickers, f) for f in FIELDS)
+    dates = [d.date() if hasattr(d, "date") else d for d in data.index]
+
+    # 欠損した終値は保存時に読み飛ばすため検査しない
+    present = ~np.isnan(close)
+    # 直前・2つ前の（欠損でない）終値
+    previous_close = pd.DataFrame(_previous(close)).ffill().to_numpy()
+    before_previous = (
+        pd.DataFrame(_previous(np.where(present, previous_close, np.nan))).ffill().to_numpy()
+    )
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        jump = _extreme(close / previous_close)
+        # 1日だけの異常値の翌日（元の水準に戻った行）は異常値としない
+        recovered = _extreme(previous_close / before_previous) & ~_extreme(close / before_previous)
+        checks = {
+            "high_below_low": high < low,
+            "close_out_of_range": (close > high * (1 + RANGE_TOLERANCE))
+            | (close < low * (1 - RANGE_TOLERANCE)),
+            "non_positive_price": (open_ <= 0) | (high <= 0) | (low <= 0) | (close <= 0),
+            "zero_volume_move": (volume == 0)
+            & (close != previous_close)
+            & ~np.isnan(previous_close),
+            "price_spike": jump & ~recovered,
+            "non_trading_day": np.broadcast_to(
+                np.array([is_known_non_trading_day(d) for d in dates])[:, None], close.shape
+            ),
+            "stale_duplicate": (volume > 0)
+            & (open_ == _previous(open_))
+            & (high == _previous(high))
+            & (low == _previous(low))
+            & (close == _previous(close))
+            & (volume == _previous(volume)),
+        }
+
+    codes = [ticker_to_code[ticker] for ticker in tickers]
+    suspect = np.zeros(close.shape, dtype=bool)
+    for mask in checks.values():
+        suspect |= mask
+    suspect &= present
+
+    quarantined = []
+    for i, j in zip(*np.nonzero(suspect)):
+        quarantined.append(
+            {
+                "code": codes[j],
+                "trade_date": dates[i],
+                "reasons": [reason for reason, mask in checks.items() if mask[i, j]],
+                "open": _float(open_[i, j]),
+                "high": _float(high[i, j]),
+                "low": _float(low[i, j]),
+                "close": _float(close[i, j]),
+                "adjusted_close": _float(adjusted[i, j]),
+                "volume": None if np.isnan(volume[i, j]) else int(volume[i, j]),
+            }
+        )
+
+    return ValidationResult(
+        suspect=pd.DataFrame(suspect, index=data.index, columns=codes),
+        quarantined=quarantined,
+    )
+
+
+def _float(value: float) -> float | None:
+    return None if np.isnan(value) else float(value)
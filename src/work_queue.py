@@ -0,0 +1,207 @@
+"""複数ワーカーによる分散取り込み（PostgreSQLの work_units キュー）
+
+バックフィル等を銘柄グループ×期間の作業単位に分けて work_units に登録し、
+複数のコンテナ・ホストのワーカーが SELECT ... FOR UPDATE SKIP LOCKED で重複なく取得する。
+
+- 取得した作業単位には leased_until までのリースが付く。ワーカーが落ちてリースが切れると
+  他のワーカーが取り直す（MAX_ATTEMPTS 回まで）
+- 登録はアドバイザリロックで直列化し、複数のワーカーが同時に登録しても一度だけ登録する
+- 進捗は work_unit_progress ビューで集計する
+
+保存はupsertのため、リース切れで同じ作業単位が二度処理されても重複しない。
+"""
+
+import logging
+import time
+from collections.abc import Callable
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import and_, delete, func, or_, select, text, update
+from sqlalchemy.orm import Session
+
+from src.models import WorkUnit
+
+logger = logging.getLogger(__name__)
+
+# 作業単位の登録を直列化するアドバイザリロックのキー
+WORK_QUEUE_LOCK_KEY = 7_203_002
+
+# リースの長さ（秒）- 1作業単位の処理時間より十分長くする
+DEFAULT_LEASE_SECONDS = 900
+
+# 失敗・リース切れを含めた作業単位あたりの最大試行回数
+MAX_ATTEMPTS = 3
+
+# 他のワーカーの処理中の作業単位が終わるのを待つ間隔（秒）
+POLL_SECONDS = 10
+
+
+def enqueue(
+    db: Session,
+    queue: str,
+    codes: list[str],
+    batch_size: int,
+    start_date: date,
+    end_date: date,
+) -> int:
+    """作業単位を登録する
+
+    キューに未完了の作業単位が残っている場合は何もしない（実行中のキューに参加する）。
+    完了済みの古い作業単位は削除する。
+
+    Returns:
+        登録した作業単位の数
+    """
+    # トランザクション終了まで保持（commitで解放）
+    db.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": WORK_QUEUE_LOCK_KEY})
+    unfinished = db.scalar(
+        select(func.count())
+        .select_from(WorkUnit)
+        .where(WorkUnit.queue == queue, WorkUnit.status.in_(("pending", "leased")))
+    )
+    if unfinished:
+        db.commit()
+        logger.info(f"Queue {queue} already has {unfinished} unfinished units")
+        return 0
+
+    db.execute(delete(WorkUnit).where(WorkUnit.queue == queue))
+    now = datetime.utcnow()
+    units = [
+        WorkUnit(
+            queue=queue,
+            codes=codes[i : i + batch_size],
+            start_date=start_date,
+            end_date=end_date,
+            status="pending",
+            attempts=0,
+            rows=0,
+            created_at=now,
+            updated_at=now,
+        )
+        for i in range(0, len(codes), batch_size)
+    ]
+    db.add_all(units)
+    db.commit()
+    logger.info(f"Queued {len(units)} units ({len(codes)} codes) on {queue}")
+    return len(units)
+
+
+def claim(
+    db: Session, queue: str, worker: str, lease_seconds: int = DEFAULT_LEASE_SECONDS
+) -> WorkUnit | None:
+    """未処理またはリース切れの作業単位を1つ取得してリースする（無ければNone）"""
+    now = datetime.utcnow()
+    expired = and_(WorkUnit.status == "leased", WorkUnit.leased_until < now)
+
+    # 試行回数を使い切ったままリースが切れたものは失敗にする
+    db.execute(
+        update(WorkUnit)
+        .where(WorkUnit.queue == queue, expired, WorkUnit.attempts >= MAX_ATTEMPTS)
+        .values(status="failed", error="lease expired", updated_at=now)
+    )
+
+    unit = db.scalar(
+        select(WorkUnit)
+        .where(
+            WorkUnit.queue == queue,
+            WorkUnit.attempts < MAX_ATTEMPTS,
+            or_(WorkUnit.status == "pending", expired),
+        )
+        .order_by(WorkUnit.id)
+        .limit(1)
+        .with_for_update(skip_locked=True)
+    )
+    if unit is None:
+        db.commit()
+        return None
+
+    if unit.status == "leased":
+        logger.warning(f"Reclaiming unit {unit.id} from {unit.worker} (lease expired)")
+    unit.status = "leased"
+    unit.worker = worker
+    unit.leased_until = now + timedelta(seconds=lease_seconds)
+    unit.attempts += 1
+    unit.updated_at = now
+    db.commit()
+    return unit
+
+
+def _finish(db: Session, unit: WorkUnit, worker: str, **values) -> bool:
+    """リースを持っている場合のみ作業単位を更新する"""
+    # Connection.execute は CursorResult を返すため rowcount を型付きで読める
+    result = db.connection().execute(
+        update(WorkUnit)
+        .where(WorkUnit.id == unit.id, WorkUnit.worker == worker, WorkUnit.status == "leased")
+        .values(updated_at=datetime.utcnow(), leased_until=None, **values)
+    )
+    db.commit()
+    if result.rowcount == 0:
+        logger.warning(f"Unit {unit.id} is no longer leased by {worker}")
+        return False
+    return True
+
+
+def complete(db: Session, unit: WorkUnit, worker: str, rows: int) -> bool:
+    return _finish(db, unit, worker, status="done", rows=rows, error=None)
+
+
+def fail(db: Session, unit: WorkUnit, worker: str, error: str) -> bool:
+    """失敗を記録する（試行回数が残っていれば未処理に戻す）"""
+    status = "failed" if unit.attempts >= MAX_ATTEMPTS else "pending"
+    return _finish(db, unit, worker, status=status, error=error)
+
+
+def progress(db: Session, queue: str) -> dict:
+    """キューの進捗（work_unit_progress ビューの1行）"""
+    row = (
+        db.execute(text("SELECT * FROM work_unit_progress WHERE queue = :queue"), {"queue": queue})
+        .mappings()
+        .first()
+    )
+    return dict(row) if row else {"queue": queue, "total": 0, "pending": 0, "leased": 0}
+
+
+def run_worker(
+    db: Session,
+    queue: str,
+    worker: str,
+    handler: Callable[[WorkUnit], int],
+    lease_seconds: int = DEFAULT_LEASE_SECONDS,
+    poll_seconds: float = POLL_SECONDS,
+) -> dict:
+    """キューが空になるまで作業単位を取得して処理する
+
+    他のワーカーの処理中の作業単位が残っている間は、リース切れに備えて待機する。
+
+    Args:
+        handler: 作業単位を処理して保存行数を返す関数（失敗時は例外を送出）
+
+    Returns:
+        このワーカーが処理した作業単位の数・保存行数
+    """
+    processed = {"done": 0, "failed": 0, "rows": 0}
+    while True:
+        unit = claim(db, queue, worker, lease_seconds)
+        if unit is None:
+            current = progress(db, queue)
+            if not current["pending"] and not current["leased"]:
+                break
+            time.sleep(poll_seconds)
+            continue
+
+        logger.info(f"Processing unit {unit.id} ({len(unit.codes)} codes, attempt {unit.attempts})")
+        try:
+            rows = handler(unit)
+        except Exception as e:
+            logger.error(f"Unit {unit.id} failed: {e}")
+            db.rollback()
+            fail(db, unit, worker, str(e))
+            processed["failed"] += 1
+            continue
+
+        if complete(db, unit, worker, rows):
+            processed["done"] += 1
+            processed["rows"] += rows
+
+    logger.info(f"Worker {worker} finished: {processed}")
+    return processed
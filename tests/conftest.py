@@ -0,0 +1,34 @@
+"""テスト共通の設定
+
+PostgreSQLが必要なテストには ``@pytest.mark.postgres``（モジュール全体なら
+``pytestmark = pytest.mark.postgres``）を付ける。接続できない環境ではスキップする。
+"""
+
+import functools
+
+import pytest
+from sqlalchemy import text
+
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "postgres: マイグレーション済みのPostgreSQLが必要なテスト")
+
+
+@functools.cache
+def _db_available() -> bool:
+    from src.database import get_engine
+
+    try:
+        with get_engine().connect() as conn:
+            conn.execute(text("SELECT 1 FROM alembic_version"))
+        return True
+    except Exception:
+        return False
+
+
+def pytest_collection_modifyitems(config, items):
+    postgres_items = [item for item in items if item.get_closest_marker("postgres")]
+    if postgres_items and not _db_available():
+        skip = pytest.mark.skip(reason="PostgreSQL is not available")
+        for item in postgres_items:
+            item.add_marker(skip)
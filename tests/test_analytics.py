@@ -0,0 +1,119 @@
+"""DuckDB分析クエリのテスト"""
+
+from datetime import date
+from unittest.mock import MagicMock
+
+import pandas as pd
+import pytest
+
+duckdb = pytest.importorskip("duckdb")
+
+from src.analytics import (  # noqa: E402
+    EXPORT_COLUMNS,
+    AnalyticsError,
+    export_parquet,
+    exported_dates,
+    market_breadth,
+    replace_codes,
+    sector_return_ranks,
+    write_partitions,
+)
+
+DATES = [date(2024, 1, 4), date(2024, 1, 5), date(2024, 1, 9)]
+
+
+@pytest.fixture
+def export_dir(tmp_path):
+    closes = {
+        "1001": [100.0, 110.0, 120.0],
+        "1002": [100.0, 90.0, 90.0],
+        "2001": [50.0, 50.0, 55.0],
+    }
+    sectors = {"1001": "A", "1002": "A", "2001": "B"}
+    rows = [
+        {
+            "code": code,
+            "name": f"name{code}",
+            "sector": sectors[code],
+            "trade_date": trade_date,
+            "close": close,
+            "adjusted_close": None,
+        }
+        for code, values in closes.items()
+        for trade_date, close in zip(DATES, values)
+    ]
+    write_partitions(pd.DataFrame(rows), tmp_path)
+    return tmp_path
+
+
+def test_exported_dates(export_dir):
+    """日付ごとのファイルが作成されることを確認"""
+    assert exported_dates(export_dir) == DATES
+
+
+def test_sector_return_ranks(export_dir):
+    """期間リターンとセクター内順位"""
+    start, end, rows = sector_return_ranks(export_dir, window=2)
+    assert (start, end) == (DATES[0], DATES[-1])
+    ranks = {row["code"]: (row["rank"], row["sector_size"]) for row in rows}
+    assert ranks == {"1001": (1, 2), "1002": (2, 2), "2001": (1, 1)}
+    assert rows[0]["return"] == pytest.approx(0.2)
+
+
+def test_sector_return_ranks_filters(export_dir):
+    """基準日・業種での絞り込み"""
+    start, end, rows = sector_return_ranks(export_dir, window=1, as_of=DATES[1], sector="A")
+    assert (start, end) == (DATES[0], DATES[1])
+    assert [row["code"] for row in rows] == ["1001", "1002"]
+
+
+def test_sector_return_ranks_not_enough_days(export_dir):
+    """エクスポート日数が足りない場合はエラー"""
+    with pytest.raises(AnalyticsError):
+        sector_return_ranks(export_dir, window=3)
+
+
+def test_market_breadth(export_dir):
+    """騰落数は開始日の前営業日からの変化で数える"""
+    rows = market_breadth(export_dir, start=DATES[1])
+    assert [(r["advancers"], r["decliners"], r["unchanged"]) for r in rows] == [
+        (1, 1, 1),
+        (2, 0, 1),
+    ]
+    assert [r["ad_line"] for r in rows] == [0, 2]
+
+
+def test_replace_codes(export_dir):
+    """指定した銘柄の行だけが差し替わり、他の銘柄と列の型は変わらないことを確認"""
+    rows = [
+        {"code": "1001", "trade_date": DATES[0], "close": 50.0, "adjusted_close": None},
+        {"code": "1001", "trade_date": DATES[1], "close": 55.0, "adjusted_close": None},
+        # エクスポートしていない日付は書き出さない
+        {"code": "1001", "trade_date": date(2024, 1, 10), "close": 60.0, "adjusted_close": None},
+    ]
+    assert replace_codes(pd.DataFrame(rows), export_dir, ["1001"]) == 2
+    assert exported_dates(export_dir) == DATES
+
+    frame = duckdb.sql(
+        f"SELECT * FROM read_parquet('{export_dir}/*/*.parquet') ORDER BY trade_date, code"
+    ).df()
+    closes = frame.pivot(index="trade_date", columns="code", values="close")
+    assert closes["1001"].tolist() == [50.0, 55.0, 120.0]
+    assert closes["1002"].tolist() == [100.0, 90.0, 90.0]
+    assert frame.loc[frame["code"] == "1001", "name"].isna().tolist() == [True, True, False]
+    assert str(frame["close"].dtype) == "float64"
+
+
+def test_full_export_removes_stale_dates(export_dir):
+    """全期間の書き出しでDBに無い日付のファイルを削除することを確認"""
+    rows = [
+        tuple({**dict.fromkeys(EXPORT_COLUMNS), "code": "1001", "trade_date": d}.values())
+        for d in DATES[1:]
+    ]
+    db = MagicMock()
+    db.scalar.return_value = DATES[1]
+    db.execute.return_value.all.side_effect = [rows] + [[]] * (date.today().year - 2024)
+
+    assert export_parquet(db, export_dir, full=True) == 2
+    assert exported_dates(export_dir) == DATES[1:]
+    assert not (export_dir / f"trade_date={DATES[0]}").exists()
@@ -0,0 +1,105 @@
+"""列指向ストアの同期・読み込みのテスト（マイグレーション済みのPostgreSQLが必要）"""
+
+from datetime import date, timedelta
+
+import numpy as np
+import pytest
+from sqlalchemy import delete, text, update
+
+from src.columnar import ColumnarStore, sync_store
+from src.database import SessionLocal
+from src.models import Stock, StockPrice
+from src.partitions import ensure_partitions, partition_name
+
+pytestmark = pytest.mark.postgres
+
+# 既存のデータより後になるように、遠い将来の営業日（平日）を使う
+DAYS = [d for d in (date(2099, 3, 2) + timedelta(days=i) for i in range(10)) if d.weekday() < 5]
+CODES = ["T801", "T802", "T803"]
+
+
+def _price(code: str, day: date, close: float) -> StockPrice:
+    return StockPrice(
+        code=code,
+        trade_date=day,
+        open=close,
+        high=close,
+        low=close,
+        close=close,
+        adjusted_close=close,
+        volume=1000,
+    )
+
+
+@pytest.fixture
+def prices():
+    with SessionLocal() as db:
+        created = not db.scalar(
+            text("SELECT to_regclass(:name) IS NOT NULL"), {"name": partition_name(2099)}
+        )
+        ensure_partitions(db, DAYS[0], DAYS[-1])
+        db.add_all([Stock(code=code, name=code) for code in CODES])
+        db.add_all([_price("T801", day, 100.0 + i) for i, day in enumerate(DAYS[:6])])
+        db.add_all([_price("T802", day, 200.0 + i) for i, day in enumerate(DAYS[:6])])
+        db.commit()
+    yield
+    with SessionLocal() as db:
+        db.execute(delete(StockPrice).where(StockPrice.code.in_(CODES)))
+        db.execute(delete(Stock).where(Stock.code.in_(CODES)))
+        if created:
+            db.execute(text(f"DROP TABLE {partition_name(2099)}"))
+        db.commit()
+
+
+def test_sync_appends_codes_and_dates(prices, tmp_path):
+    """差分同期で新しい日付・銘柄が追加され、既存の値が残ることを確認"""
+    with SessionLocal() as db:
+        assert sync_store(db, tmp_path) > 0
+        store = ColumnarStore(tmp_path)
+        assert "T801" in store and "T803" not in store
+        assert store.series("T801").tolist() == [100.0 + i for i in range(6)]
+
+        db.add_all([_price("T801", DAYS[6], 106.0), _price("T803", DAYS[6], 300.0)])
+        db.commit()
+        # 前回の最終日の RESYNC_DAYS 日前以降だけを読み込む
+        assert sync_store(db, tmp_path) == 2 * 4 + 2
+
+    assert store.refresh()
+    assert store.series("T801").tolist() == [100.0 + i for i in range(7)]
+    assert store.series("T803").tolist() == [300.0]
+    assert store.series("T803").index[0] == DAYS[6]
+    # 列の追加でファイルが作り直されても既存の銘柄の値は変わらない
+    assert store.series("T802").tolist() == [200.0 + i for i in range(6)]
+    capacity, columns = np.load(tmp_path / "close.npy", mmap_mode="r").shape
+    assert capacity >= len(store.dates) and columns == len(store.codes)
+
+
+def test_sync_full_codes_reloads_history(prices, tmp_path):
+    """full_codes に指定した銘柄だけ全期間を読み直すことを確認"""
+    with SessionLocal() as db:
+        sync_store(db, tmp_path)
+        # 株式分割で過去の値が変わった想定（差分同期の範囲より前の日）
+        for code in ("T801", "T802"):
+            db.execute(
+                update(StockPrice)
+                .where(StockPrice.code == code, StockPrice.trade_date == DAYS[0])
+                .values(close=50.0)
+            )
+        db.commit()
+
+        sync_store(db, tmp_path)
+        store = ColumnarStore(tmp_path)
+        assert store.series("T801").iloc[0] == 100.0
+
+        sync_store(db, tmp_path, full_codes=["T801"])
+        store.refresh()
+        assert store.series("T801").iloc[0] == 50.0
+        assert store.series("T802").iloc[0] == 200.0
+
+
+def test_series_is_zero_copy(prices, tmp_path):
+    """欠損の無い銘柄の時系列はメモリマップのビューであることを確認"""
+    with SessionLocal() as db:
+        sync_store(db, tmp_path)
+    store = ColumnarStore(tmp_path)
+    assert np.shares_memory(store.series("T801").to_numpy(), store._columns["close"])
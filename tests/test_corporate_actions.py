@@ -0,0 +1,66 @@
+"""株式分割・配当の検出のテスト"""
+
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+from src.corporate_actions import COLUMNS, detect_adjusted_codes, price_frame
+
+DAY = date(2026, 3, 27)
+
+
+def _frame(rows: list[tuple]) -> pd.DataFrame:
+    return pd.DataFrame(rows, columns=COLUMNS)
+
+
+def test_detect_split_and_dividend():
+    """分割（終値の変化）と配当（調整比率の変化）を検出することを確認"""
+    stored = _frame(
+        [
+            ("7203", DAY, 3000.0, 2950.0),
+            ("9984", DAY, 8000.0, 8000.0),
+            ("6758", DAY, 3500.0, 3400.0),
+        ]
+    )
+    downloaded = _frame(
+        [
+            # 配当落ち: 終値は同じで調整後終値が下がる
+            ("7203", DAY, 3000.0, 2900.0),
+            # 1:4の株式分割: 過去の終値も分割調整される
+            ("9984", DAY, 2000.0, 2000.0),
+            # 変化なし（丸め誤差程度）
+            ("6758", DAY, 3500.0, 3400.01),
+        ]
+    )
+    assert detect_adjusted_codes(stored, downloaded) == ["7203", "9984"]
+
+
+def test_detect_ignores_missing_values():
+    """保存済みの行が無い・欠損値がある場合は検出しないことを確認"""
+    stored = _frame([("7203", DAY, 3000.0, None), ("9984", DAY, None, None)])
+    downloaded = _frame(
+        [
+            ("7203", DAY, 3000.0, 2900.0),
+            ("9984", DAY, 2000.0, 2000.0),
+            ("6758", DAY, 3500.0, 3400.0),
+        ]
+    )
+    assert detect_adjusted_codes(stored, downloaded) == []
+    assert detect_adjusted_codes(_frame([]), downloaded) == []
+
+
+def test_price_frame_multi_ticker():
+    """yf.download の複数銘柄の結果を縦持ちに変換することを確認"""
+    index = pd.DatetimeIndex(["2026-03-26", "2026-03-27"])
+    columns = pd.MultiIndex.from_product([["7203.T", "9984.T"], ["Close", "Adj Close"]])
+    data = pd.DataFrame(
+        np.array([[3000.0, 2950.0, 8000.0, 8000.0], [3010.0, 2960.0, np.nan, np.nan]]),
+        index=index,
+        columns=columns,
+    )
+
+    frame = price_frame(data, {"7203.T": "7203", "9984.T": "9984", "6758.T": "6758"})
+    assert list(frame["code"]) == ["7203", "7203", "9984", "9984"]
+    assert frame["trade_date"].iloc[1] == DAY
+    assert frame["adjusted_close"].iloc[1] == 2960.0
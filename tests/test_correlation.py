@@ -0,0 +1,83 @@
+"""相関行列・共分散行列のテスト"""
+
+from datetime import date, datetime
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+import pandas as pd
+
+from src.correlation import (
+    align_closes,
+    correlation_matrix,
+    daily_returns,
+    pairwise_moments,
+    to_nested_list,
+)
+from src.freshness import DataVersion
+
+
+def test_pairwise_moments_match_pandas():
+    """欠損をペアごとに除外した結果が DataFrame.corr / cov と一致することを確認"""
+    rng = np.random.default_rng(0)
+    returns = rng.normal(0, 0.02, (60, 4))
+    returns[rng.random((60, 4)) < 0.2] = np.nan
+    # 1日しかリターンが無い銘柄
+    returns[:, 3] = np.nan
+    returns[5, 3] = 0.01
+
+    observations, covariance, correlation = pairwise_moments(returns)
+    frame = pd.DataFrame(returns)
+    np.testing.assert_allclose(covariance, frame.cov(min_periods=2).to_numpy())
+    np.testing.assert_allclose(correlation, frame.corr(min_periods=2).to_numpy())
+    assert observations[0, 0] == np.count_nonzero(~np.isnan(returns[:, 0]))
+    assert np.isnan(correlation[3]).all()
+
+
+def test_align_closes_and_returns():
+    """trade_date で揃え、前日か当日の終値が無い日のリターンをNaNにすることを確認"""
+    rows = [
+        ("7203", date(2026, 10, 14), 100.0),
+        ("7203", date(2026, 10, 15), 110.0),
+        ("7203", date(2026, 10, 16), 99.0),
+        ("9984", date(2026, 10, 14), 200.0),
+        ("9984", date(2026, 10, 16), 210.0),
+    ]
+    dates, closes = align_closes(rows, ["7203", "9984"])
+    assert dates == [date(2026, 10, 14), date(2026, 10, 15), date(2026, 10, 16)]
+
+    returns = daily_returns(closes)
+    np.testing.assert_allclose(returns[:, 0], [0.1, -0.1])
+    assert np.isnan(returns[:, 1]).all()
+
+
+def test_results_are_cached_per_data_version():
+    """同じ銘柄の集合・期間・データ世代では再計算しないことを確認"""
+    rows = [
+        (code, date(2026, 10, day), price * (1 + 0.01 * day * sign))
+        for code, price, sign in [("7203", 100.0, 1), ("9984", 200.0, -1)]
+        for day in (13, 14, 15, 16)
+    ]
+    version = DataVersion(
+        generation=5, latest_trade_date=date(2026, 10, 16), updated_at=datetime(2026, 10, 16)
+    )
+
+    with patch("src.correlation.load_closes", return_value=rows) as load:
+        first = correlation_matrix(MagicMock(), ["9984", "7203"], 3, version)
+        second = correlation_matrix(MagicMock(), ["7203", "9984", "7203"], 3, version)
+        assert second is first
+        assert load.call_count == 1
+
+        newer = DataVersion(6, version.latest_trade_date, version.updated_at)
+        correlation_matrix(MagicMock(), ["7203", "9984"], 3, newer)
+        assert load.call_count == 2
+
+    assert first.codes == ["7203", "9984"]
+    assert first.correlation[0, 0] == 1.0
+    assert not first.correlation.flags.writeable
+
+
+def test_to_nested_list_replaces_nan():
+    """NaNがNoneになり、値はPythonのfloatになることを確認"""
+    values = np.array([[1.0, np.nan], [np.nan, -0.5]])
+    assert to_nested_list(values) == [[1.0, None], [None, -0.5]]
+    assert type(to_nested_list(values)[0][0]) is float
@@ -0,0 +1,62 @@
+"""書き込み用・読み取り用エンジンのテスト（PostgreSQLが必要）
+
+READ_DATABASE_URL に別のPostgreSQLインスタンスを指定して実行すると、読み取り用の
+セッションがそちらに接続することも確認する。
+"""
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.engine import make_url
+
+from src.config import Config, config
+from src.database import create_db_engine, get_read_db
+
+
+def _settings(connection) -> tuple[str, str]:
+    return tuple(
+        connection.execute(
+            text("SELECT current_setting('application_name'), current_setting('statement_timeout')")
+        ).one()
+    )
+
+
+def test_reader_falls_back_to_primary():
+    """READ_DATABASE_URL が無ければ読み取り用もプライマリに接続することを確認"""
+    settings = Config(read_database_url="")
+    assert settings.reader_engine.url == settings.database_url
+    replica = Config(read_database_url="postgresql://u:p@replica:5432/stocks")
+    assert replica.reader_engine.url == "postgresql://u:p@replica:5432/stocks"
+    assert replica.writer_engine.url == replica.database_url
+
+
+@pytest.mark.postgres
+def test_engines_apply_pool_settings():
+    """プールごとに application_name・文のタイムアウトが設定されることを確認"""
+    settings = config.writer_engine
+    settings.name = "test"
+    settings.statement_timeout_ms = 1500
+    engine = create_db_engine(settings)
+    try:
+        assert engine.pool.size() == config.write_pool_size
+        with engine.connect() as conn:
+            assert _settings(conn) == ("stock-test", "1500ms")
+    finally:
+        engine.dispose()
+
+
+@pytest.mark.postgres
+def test_api_dependency_reads_from_reader():
+    """APIの参照系の依存関係が読み取り用エンジンを使うことを確認"""
+    dependency = get_read_db()
+    db = next(dependency)
+    try:
+        name, _ = _settings(db.connection())
+        assert name == "stock-reader"
+
+        url = make_url(config.reader_engine.url)
+        port, database = db.execute(
+            text("SELECT current_setting('port'), current_database()")
+        ).one()
+        assert (int(port), database) == (url.port or 5432, url.database)
+    finally:
+        dependency.close()
@@ -0,0 +1,58 @@
+"""データ鮮度・条件付きリクエストのテスト"""
+
+from datetime import datetime, timezone
+
+from src.freshness import DataVersion, next_ingestion_at
+from src.http_cache import _etag_matches, cache_control
+from src.trading_calendar import JST
+
+
+def test_next_ingestion_same_day():
+    """予定時刻前なら当日の16:30"""
+    now = datetime(2024, 1, 10, 9, 0, tzinfo=JST)
+    assert next_ingestion_at(now) == datetime(2024, 1, 10, 16, 30, tzinfo=JST)
+
+
+def test_next_ingestion_next_day():
+    """予定時刻を過ぎていれば翌日の16:30（UTC入力も可）"""
+    now = datetime(2024, 1, 10, 8, 0, tzinfo=timezone.utc)  # 17:00 JST
+    assert next_ingestion_at(now) == datetime(2024, 1, 11, 16, 30, tzinfo=JST)
+
+
+def test_etag_matches():
+    """If-None-Matchの比較を確認"""
+    etag = '"3-abc"'
+    assert _etag_matches(etag, '"3-abc"')
+    assert _etag_matches(etag, '"1-xyz", W/"3-abc"')
+    assert _etag_matches(etag, "*")
+    assert not _etag_matches(etag, '"2-abc"')
+
+
+def test_cache_control_until_next_ingestion():
+    """予定時刻後に更新済みなら次回の予定時刻までキャッシュさせる"""
+    now = datetime(2024, 1, 10, 9, 0, tzinfo=JST)
+    version = DataVersion(
+        generation=3,
+        latest_trade_date=None,
+        updated_at=datetime(2024, 1, 9, 8, 0),  # 17:00 JST（UTCのnaive）
+    )
+    assert cache_control(version, now) == "public, max-age=27000"
+
+
+def test_cache_control_before_ingestion_starts():
+    """予定時刻を過ぎて更新が始まる前はキャッシュさせない"""
+    version = DataVersion(
+        generation=3,
+        latest_trade_date=None,
+        updated_at=datetime(2024, 1, 9, 8, 0),
+    )
+    assert cache_control(version, datetime(2024, 1, 10, 16, 31, tzinfo=JST)) == "no-cache"
+    # 更新されないまま INGESTION_TIMEOUT を過ぎたら次回の予定時刻までキャッシュさせる
+    assert cache_control(version, datetime(2024, 1, 10, 23, 0, tzinfo=JST)).startswith("public")
+
+    updated = DataVersion(
+        generation=4,
+        latest_trade_date=None,
+        updated_at=datetime(2024, 1, 10, 7, 45),  # 16:45 JST
+    )
+    assert cache_control(updated, datetime(2024, 1, 10, 17, 0, tzinfo=JST)).startswith("public")
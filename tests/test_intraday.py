@@ -0,0 +1,63 @@
+"""分足の変換のテスト"""
+
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+from src.intraday import bar_frame, bar_time, from_ticks, to_ticks
+
+
+def _bars(index: pd.DatetimeIndex, close: list[float]) -> pd.DataFrame:
+    close_array = np.array(close, dtype=float)
+    return pd.DataFrame(
+        {
+            "Open": close_array,
+            "High": close_array + 0.5,
+            "Low": close_array - 0.5,
+            "Close": close_array,
+            "Adj Close": close_array,
+            "Volume": [100, 200, np.nan],
+        },
+        index=index,
+    )
+
+
+def test_bar_frame_converts_to_jst_offsets_and_ticks():
+    """UTCの時刻を9:00（JST）からの経過分に、価格を整数に変換することを確認"""
+    index = pd.date_range("2026-10-16 00:00", periods=3, freq="5min", tz="UTC")
+    data = pd.concat(
+        {
+            "7203.T": _bars(index, [2800.1, np.nan, 2801.0]),
+            "9984.T": _bars(index, [np.nan, np.nan, np.nan]),
+        },
+        axis=1,
+    )
+
+    frame = bar_frame(data, {"7203.T": "7203", "9984.T": "9984"}, "5m")
+    # 四本値に欠損のある足・全て欠損の銘柄は含めない
+    assert list(frame["minute"]) == [0, 10]
+    assert list(frame["close"]) == [28001, 28010]
+    assert list(frame["high"]) == [28006, 28015]
+    assert list(frame["volume"]) == [100, 0]
+    assert set(frame["code"]) == {"7203"}
+    assert set(frame["interval"]) == {5}
+    assert frame["trade_date"].iloc[0] == date(2026, 10, 16)
+
+
+def test_single_ticker_frame_in_local_time():
+    """単一銘柄（列が1階層）・タイムゾーン無しの時刻はJSTとして扱うことを確認"""
+    index = pd.DatetimeIndex(["2026-10-16 12:30", "2026-10-16 12:31", "2026-10-16 15:29"])
+    frame = bar_frame(_bars(index, [100.0, 100.1, 99.9]), {"7203.T": "7203"}, "1m")
+    assert list(frame["minute"]) == [210, 211, 389]
+    assert list(frame["interval"]) == [1, 1, 1]
+
+
+def test_round_trip():
+    """保存用の整数から円・時刻に戻せることを確認"""
+    assert [from_ticks(t) for t in to_ticks(np.array([2805.5, 0.1, 12345.0]))] == [
+        2805.5,
+        0.1,
+        12345.0,
+    ]
+    assert bar_time(date(2026, 10, 16), 389).isoformat() == "2026-10-16T15:29:00+09:00"
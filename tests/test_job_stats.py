@@ -0,0 +1,56 @@
+"""ジョブのステージ別計測のテスト"""
+
+import json
+
+import pytest
+
+from src.job_stats import JobStats
+
+
+def test_nested_stages():
+    """入れ子のステージと記録した値がサマリーに含まれることを確認"""
+    stats = JobStats("test_job")
+    with stats.stage("download") as stage:
+        stage.add_batch(rows=10, download_seconds=0.5)
+        stage.add_batch(rows=5, download_seconds=0.2)
+        with stats.stage("save") as inner:
+            inner.add(rows=15)
+        stage.add(rows=15)
+    stats.finish()
+
+    summary = stats.summary()
+    assert summary["status"] == "success"
+    assert summary["failed_stage"] is None
+    [download] = summary["stages"]
+    assert download["name"] == "download"
+    assert download["rows"] == 15
+    assert [b["rows"] for b in download["batches"]] == [10, 5]
+    assert download["stages"][0]["name"] == "save"
+    assert download["stages"][0]["rows"] == 15
+
+
+def test_failed_stage():
+    """例外が発生したステージを記録することを確認"""
+    stats = JobStats("test_job")
+    with pytest.raises(RuntimeError):
+        with stats.stage("outer"):
+            with stats.stage("inner"):
+                raise RuntimeError("boom")
+    stats.finish(RuntimeError("boom"))
+
+    summary = stats.summary()
+    assert summary["status"] == "failed"
+    assert summary["failed_stage"] == "inner"
+    assert summary["error"] == "RuntimeError: boom"
+
+
+def test_write_summary(tmp_path):
+    """サマリーがJSONファイルに書き出されることを確認"""
+    stats = JobStats("test_job")
+    with stats.stage("only"):
+        pass
+    stats.finish()
+
+    path = stats.write_summary(tmp_path)
+    assert path.name.startswith("test_job_")
+    assert json.loads(path.read_text())["stages"][0]["name"] == "only"
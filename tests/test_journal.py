@@ -0,0 +1,98 @@
+"""取り込みジョブの実行ジャーナルのテスト"""
+
+from datetime import date, datetime
+from unittest.mock import MagicMock, patch
+
+from src.downloader import StockDownloader
+from src.journal import IngestionJournal
+from src.models import IngestionBatch, IngestionRun
+from src.stock_list import StockInfo
+
+STOCKS = [StockInfo(code=code, name=code) for code in ("1301", "1332", "7203", "9984", "6758")]
+
+
+def _batch(batch_no: int, codes: list[str], status: str) -> IngestionBatch:
+    return IngestionBatch(
+        run_id=1,
+        batch_no=batch_no,
+        codes=codes,
+        status=status,
+        rows=0,
+        attempts=1,
+        updated_at=datetime(2026, 1, 5),
+    )
+
+
+def _resumed_journal(batches: list[IngestionBatch]) -> IngestionJournal:
+    journal = IngestionJournal(MagicMock(), "backfill")
+    journal.run = IngestionRun(
+        id=1,
+        job="backfill",
+        start_date=date(2025, 1, 6),
+        end_date=date(2026, 1, 6),
+        status="running",
+        started_at=datetime(2026, 1, 5),
+    )
+    journal.batches = batches
+    journal.resumed = True
+    return journal
+
+
+def test_plan_new_run():
+    """新しい実行ではバッチに分割して記録し、全バッチを返すことを確認"""
+    journal = IngestionJournal(MagicMock(), "backfill")
+    pending = journal.plan(STOCKS, 2, datetime(2025, 1, 6), datetime(2026, 1, 6))
+
+    assert [batch.codes for batch, _ in pending] == [["1301", "1332"], ["7203", "9984"], ["6758"]]
+    assert [stocks for _, stocks in pending][1] == STOCKS[2:4]
+    assert all(batch.status == "pending" for batch, _ in pending)
+    assert journal.start_date == datetime(2025, 1, 6)
+    journal.db.add_all.assert_called_once()
+
+
+def test_plan_resume_skips_done_batches():
+    """再開時は完了済みのバッチを飛ばし、記録した期間を使うことを確認"""
+    journal = _resumed_journal(
+        [
+            _batch(0, ["1301", "1332"], "done"),
+            _batch(1, ["7203", "9984"], "failed"),
+            # 中断時に処理中だったバッチ・銘柄リストから外れた銘柄
+            _batch(2, ["6758", "9999"], "running"),
+        ]
+    )
+    pending = journal.plan(STOCKS, 2, datetime(2026, 3, 1), datetime(2026, 3, 2))
+
+    assert [batch.batch_no for batch, _ in pending] == [1, 2]
+    assert [s.code for s in pending[1][1]] == ["6758"]
+    assert journal.start_date == datetime(2025, 1, 6)
+    assert journal.end_date == datetime(2026, 1, 6)
+    journal.db.add_all.assert_not_called()
+
+
+@patch("src.downloader.time.sleep")
+@patch("src.downloader.ensure_partitions")
+def test_download_records_checkpoints(mock_partitions, mock_sleep):
+    """バッチの成功・失敗がジャーナルに記録されることを確認"""
+    journal = _resumed_journal(
+        [_batch(0, ["1301", "1332"], "failed"), _batch(1, ["7203", "9984"], "pending")]
+    )
+    downloader = StockDownloader(journal.db, batch_size=2)
+    downloader._upsert_stocks = MagicMock()
+
+    def download_batch(stocks, start_date, end_date):
+        assert start_date == datetime(2025, 1, 6)
+        if stocks[0].code == "7203":
+            downloader.batch_stats.append({"error": "rate limited"})
+            return 0
+        downloader.batch_stats.append({})
+        return 10
+
+    downloader._download_batch = download_batch
+
+    assert downloader.download_stock_prices(STOCKS, journal=journal) == 10
+    assert [(b.status, b.rows, b.attempts) for b in journal.batches] == [
+        ("done", 10, 2),
+        ("failed", 0, 2),
+    ]
+    assert journal.batches[1].error == "rate limited"
+    assert journal.run.status == "failed"
@@ -0,0 +1,166 @@
+"""市場の日次集計のテスト（マイグレーション済みのPostgreSQLが必要）"""
+
+from datetime import date, timedelta
+
+import pytest
+from sqlalchemy import delete, text, update
+
+from src.database import SessionLocal
+from src.market_stats import (
+    get_market_stats,
+    refresh_market_stats,
+    refresh_market_stats_by_year,
+)
+from src.models import MarketDailyStat, Stock, StockPrice
+from src.partitions import ensure_partitions, partition_name
+
+pytestmark = pytest.mark.postgres
+
+# 他のデータと重ならない年の21営業日（平日）
+DAYS = [d for d in (date(1999, 3, 1) + timedelta(days=i) for i in range(29)) if d.weekday() < 5]
+LAST = DAYS[-1]
+
+
+def _prices(code: str, closes: list[float], ma20: float | None) -> list[StockPrice]:
+    return [
+        StockPrice(
+            code=code,
+            trade_date=day,
+            open=close,
+            high=close + 1,
+            low=close - 1,
+            close=close,
+            adjusted_close=close,
+            volume=1000,
+            ma20=ma20 if day == LAST else None,
+        )
+        for day, close in zip(DAYS, closes)
+    ]
+
+
+@pytest.fixture
+def market():
+    with SessionLocal() as db:
+        created = not db.scalar(
+            text("SELECT to_regclass(:name) IS NOT NULL"), {"name": partition_name(1999)}
+        )
+        ensure_partitions(db, DAYS[0], LAST)
+        db.add_all(
+            [
+                Stock(code="T901", name="上昇", market="テスト市場", sector="テスト業種A"),
+                Stock(code="T902", name="下落", market="テスト市場", sector="テスト業種A"),
+                Stock(code="T903", name="横ばい", market="テスト市場", sector="テスト業種B"),
+            ]
+        )
+        db.add_all(_prices("T901", [100.0 + i for i in range(len(DAYS))], ma20=110.0))
+        db.add_all(_prices("T902", [200.0 - i for i in range(len(DAYS))], ma20=195.0))
+        db.add_all(_prices("T903", [50.0] * len(DAYS), ma20=None))
+        db.commit()
+    yield
+    with SessionLocal() as db:
+        codes = ["T901", "T902", "T903"]
+        db.execute(delete(MarketDailyStat).where(MarketDailyStat.trade_date <= LAST))
+        db.execute(delete(StockPrice).where(StockPrice.code.in_(codes)))
+        db.execute(delete(Stock).where(Stock.code.in_(codes)))
+        if created:
+            db.execute(text(f"DROP TABLE {partition_name(1999)}"))
+        db.commit()
+
+
+def _stats(scope: str) -> dict[str, MarketDailyStat]:
+    with SessionLocal() as db:
+        rows = get_market_stats(db, scope, start_date=LAST, end_date=LAST)
+    return {row.scope_value: row for row in rows}
+
+
+def test_daily_stats_by_scope(market):
+    """全体・業種別・市場区分別の集計を確認"""
+    with SessionLocal() as db:
+        assert refresh_market_stats(db, LAST, LAST) == 4
+
+    overall = _stats("all")[""]
+    assert (overall.codes, overall.advancers, overall.decliners, overall.unchanged) == (3, 1, 1, 1)
+    # 上昇銘柄は前19営業日の高値を更新、下落銘柄は安値を更新
+    assert (overall.new_highs, overall.new_lows) == (1, 1)
+    assert (overall.above_ma20, overall.ma20_codes) == (1, 2)
+    expected_return = ((120.0 / 119.0 - 1) + (180.0 / 181.0 - 1) + 0.0) / 3
+    assert overall.average_return == pytest.approx(expected_return)
+
+    sectors = _stats("sector")
+    assert {name: row.codes for name, row in sectors.items()} == {
+        "テスト業種A": 2,
+        "テスト業種B": 1,
+    }
+    assert sectors["テスト業種A"].average_return == pytest.approx(
+        ((120.0 / 119.0 - 1) + (180.0 / 181.0 - 1)) / 2
+    )
+    assert _stats("market")["テスト市場"].codes == 3
+
+
+def test_new_highs_need_full_window(market):
+    """前19営業日のデータが揃わない日は新高値・新安値を数えないことを確認"""
+    with SessionLocal() as db:
+        refresh_market_stats(db, DAYS[0], LAST)
+        rows = get_market_stats(db, "all", start_date=DAYS[0], end_date=LAST)
+    assert len(rows) == len(DAYS)
+    assert rows[0].advancers + rows[0].decliners + rows[0].unchanged == 0
+    # 前19営業日が揃うのは20日目から
+    assert [row.new_highs for row in rows] == [0] * 19 + [1] * (len(DAYS) - 19)
+    assert [row.new_lows for row in rows] == [0] * 19 + [1] * (len(DAYS) - 19)
+
+
+def test_refresh_removes_stale_groups(market):
+    """再集計で銘柄が無くなったグループの行が消えることを確認"""
+    with SessionLocal() as db:
+        refresh_market_stats(db, LAST, LAST)
+        db.execute(update(Stock).where(Stock.code == "T903").values(sector="テスト業種A"))
+        db.commit()
+        refresh_market_stats(db, LAST, LAST)
+    assert {name: row.codes for name, row in _stats("sector").items()} == {"テスト業種A": 3}
+
+
+def test_refresh_by_year_covers_range(market):
+    """年単位に分けた再集計でも期間の全日が作り直されることを確認"""
+    with SessionLocal() as db:
+        count = refresh_market_stats_by_year(db, date(1998, 12, 1), LAST)
+        rows = get_market_stats(db, "all", start_date=date(1998, 12, 1), end_date=LAST)
+    # 1日あたり全体・業種2つ・市場区分1つの4行
+    assert count == 4 * len(DAYS)
+    assert [row.trade_date for row in rows] == DAYS
+
+
+@pytest.fixture
+def split(market):
+    """最終日に1:2の株式分割があった銘柄（生の終値は半分になり、調整後終値は連続）"""
+    with SessionLocal() as db:
+        db.add(Stock(code="T904", name="分割", market="テスト市場", sector="テスト業種B"))
+        for day in DAYS:
+            close, adjusted = (51.0, 51.0) if day == LAST else (100.0, 50.0)
+            db.add(
+                StockPrice(
+                    code="T904",
+                    trade_date=day,
+                    open=close,
+                    high=close + 1,
+                    low=close - 1,
+                    close=close,
+                    adjusted_close=adjusted,
+                    volume=1000,
+                )
+            )
+        db.commit()
+    yield
+    with SessionLocal() as db:
+        db.execute(delete(StockPrice).where(StockPrice.code == "T904"))
+        db.execute(delete(Stock).where(Stock.code == "T904"))
+        db.commit()
+
+
+def test_split_is_compared_on_adjusted_prices(split):
+    """株式分割の権利落ち日を値下がり・新安値と数えず、調整後の値で比較することを確認"""
+    with SessionLocal() as db:
+        refresh_market_stats(db, LAST, LAST)
+    row = _stats("sector")["テスト業種B"]
+    assert (row.codes, row.advancers, row.decliners, row.unchanged) == (2, 1, 0, 1)
+    assert (row.new_highs, row.new_lows) == (1, 0)
+    assert row.average_return == pytest.approx((51.0 / 50.0 - 1) / 2)
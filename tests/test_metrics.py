@@ -0,0 +1,98 @@
+"""APIメトリクス（レイテンシ・ステータス・クエリ数・/metrics）のテスト"""
+
+import pytest
+from fastapi import FastAPI, HTTPException
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import QueuePool
+
+from src.api import app
+from src.metrics import _pool_collector, instrument_engine, metrics_middleware, metrics_response
+
+ROUTE = "/items/{item_id}"
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine("sqlite://", poolclass=QueuePool, pool_size=2)
+    instrument_engine(engine, name="test")
+    yield engine
+    del _pool_collector.engines["test"]
+    engine.dispose()
+
+
+@pytest.fixture
+def client(engine):
+    test_app = FastAPI()
+    test_app.middleware("http")(metrics_middleware)
+
+    @test_app.get(ROUTE)
+    def get_item(item_id: int, queries: int = 0):
+        with engine.connect() as conn:
+            for _ in range(queries):
+                conn.execute(text("SELECT 1"))
+        if item_id == 0:
+            raise HTTPException(status_code=404)
+        return {"item_id": item_id}
+
+    return TestClient(test_app)
+
+
+def _sample(name: str, **labels) -> float:
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+def test_requests_are_labelled_by_route_template(client):
+    """生のパスではなくルートのテンプレートでレイテンシ・ステータス数を記録することを確認"""
+    ok = _sample("api_requests_total", method="GET", route=ROUTE, status="200")
+    not_found = _sample("api_requests_total", method="GET", route=ROUTE, status="404")
+    observed = _sample("api_request_duration_seconds_count", method="GET", route=ROUTE)
+    unmatched = _sample("api_requests_total", method="GET", route="unmatched", status="404")
+
+    for item_id in (1, 2, 0):
+        client.get(f"/items/{item_id}")
+    client.get("/no/such/path")
+
+    assert _sample("api_requests_total", method="GET", route=ROUTE, status="200") == ok + 2
+    assert _sample("api_requests_total", method="GET", route=ROUTE, status="404") == not_found + 1
+    assert _sample("api_request_duration_seconds_count", method="GET", route=ROUTE) == observed + 3
+    assert _sample("api_requests_total", method="GET", route="unmatched", status="404") == (
+        unmatched + 1
+    )
+    assert _sample("api_requests_total", method="GET", route="/items/1", status="200") == 0.0
+
+
+def test_query_count_per_request(client):
+    """1リクエスト中に実行したクエリ数がヒストグラムに記録されることを確認"""
+    count = _sample("api_request_db_queries_count", route=ROUTE)
+    total = _sample("api_request_db_queries_sum", route=ROUTE)
+    at_most_three = _sample("api_request_db_queries_bucket", route=ROUTE, le="3.0")
+
+    client.get("/items/1", params={"queries": 3})
+    client.get("/items/1", params={"queries": 7})
+
+    assert _sample("api_request_db_queries_count", route=ROUTE) == count + 2
+    assert _sample("api_request_db_queries_sum", route=ROUTE) == total + 10
+    assert _sample("api_request_db_queries_bucket", route=ROUTE, le="3.0") == at_most_three + 1
+
+
+def test_metrics_endpoint(engine):
+    """/metrics がPrometheus形式でリクエスト・プールのメトリクスを返すことを確認"""
+    client = TestClient(app)
+    client.get("/health")
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    body = response.text
+    assert 'api_requests_total{method="GET",route="/health",status="200"}' in body
+    assert 'db_pool_size{engine="test"} 2.0' in body
+
+
+def test_multiprocess_metrics_include_pool_gauges(engine, monkeypatch, tmp_path):
+    """マルチプロセス集約時もプールのゲージを返すことを確認"""
+    monkeypatch.setenv("PROMETHEUS_MULTIPROC_DIR", str(tmp_path))
+    with engine.connect():
+        body = metrics_response().body.decode()
+    assert 'db_pool_checked_out{engine="test"} 1.0' in body
@@ -0,0 +1,170 @@
+"""データ更新通知（LISTEN/NOTIFY）とSSE配信のテスト"""
+
+import asyncio
+import json
+import threading
+import time
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import psycopg2
+import pytest
+from fastapi.testclient import TestClient
+
+from src.api import STREAM_MAX_CODES, app, stream_price_updates
+from src.config import config
+from src.database import SessionLocal
+from src.freshness import DataVersion
+from src.notifications import PriceUpdateListener, notify_prices_updated
+
+
+class _Stop(BaseException):
+    """LISTENスレッドのループを抜けるための例外（Exception ではないので再接続されない）"""
+
+
+class _FakeRequest:
+    def __init__(self, headers: dict, connected_polls: int = 0):
+        self.headers = headers
+        self._connected_polls = connected_polls
+
+    async def is_disconnected(self) -> bool:
+        self._connected_polls -= 1
+        return self._connected_polls < 0
+
+
+async def _read_stream(response, limit: int) -> list[str]:
+    chunks = []
+    async for chunk in response.body_iterator:
+        chunks.append(chunk)
+        if len(chunks) == limit:
+            break
+    await response.body_iterator.aclose()
+    return chunks
+
+
+def test_subscribe_fans_out_to_all_queues():
+    """通知が購読中の全キューに届き、購読解除したキューには届かないことを確認"""
+    listener = PriceUpdateListener("postgresql://unused")
+
+    async def scenario():
+        with patch.object(PriceUpdateListener, "_run"):
+            first, second, third = (listener.subscribe() for _ in range(3))
+        listener.unsubscribe(second)
+        listener._broadcast({"generation": 7})
+        await asyncio.sleep(0)
+        return first, second, third
+
+    first, second, third = asyncio.run(scenario())
+    assert first.get_nowait() == {"generation": 7}
+    assert third.get_nowait() == {"generation": 7}
+    assert second.empty()
+
+
+def test_listener_reconnects_after_connection_drops():
+    """コネクションが切れたら再接続して LISTEN し直し、以降の通知を配信することを確認"""
+    dropped = MagicMock()
+    dropped.poll.side_effect = psycopg2.OperationalError("server closed the connection")
+    dropped.notifies = []
+
+    reconnected = MagicMock()
+    reconnected.notifies = []
+
+    def deliver():
+        if reconnected.poll.call_count == 1:
+            reconnected.notifies.append(SimpleNamespace(payload=json.dumps({"generation": 8})))
+        else:
+            raise _Stop
+
+    reconnected.poll.side_effect = deliver
+
+    listener = PriceUpdateListener("postgresql://unused")
+    loop = asyncio.new_event_loop()
+    queue: asyncio.Queue = asyncio.Queue()
+    listener._subscribers.add((loop, queue))
+    try:
+        with (
+            patch("src.notifications.psycopg2.connect", side_effect=[dropped, reconnected]),
+            patch("src.notifications.select.select", side_effect=lambda r, w, x, t: (r, [], [])),
+            patch("src.notifications.time.sleep") as sleep,
+            pytest.raises(_Stop),
+        ):
+            listener._run()
+        loop.run_until_complete(asyncio.sleep(0))
+    finally:
+        loop.close()
+
+    sleep.assert_called_once()
+    assert dropped.close.called and reconnected.close.called
+    reconnected.cursor.return_value.__enter__.return_value.execute.assert_called_with(
+        "LISTEN prices_updated"
+    )
+    assert queue.get_nowait() == {"generation": 8}
+
+
+@pytest.mark.parametrize(
+    ("last_event_id", "replayed"),
+    [("3", True), ("5", False)],
+)
+def test_last_event_id_replay(last_event_id, replayed):
+    """Last-Event-ID が古ければ取りこぼした更新をすぐに送り、最新なら送らないことを確認"""
+    version = DataVersion(generation=5, latest_trade_date=None, updated_at=None)
+    listener = MagicMock()
+    request = _FakeRequest({"last-event-id": last_event_id})
+
+    async def scenario():
+        response = await stream_price_updates(request, codes=None)
+        return await _read_stream(response, limit=10)
+
+    with (
+        patch("src.api.listener", listener),
+        patch("src.api.SessionLocal"),
+        patch("src.api.get_data_version", return_value=version),
+    ):
+        chunks = asyncio.run(scenario())
+
+    assert chunks[0].startswith("retry:")
+    if replayed:
+        assert chunks[1].startswith("event: prices_updated\nid: 5\n")
+        assert len(chunks) == 2
+    else:
+        assert len(chunks) == 1
+    listener.unsubscribe.assert_called_once()
+
+
+def test_stream_rejects_too_many_codes():
+    """銘柄数が上限を超えると400になることを確認"""
+    codes = ",".join(str(1000 + i) for i in range(STREAM_MAX_CODES + 1))
+    response = TestClient(app).get("/prices/stream", params={"codes": codes})
+    assert response.status_code == 400
+
+
+@pytest.mark.postgres
+def test_notify_is_delivered_as_sse_frame():
+    """コミットした NOTIFY が SSE のイベントとして届くことを確認"""
+    listener = PriceUpdateListener(config.database_url)
+    request = _FakeRequest({}, connected_polls=1)
+
+    def notify():
+        with SessionLocal() as db:
+            notify_prices_updated(db, {"generation": 991, "latest_trade_date": None})
+            db.commit()
+
+    async def scenario():
+        response = await stream_price_updates(request, codes=None)
+        assert (await response.body_iterator.__anext__()).startswith("retry:")
+        frame = asyncio.ensure_future(response.body_iterator.__anext__())
+        # LISTENスレッドの接続を待たずに送ると届かないため、届くまで送り直す
+        deadline = time.monotonic() + 10
+        while not frame.done() and time.monotonic() < deadline:
+            await asyncio.get_running_loop().run_in_executor(None, notify)
+            await asyncio.wait([frame], timeout=0.3)
+        await response.body_iterator.aclose()
+        return frame.result()
+
+    with patch("src.api.listener", listener):
+        chunk = asyncio.run(scenario())
+
+    assert chunk.startswith("event: prices_updated\nid: 991\n")
+    assert json.loads(chunk.split("data: ", 1)[1])["generation"] == 991
+    assert not listener._subscribers
+    assert any(t.name == "price-update-listener" for t in threading.enumerate())
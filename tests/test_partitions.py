@@ -0,0 +1,84 @@
+"""stock_prices のパーティション管理のテスト（マイグレーション済みのPostgreSQLが必要）"""
+
+from datetime import date
+
+import pytest
+from sqlalchemy import text
+
+from src.database import SessionLocal
+from src.models import Stock, StockPrice
+from src.partitions import (
+    detach_partition,
+    detached_name,
+    ensure_partitions,
+    freeze_partition,
+    list_partitions,
+    partition_name,
+)
+
+pytestmark = pytest.mark.postgres
+
+# 他のデータと重ならない年
+YEAR = 1998
+
+
+@pytest.fixture
+def partition():
+    name = partition_name(YEAR)
+    with SessionLocal() as db:
+        created = not db.scalar(text("SELECT to_regclass(:name) IS NOT NULL"), {"name": name})
+        ensure_partitions(db, date(YEAR, 1, 1), date(YEAR, 12, 31))
+    yield name
+    if created:
+        with SessionLocal() as db:
+            db.execute(text(f"DROP TABLE {name}"))
+            db.commit()
+
+
+def test_freeze_partition(partition):
+    """セッションのトランザクションが始まっていてもVACUUM FREEZEできることを確認"""
+    with SessionLocal() as db:
+        db.execute(text("SELECT 1"))
+        freeze_partition(YEAR)
+        vacuumed = db.scalar(
+            text("SELECT last_vacuum IS NOT NULL FROM pg_stat_user_tables WHERE relname = :name"),
+            {"name": partition},
+        )
+    assert vacuumed
+
+
+def test_detached_year_can_be_recreated(partition):
+    """切り離した年は別名で残り、ensure_partitions で空のパーティションが作り直されることを確認"""
+    day = date(YEAR, 6, 1)
+    with SessionLocal() as db:
+        archived = detach_partition(db, YEAR)
+        try:
+            assert archived == detached_name(YEAR)
+            assert ensure_partitions(db, day, day) == [partition]
+            assert partition in {p.name for p in list_partitions(db)}
+            db.add(Stock(code="T981", name="T981"))
+            db.add(StockPrice(code="T981", trade_date=day, close=100.0, volume=1))
+            db.flush()
+            assert db.scalar(text(f"SELECT count(*) FROM {partition}")) == 1
+            db.rollback()
+        finally:
+            db.execute(text(f"DROP TABLE IF EXISTS {archived}"))
+            db.commit()
+
+
+def test_standalone_table_with_partition_name_is_rejected(partition):
+    """同じ名前の独立したテーブルがあると黙って書き込めなくなるのではなくエラーにすることを確認"""
+    with SessionLocal() as db:
+        db.execute(text(f"ALTER TABLE stock_prices DETACH PARTITION {partition}"))
+        db.commit()
+        try:
+            with pytest.raises(ValueError, match="not a partition"):
+                ensure_partitions(db, date(YEAR, 1, 1), date(YEAR, 12, 31))
+        finally:
+            db.execute(
+                text(
+                    f"ALTER TABLE stock_prices ATTACH PARTITION {partition} "
+                    f"FOR VALUES FROM ('{YEAR}-01-01') TO ('{YEAR + 1}-01-01')"
+                )
+            )
+            db.commit()
@@ -0,0 +1,32 @@
+"""週足・月足集計のテスト"""
+
+from datetime import date
+
+import pytest
+
+from src.resample import next_period_start, period_start
+
+
+def test_period_start_week():
+    """週の開始日が月曜日になることを確認"""
+    assert period_start(date(2024, 1, 10), "week") == date(2024, 1, 8)
+    assert period_start(date(2024, 1, 8), "week") == date(2024, 1, 8)
+    assert period_start(date(2024, 1, 14), "week") == date(2024, 1, 8)
+
+
+def test_period_start_month():
+    """月の開始日を確認"""
+    assert period_start(date(2024, 2, 29), "month") == date(2024, 2, 1)
+
+
+def test_next_period_start():
+    """次の期間の開始日を確認（年跨ぎを含む）"""
+    assert next_period_start(date(2024, 1, 10), "week") == date(2024, 1, 15)
+    assert next_period_start(date(2024, 12, 31), "week") == date(2025, 1, 6)
+    assert next_period_start(date(2024, 12, 15), "month") == date(2025, 1, 1)
+
+
+def test_invalid_interval():
+    """未対応の足種別はエラー"""
+    with pytest.raises(ValueError):
+        period_start(date(2024, 1, 1), "day")
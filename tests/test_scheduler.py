@@ -0,0 +1,172 @@
+"""常駐スケジューラのテスト（ジョブと時計を差し替えて実際には待たない）"""
+
+import json
+import urllib.error
+import urllib.request
+from datetime import datetime
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from src.scheduler import Scheduler
+from src.trading_calendar import JST
+
+SCHEDULE = "16:30"
+# 2024-06-04（火）は営業日
+BEFORE_SCHEDULE = datetime(2024, 6, 4, 9, 0, tzinfo=JST)
+SCHEDULED = datetime(2024, 6, 4, 16, 30, tzinfo=JST)
+AFTER_SCHEDULE = datetime(2024, 6, 4, 18, 0, tzinfo=JST)
+
+
+class FakeClock:
+    """呼ばれるたびに times を順に返し、最後の値で止まる時計"""
+
+    def __init__(self, *times: datetime):
+        self.times = list(times)
+
+    def __call__(self) -> datetime:
+        return self.times.pop(0) if len(self.times) > 1 else self.times[0]
+
+
+@pytest.fixture(autouse=True)
+def no_signal_handlers():
+    # run_forever がテストプロセスのSIGINTハンドラを置き換えないようにする
+    with patch("src.scheduler.signal.signal"):
+        yield
+
+
+@pytest.mark.parametrize(
+    ("result", "status"),
+    [(True, "success"), (None, "success"), (False, "skipped"), (RuntimeError("boom"), "failed")],
+)
+def test_run_once_records_status(result, status):
+    """ジョブの戻り値・例外に応じて last_run の status を記録することを確認"""
+    running = []
+
+    def job():
+        running.append(scheduler.running)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    scheduler = Scheduler(job, "test_job", SCHEDULE, clock=FakeClock(AFTER_SCHEDULE))
+    scheduler.run_once("manual")
+
+    assert running == [True]
+    assert not scheduler.running
+    assert scheduler.last_run is not None
+    assert scheduler.last_run["status"] == status
+    assert scheduler.last_run["reason"] == "manual"
+    assert scheduler.last_run["started_at"] == AFTER_SCHEDULE.isoformat()
+
+
+def test_trigger_during_run_queues_one_rerun():
+    """実行中に何度手動実行を要求しても、終了後の再実行は1回だけであることを確認"""
+    calls = []
+
+    def job():
+        calls.append(scheduler.last_run)
+        if len(calls) == 1:
+            for _ in range(3):
+                scheduler.trigger()
+        else:
+            scheduler.stop()
+
+    scheduler = Scheduler(job, "test_job", SCHEDULE, clock=FakeClock(BEFORE_SCHEDULE))
+    scheduler.trigger()
+    scheduler.run_forever()
+
+    assert len(calls) == 2
+    assert scheduler.last_run is not None and scheduler.last_run["reason"] == "manual"
+    assert scheduler.next_run == SCHEDULED
+
+
+def test_runs_at_scheduled_time():
+    """予定時刻を過ぎて起きたら schedule として実行することを確認"""
+    job = MagicMock(side_effect=lambda: scheduler.stop())
+    scheduler = Scheduler(job, "test_job", SCHEDULE, clock=FakeClock(BEFORE_SCHEDULE, SCHEDULED))
+    # 待機がすぐに戻るようにしておく（予定時刻まで時計を進めた想定）
+    scheduler._wake.set()
+    with patch.object(Scheduler, "missed_todays_run", return_value=False):
+        scheduler.run_forever()
+
+    job.assert_called_once()
+    assert scheduler.last_run is not None and scheduler.last_run["reason"] == "schedule"
+
+
+def test_spurious_wake_before_schedule_does_not_run():
+    """予定時刻前に起きただけでは実行しないことを確認"""
+    job = MagicMock()
+    scheduler = Scheduler(job, "test_job", SCHEDULE, clock=FakeClock(BEFORE_SCHEDULE))
+    scheduler._wake.set()
+    with patch.object(scheduler._wake, "clear", side_effect=scheduler.stop):
+        scheduler.run_forever()
+    job.assert_not_called()
+
+
+@pytest.mark.parametrize(
+    ("now", "last_success", "missed"),
+    [
+        (BEFORE_SCHEDULE, None, False),
+        (AFTER_SCHEDULE, None, True),
+        (AFTER_SCHEDULE, 1, False),
+        # 休日は前営業日の予定分を取り戻さない
+        (datetime(2024, 6, 8, 18, 0, tzinfo=JST), None, False),
+    ],
+)
+def test_missed_todays_run(now, last_success, missed):
+    """本日の予定時刻を過ぎていて成功した実行が無い場合だけ取り戻すことを確認"""
+    db = MagicMock()
+    db.scalar.return_value = last_success
+    scheduler = Scheduler(MagicMock(), "test_job", SCHEDULE, clock=FakeClock(now))
+    with patch("src.scheduler.SessionLocal", return_value=db):
+        assert scheduler.missed_todays_run() is missed
+
+
+def test_catch_up_on_start():
+    """起動時に本日分を取りこぼしていればすぐに実行することを確認"""
+    job = MagicMock(side_effect=lambda: scheduler.stop())
+    scheduler = Scheduler(job, "test_job", SCHEDULE, clock=FakeClock(AFTER_SCHEDULE))
+    with patch.object(Scheduler, "missed_todays_run", return_value=True):
+        scheduler.run_forever()
+    job.assert_called_once()
+
+
+@pytest.fixture
+def server():
+    scheduler = Scheduler(MagicMock(), "test_job", SCHEDULE, clock=FakeClock(AFTER_SCHEDULE))
+    scheduler.serve("127.0.0.1", 0)
+    assert scheduler._server is not None
+    host, port = scheduler._server.server_address[:2]
+    yield scheduler, f"http://{host}:{port}"
+    scheduler._server.shutdown()
+    scheduler._server.server_close()
+
+
+def _request(url: str, method: str) -> tuple[int, dict]:
+    try:
+        with urllib.request.urlopen(urllib.request.Request(url, method=method), timeout=5) as res:
+            return res.status, json.loads(res.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read())
+
+
+def test_http_status_and_trigger(server):
+    """/status で状況を返し、/trigger で手動実行を要求できることを確認"""
+    scheduler, url = server
+    scheduler.next_run = SCHEDULED
+
+    assert _request(f"{url}/status", "GET") == (
+        200,
+        {"job": "test_job", "running": False, "next_run": SCHEDULED.isoformat(), "last_run": None},
+    )
+
+    assert _request(f"{url}/trigger", "POST") == (202, {"triggered": True, "queued": False})
+    assert scheduler._manual and scheduler._wake.is_set()
+
+    # 実行中の要求は終了後の再実行として受け付ける
+    scheduler.running = True
+    assert _request(f"{url}/trigger", "POST") == (202, {"triggered": True, "queued": True})
+
+    assert _request(f"{url}/unknown", "GET")[0] == 404
+    assert _request(f"{url}/status", "POST")[0] == 404
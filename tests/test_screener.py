@@ -0,0 +1,100 @@
+"""スクリーナー条件式のテスト"""
+
+from unittest.mock import MagicMock
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import aliased
+
+from src.api import app
+from src.database import get_read_db
+from src.http_cache import conditional_response
+from src.models import StockPrice
+from src.screener import ScreenerError, compile_expression, parse_expression, uses_prev
+
+
+def _compile(expression: str) -> str:
+    node = parse_expression(expression)
+    prev = aliased(StockPrice, name="prev") if uses_prev(node) else None
+    clause = compile_expression(node, StockPrice, prev)
+    return str(clause.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}))
+
+
+def test_simple_comparison():
+    """単純な比較式が変換できることを確認"""
+    assert _compile("rsi9 < 30") == "stock_prices.rsi9 < 30.0"
+
+
+def test_and_or_not():
+    """論理演算子の優先順位を確認"""
+    sql = _compile("rsi9 < 30 and close < bb_lower or not ma5 > ma20")
+    assert sql == (
+        "stock_prices.rsi9 < 30.0 AND stock_prices.close < stock_prices.bb_lower"
+        " OR stock_prices.ma5 <= stock_prices.ma20"
+    )
+
+
+def test_arithmetic_and_division():
+    """算術式とゼロ除算対策を確認"""
+    sql = _compile("close / volume > 0.5 and close < bb_lower * 1.02")
+    assert "nullif(stock_prices.volume, 0)" in sql
+    assert "stock_prices.bb_lower * 1.02" in sql
+
+
+def test_cross_above_uses_previous_day():
+    """cross_aboveが前営業日を参照することを確認"""
+    node = parse_expression("cross_above(ma5, ma20)")
+    assert uses_prev(node)
+    sql = _compile("cross_above(ma5, ma20)")
+    assert "prev.ma5 <= prev.ma20" in sql
+    assert "stock_prices.ma5 > stock_prices.ma20" in sql
+
+
+def test_prev_function():
+    """prev関数を確認"""
+    assert _compile("close > prev(close) * 1.05") == "stock_prices.close > prev.close * 1.05"
+
+
+@pytest.mark.parametrize(
+    "expression",
+    [
+        "",
+        "rsi9 <",
+        "password < 1",
+        "rsi9; DROP TABLE stocks",
+        "rsi9 + 1",
+        "1 < 2",
+        "cross_above(ma5)",
+        "prev(prev(close)) > 1",
+        "(rsi9 < 30) + 1 > 2",
+        "close / 0 > 1",
+        "rsi9 < 30 and " * 60 + "rsi9 < 30",
+    ],
+)
+def test_invalid_expressions(expression):
+    """不正な条件式が拒否されることを確認"""
+    with pytest.raises(ScreenerError):
+        parse_expression(expression) and _compile(expression)
+
+
+@pytest.fixture
+def client():
+    # 条件式の検証はDBに触れる前に行われるため、DBとキャッシュの依存関係は差し替える
+    db = MagicMock()
+    app.dependency_overrides[get_read_db] = lambda: db
+    app.dependency_overrides[conditional_response] = lambda: None
+    yield TestClient(app)
+    app.dependency_overrides.clear()
+    db.query.assert_not_called()
+
+
+@pytest.mark.parametrize(
+    "expression",
+    ["rsi9 <", "1 < 2", "close / 0 > 1", "close > 5 and 2 > 1", "cross_above(ma5)"],
+)
+def test_screener_endpoint_rejects_invalid_expressions(client, expression):
+    """構文エラー・SQLに変換できない式がどちらも400になることを確認"""
+    response = client.get("/screener", params={"q": expression})
+    assert response.status_code == 400
+    assert response.json()["detail"]
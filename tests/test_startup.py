@@ -0,0 +1,40 @@
+"""エントリーポイントの遅延importのテスト"""
+
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def loaded_modules(module: str, candidates: tuple[str, ...]) -> list[str]:
+    """新しいプロセスでmoduleをimportし、candidatesのうち読み込まれたものを返す"""
+    code = f"import sys, {module}; print(','.join(m for m in {candidates!r} if m in sys.modules))"
+    result = subprocess.run(
+        [sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True
+    )
+    return [m for m in result.stdout.strip().split(",") if m]
+
+
+@pytest.mark.parametrize(
+    "module, deferred",
+    [
+        ("src.api", ("pandas", "numpy", "yfinance", "duckdb")),
+        ("src.main", ("pandas", "numpy", "yfinance", "duckdb", "fastapi")),
+        ("src.downloader", ("yfinance",)),
+    ],
+)
+def test_heavy_modules_are_deferred(module, deferred):
+    """重い依存は起動時に読み込まない"""
+    assert loaded_modules(module, deferred) == []
+
+
+def test_database_import_does_not_create_engine():
+    """src.database のimportだけではエンジンを作らない（DBドライバも読み込まない）"""
+    code = "import sys, src.database as d; print(d._engine is None, 'psycopg2' in sys.modules)"
+    result = subprocess.run(
+        [sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True
+    )
+    assert result.stdout.split() == ["True", "False"]
@@ -0,0 +1,102 @@
+"""東証の営業日カレンダーのテスト"""
+
+from datetime import date, datetime
+
+import pytest
+
+from src.trading_calendar import (
+    JST,
+    is_known_non_trading_day,
+    is_trading_day,
+    last_scheduled_run,
+    national_holidays,
+    next_scheduled_run,
+    next_trading_day,
+)
+
+
+def test_national_holidays_2026():
+    """振替休日・国民の休日を含む2026年の祝日"""
+    holidays = national_holidays(2026)
+    assert date(2026, 3, 20) in holidays  # 春分の日
+    assert date(2026, 5, 6) in holidays  # 振替休日（5/3が日曜）
+    assert date(2026, 9, 22) in holidays  # 国民の休日（敬老の日と秋分の日の間）
+    assert date(2026, 9, 23) in holidays  # 秋分の日
+    assert date(2026, 10, 12) in holidays  # スポーツの日
+    assert len(holidays) == 18
+
+
+def test_is_trading_day():
+    """土日・祝日・年末年始は休業日"""
+    assert is_trading_day(date(2026, 10, 19))
+    assert not is_trading_day(date(2026, 10, 18))  # 日曜
+    assert not is_trading_day(date(2026, 11, 23))  # 勤労感謝の日
+    assert not is_trading_day(date(2026, 12, 31))
+    assert is_trading_day(date(2027, 1, 4))  # 大発会
+    assert next_trading_day(date(2026, 12, 30)) == date(2027, 1, 4)
+
+
+def test_next_scheduled_run_skips_holidays():
+    """予定時刻を過ぎていれば次の営業日（連休を跨ぐ）"""
+    now = datetime(2026, 5, 1, 17, 0, tzinfo=JST)
+    assert next_scheduled_run(now, "16:30") == datetime(2026, 5, 7, 16, 30, tzinfo=JST)
+    now = datetime(2026, 5, 1, 9, 0, tzinfo=JST)
+    assert next_scheduled_run(now, "16:30") == datetime(2026, 5, 1, 16, 30, tzinfo=JST)
+
+
+def test_last_scheduled_run():
+    """直近の予定時刻（休業日なら前の営業日）"""
+    now = datetime(2026, 10, 18, 12, 0, tzinfo=JST)  # 日曜
+    assert last_scheduled_run(now, "16:30") == datetime(2026, 10, 16, 16, 30, tzinfo=JST)
+    now = datetime(2026, 10, 19, 16, 31, tzinfo=JST)
+    assert last_scheduled_run(now, "16:30") == datetime(2026, 10, 19, 16, 30, tzinfo=JST)
+
+
+@pytest.mark.parametrize(
+    "day",
+    [
+        date(2018, 2, 23),  # 天皇誕生日が12/23だった年
+        date(2019, 12, 23),  # 2019年は天皇誕生日が無い
+        date(2020, 7, 20),  # 五輪特例で海の日が7/23に移動
+        date(2020, 10, 12),  # 五輪特例でスポーツの日が7/24に移動
+        date(2021, 7, 19),
+        date(2021, 10, 11),
+        date(2021, 8, 11),  # 五輪特例で山の日が8/8に移動
+        date(2001, 9, 17),  # 2002年までの敬老の日は9/15（第3月曜ではない）
+    ],
+)
+def test_past_trading_days(day):
+    """その年の祝日法・特例で祝日でなかった日は営業日"""
+    assert is_trading_day(day)
+
+
+@pytest.mark.parametrize(
+    "day",
+    [
+        date(2018, 12, 24),  # 天皇誕生日（12/23）の振替休日
+        date(2019, 4, 30),  # 国民の休日（昭和の日と即位の日の間）
+        date(2019, 5, 1),  # 即位の日
+        date(2019, 5, 2),
+        date(2019, 10, 22),  # 即位礼正殿の儀
+        date(2020, 7, 23),
+        date(2020, 7, 24),
+        date(2020, 8, 10),
+        date(2021, 7, 22),
+        date(2021, 7, 23),
+        date(2021, 8, 9),  # 山の日（8/8）の振替休日
+        date(2001, 9, 24),  # 秋分の日（9/23）の振替休日
+        date(2005, 5, 4),  # 2006年までは国民の休日
+    ],
+)
+def test_past_holidays(day):
+    """過去の一時的な祝日・移動した祝日は休業日"""
+    assert not is_trading_day(day)
+
+
+def test_known_non_trading_day_before_modelled_years():
+    """祝日を計算できない年は土日・年末年始のみ休業日とみなす"""
+    assert not is_known_non_trading_day(date(1999, 12, 23))  # 当時の天皇誕生日
+    assert is_known_non_trading_day(date(1999, 12, 25))  # 土曜
+    assert is_known_non_trading_day(date(1999, 12, 31))
+    assert is_known_non_trading_day(date(2018, 12, 24))
+    assert not is_known_non_trading_day(date(2020, 7, 20))
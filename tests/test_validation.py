@@ -0,0 +1,84 @@
+"""株価の品質チェックのテスト"""
+
+import numpy as np
+import pandas as pd
+
+from src.validation import validate_prices
+
+# 2026-03-20（春分の日）は休業日
+DATES = pd.DatetimeIndex(["2026-03-17", "2026-03-18", "2026-03-19", "2026-03-20", "2026-03-23"])
+FIELDS = ["Open", "High", "Low", "Close", "Adj Close", "Volume"]
+
+
+def _bars(closes: list[float], volumes: list[float] | None = None) -> pd.DataFrame:
+    closes_array = np.array(closes, dtype=float)
+    return pd.DataFrame(
+        {
+            "Open": closes_array,
+            "High": closes_array * 1.01,
+            "Low": closes_array * 0.99,
+            "Close": closes_array,
+            "Adj Close": closes_array,
+            "Volume": volumes or [1000, 1100, 1200, 1300, 1400],
+        },
+        index=DATES,
+    )
+
+
+def _batch(frames: dict[str, pd.DataFrame]) -> pd.DataFrame:
+    return pd.concat(frames, axis=1)
+
+
+def _reasons(result) -> dict[tuple[str, str], list[str]]:
+    return {(row["code"], str(row["trade_date"])): row["reasons"] for row in result.quarantined}
+
+
+def test_clean_batch():
+    """正常なデータは退避しないことを確認（休業日の行が無い場合）"""
+    data = _batch({"7203.T": _bars([100, 101, 102, np.nan, 104])})
+    result = validate_prices(data, {"7203.T": "7203"})
+    assert result.quarantined == []
+    assert not result.suspect.to_numpy().any()
+
+
+def test_reason_codes():
+    """各チェックの理由コードが付くことを確認"""
+    bad_range = _bars([100, 101, 102, np.nan, 104])
+    bad_range.loc["2026-03-18", "High"] = 90.0
+    spike = _bars([100, 1500, 101, np.nan, 102])
+    zero_volume = _bars([100, 101, 105, np.nan, 106], [1000, 1000, 0, 0, 1000])
+    # 休日に前日の値が複製された行
+    stale = _bars([100, 101, 102, 102, 103])
+    stale.loc["2026-03-20", "Volume"] = 1200
+    data = _batch({"7203.T": bad_range, "9984.T": spike, "6758.T": zero_volume, "8306.T": stale})
+
+    result = validate_prices(
+        data, {"7203.T": "7203", "9984.T": "9984", "6758.T": "6758", "8306.T": "8306"}
+    )
+    reasons = _reasons(result)
+    assert reasons == {
+        ("7203", "2026-03-18"): ["high_below_low", "close_out_of_range"],
+        # 異常値の翌日（元の水準に戻った行）は退避しない
+        ("9984", "2026-03-18"): ["price_spike"],
+        ("6758", "2026-03-19"): ["zero_volume_move"],
+        ("8306", "2026-03-20"): ["non_trading_day", "stale_duplicate"],
+    }
+    assert result.suspect.loc["2026-03-18", "9984"]
+    assert not result.suspect.loc["2026-03-19", "9984"]
+
+
+def test_single_ticker_frame():
+    """単一銘柄（列が1階層）の結果も検査できることを確認"""
+    data = _bars([100, 101, -1, np.nan, 104])
+    result = validate_prices(data, {"7203.T": "7203"})
+    reasons = _reasons(result)
+    assert list(reasons) == [("7203", "2026-03-19")]
+    assert {"non_positive_price", "price_spike"} <= set(reasons[("7203", "2026-03-19")])
+
+
+def test_past_calendar_days_are_not_quarantined():
+    """五輪特例で平日になった日や祝日を計算できない年の行は休業日として退避しないことを確認"""
+    days = pd.DatetimeIndex(["2020-07-17", "2020-07-20", "1999-12-22", "1999-12-23", "1999-12-24"])
+    data = _bars([100, 101, 102, 103, 104]).set_axis(days)
+    result = validate_prices(data, {"7203.T": "7203"})
+    assert all("non_trading_day" not in reasons for reasons in _reasons(result).values())
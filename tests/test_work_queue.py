@@ -0,0 +1,87 @@
+"""分散取り込みの作業キューのテスト（マイグレーション済みのPostgreSQLが必要）"""
+
+import multiprocessing
+import time
+import uuid
+from datetime import date
+
+import pytest
+from sqlalchemy import delete, select
+
+from src.database import SessionLocal
+from src.models import WorkUnit
+from src.work_queue import claim, enqueue, progress, run_worker
+
+pytestmark = pytest.mark.postgres
+
+CODES = [str(1300 + i) for i in range(20)]
+
+
+@pytest.fixture
+def queue():
+    name = f"test-{uuid.uuid4().hex[:8]}"
+    yield name
+    with SessionLocal() as db:
+        db.execute(delete(WorkUnit).where(WorkUnit.queue == name))
+        db.commit()
+
+
+def _units(queue: str) -> list[WorkUnit]:
+    with SessionLocal() as db:
+        return list(db.scalars(select(WorkUnit).where(WorkUnit.queue == queue)))
+
+
+def _work(queue: str, worker: str) -> None:
+    """別プロセスのワーカー（ダウンロードの代わりに少し待つ）"""
+
+    def handle(unit: WorkUnit) -> int:
+        time.sleep(0.05)
+        return len(unit.codes)
+
+    with SessionLocal() as db:
+        run_worker(db, queue, worker, handle, poll_seconds=0.1)
+
+
+def test_enqueue_once(queue):
+    """未完了の作業単位があるキューには重ねて登録しないことを確認"""
+    with SessionLocal() as db:
+        assert enqueue(db, queue, CODES, 5, date(2025, 1, 6), date(2026, 1, 6)) == 4
+        assert enqueue(db, queue, CODES, 5, date(2025, 1, 6), date(2026, 1, 6)) == 0
+        assert progress(db, queue)["pending"] == 4
+
+
+def test_workers_process_each_unit_once(queue):
+    """複数プロセスのワーカーが作業単位を重複なく処理することを確認"""
+    with SessionLocal() as db:
+        enqueue(db, queue, CODES, 1, date(2025, 1, 6), date(2026, 1, 6))
+
+    context = multiprocessing.get_context("spawn")
+    processes = [context.Process(target=_work, args=(queue, f"worker-{i}")) for i in range(3)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join(timeout=60)
+        assert process.exitcode == 0
+
+    units = _units(queue)
+    assert len(units) == len(CODES)
+    assert all(unit.status == "done" and unit.attempts == 1 for unit in units)
+    with SessionLocal() as db:
+        current = progress(db, queue)
+    assert current["done"] == len(CODES)
+    assert current["rows"] == len(CODES)
+
+
+def test_expired_lease_is_reclaimed(queue):
+    """落ちたワーカーのリースが切れると他のワーカーが取り直すことを確認"""
+    with SessionLocal() as db:
+        enqueue(db, queue, CODES[:2], 2, date(2025, 1, 6), date(2026, 1, 6))
+        # 取得したまま処理せずに落ちたワーカー（リースは即座に切れる）
+        assert claim(db, queue, "dead-worker", lease_seconds=0) is not None
+        assert progress(db, queue)["expired"] == 1
+
+        result = run_worker(db, queue, "live-worker", lambda unit: 2, poll_seconds=0.1)
+
+    assert result == {"done": 1, "failed": 0, "rows": 2}
+    [unit] = _units(queue)
+    assert (unit.status, unit.worker, unit.attempts) == ("done", "live-worker", 2)